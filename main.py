@@ -3,11 +3,10 @@ import os
 import shutil
 import time
 import random
-from datetime import datetime
 import winsound # For audio notification (Windows)
 import sys
+import copy
 import PIL.Image 
-import glob
 from dotenv import load_dotenv
 
 # ---------------------------------------------------------
@@ -32,11 +31,14 @@ if 'imghdr' not in sys.modules:
 
 # ---------------------------------------------------------
 
-from moviepy.editor import concatenate_videoclips, AudioFileClip, CompositeAudioClip
 from moviepy.audio.fx.all import audio_fadeout
 from proglog import ProgressBarLogger
 from src.utils import load_config, get_president_assets, validate_system_requirements
-from src.logic import create_video_segment
+from src.proxies import start_background_proxy_build
+from src.library_watcher import start_library_watcher
+from src.profiler import render_profile
+from src.pipeline import collect_audio_order, next_output_path, plan_video, render_plan, create_draft_workspace, \
+    draft_config, final_plan_from_draft, load_draft_plan, discard_draft
 
 # Importación de módulos nuevos con captura de errores
 guionista_error = None
@@ -88,6 +90,11 @@ if CFG:
         for err in startup_errors:
             st.error(err)
         st.warning("⚠️ El sistema puede no funcionar correctamente debido a los errores anteriores.")
+    else:
+        # Proxies normalizados de la biblioteca de videos en segundo plano (una vez por proceso)
+        start_background_proxy_build(copy.deepcopy(CFG), log_callback=print)
+        # Índice y cachés al día con los cambios de la biblioteca (una vez por proceso)
+        start_library_watcher(copy.deepcopy(CFG), log_callback=print)
 
 if guionista_error:
     st.error(f"❌ ERROR CRÍTICO al cargar el módulo 'guionista': {guionista_error}")
@@ -109,162 +116,70 @@ def format_seconds(seconds):
     m, s = divmod(int(seconds), 60)
     return f"{m}m {s}s"
 
-def generate_video_pipeline(src_folder, output_folder, config, status_container, log_callback, engine_version="v1_estable", sound_enabled=True):
+def generate_video_pipeline(src_folder, output_folder, config, status_container, log_callback, engine_version="v1_estable", sound_enabled=True, seed=None, out_path=None, plan=None):
     """
     Función central que orquesta la creación del video a partir de una carpeta de audios.
     Devuelve la ruta del video final generado.
+    `seed` / `out_path`: semilla del video y ruta de salida.
+    `plan`: plan ya decidido (src/pipeline.py, p. ej. el de un borrador); si se pasa, solo se ejecuta.
     """
-    # 1. Recopilar audios
-    if not os.path.exists(src_folder):
-        raise FileNotFoundError(f"No existe la carpeta fuente: {src_folder}")
-        
-    local_audios = glob.glob(os.path.join(src_folder, "*.mp3"))
-    if not local_audios:
-        raise ValueError("No se encontraron archivos .mp3 en la carpeta indicada.")
-        
-    # 2. Ordenar (Intro primero, luego resto reverso numérico)
-    intro_file = None
-    body_files = []
-    
-    for aud in local_audios:
-        if "intro" in os.path.basename(aud).lower():
-            intro_file = aud
+    out_path = out_path or next_output_path(output_folder)
+
+    # Perfilado por etapas (video_settings.profile): '<video>.profile.json' junto al video
+    with render_profile(config, out_path):
+        if plan is None:
+            # 1. Recopilar audios + 2. Ordenar (Intro primero, luego resto reverso numérico)
+            final_audio_order = collect_audio_order(src_folder)
+            # 3. Plan: fotos, duraciones y movimientos de cada segmento (semilla reproducible)
+            plan = plan_video(final_audio_order, config, engine_version=engine_version, seed=seed, log_callback=log_callback)
+
+        # MODO PARALELO: un proceso por segmento + concat sin recodificar (src/pipeline.py)
+        if config["video_settings"].get("parallel_segments", False):
+            status_container.write(f"   ↳ ⚙️ Renderizando {len(plan['segments'])} segmentos en paralelo...")
         else:
-            body_files.append(aud)
-            
-    # Ordenar numéricamente inverso (5, 4, 3, 2, 1)
-    # Asumimos que empiezan con número N_Name.mp3
-    try:
-        body_files.sort(key=lambda x: int(os.path.basename(x).split('_')[0]), reverse=True)
-    except:
-        # Fallback por nombre si no cumple formato
-        body_files.sort(key=lambda x: os.path.basename(x), reverse=True)
-    
-    final_audio_order = []
-    if intro_file: final_audio_order.append(intro_file)
-    final_audio_order.extend(body_files)
-    
-    clips = []
-    token = False
-    
-    # 3. Generar segmentos
-    revealed_presidents = []
-    for aud in final_audio_order:
-        try:
-            name = os.path.splitext(os.path.basename(aud))[0]
-            # Extraer info
-            try:
-                parts = name.split('_')
-                if "intro" in name.lower():
-                    puesto = 1 
-                    presi = "Intro"
-                elif len(parts) >= 2:
-                    puesto = int(parts[0])
-                    # Reconstruir nombre si tenía espacios o guiones
-                    presi = "_".join(parts[1:]) 
-                else:
-                    puesto = 0
-                    presi = name
-            except:
-                puesto = 0
-                presi = name
-
-            log_callback(f"⚙️ Procesando segmento: **{name}** (Personaje: {presi})")
-
-            seg, token = create_video_segment(aud, puesto, presi, config, token, log_callback=log_callback, engine_version=engine_version, revealed_presidents=revealed_presidents)
-            # Agregar a lista de ya revelados para lógica de siluetas
-            revealed_presidents.append(presi)
-            if seg: clips.append(seg)
-        except Exception as e:
-            log_callback(f"❌ Error creando segmento {os.path.basename(aud)}: {e}")
-            print(f"Error detallado: {e}")
-
-    if not clips:
-        raise RuntimeError("No se generaron clips válidos.")
-
-    # 4. Renderizado Final
-    status_container.write(f"   ↳ ⚙️ Renderizando Montaje Final...")
-    
-    timer_ph = st.empty()
-    render_bar = st.progress(0)
-    logger = StreamlitLogger(render_bar, timer_ph)
-    
-    # Transiciones de Audio
-    path_pagina = os.path.join(config["paths"]["resources_library"], "pagina.mp3")
-    sound_effect = None
-    if os.path.exists(path_pagina):
-        try:
-            sound_effect = AudioFileClip(path_pagina)
-        except: pass
-    
-    final = concatenate_videoclips(clips, method="compose")
-    
-    if len(clips) > 1 and sound_effect:
-        sfx_clips = []
-        current_time = 0
-        for i in range(len(clips) - 1):
-            current_time += clips[i].duration
-            start_t = max(0, current_time - 0.2)
-            sfx_clips.append(sound_effect.set_start(start_t))
-        
-        if sfx_clips:
-            global_audio = CompositeAudioClip([final.audio] + sfx_clips)
-            global_audio = global_audio.set_duration(final.duration)
-            final = final.set_audio(global_audio)
-            
-    if final.audio:
-        final_audio = final.audio.set_duration(final.duration)
-        # ELIMINADO FADEOUT GLOBAL DE 1s POR PETICIÓN DE USUARIO
-        # final_audio = final_audio.fx(audio_fadeout, 1.0)
-        final = final.set_audio(final_audio)
-
-    # NAMING CONVENTION (V2 - Sequential)
-    try:
-        current_mp4s = [f for f in os.listdir(output_folder) if f.endswith(".mp4") and "TikTok_AUTO_" in f]
-        count = len(current_mp4s)
-        out_name = f"TikTok_AUTO_{count + 1}.mp4"
-    except:
-        timestamp = datetime.now().strftime("%H%M%S")
-        out_name = f"TikTok_AUTO_{timestamp}.mp4"
-
-    # Fallback de Seguridad (Si existe, apendice Timestamp)
-    if os.path.exists(os.path.join(output_folder, out_name)):
-        timestamp = datetime.now().strftime("%H%M%S")
-        name_no_ext = os.path.splitext(out_name)[0]
-        out_name = f"{name_no_ext}_{timestamp}.mp4"
-        
-    out_path = os.path.join(output_folder, out_name)
-    
-    sets = config["video_settings"]
-    
-    # Resize final para seguridad (pares)
-    safe_w, safe_h = tuple(sets["resolution"])
-    if safe_w % 2 != 0: safe_w -= 1
-    if safe_h % 2 != 0: safe_h -= 1
-    
-    if final.w != safe_w or final.h != safe_h:
-        final = final.resize(newsize=(safe_w, safe_h))
-
-    final.write_videofile(
-        out_path, 
-        fps=sets["fps"], 
-        codec='libx264', 
-        audio_codec='aac', 
-        logger=logger, 
-        threads=8, 
-        preset='ultrafast',
-        remove_temp=True, # Limpieza temporales ffmpeg
-        ffmpeg_params=['-pix_fmt', 'yuv420p']
-    )
-    
-    render_bar.empty()
-    timer_ph.empty()
+            status_container.write(f"   ↳ ⚙️ Renderizando Montaje Final...")
+
+        timer_ph = st.empty()
+        render_bar = st.progress(0)
+        logger = StreamlitLogger(render_bar, timer_ph)
+        # 4. Ejecutar el plan + 5. Renderizado Final (secuencial o paralelo según config)
+        out_path = render_plan(plan, out_path, config, log_callback=log_callback, logger=logger)
+        render_bar.empty()
+        timer_ph.empty()
     
     return out_path
  
 
 
 
+def generate_video_or_draft(src_folder, config, status_container, log_callback, engine_version, draft_res=None):
+    """
+    Sin `draft_res`: render final directo. Con `draft_res`: render de borrador (misma
+    semilla que tendrá el final) y se deja pendiente de aprobación en la sesión.
+    """
+    if not draft_res:
+        return generate_video_pipeline(src_folder, config["paths"]["output_folder"], config, status_container, log_callback, engine_version)
+
+    audio_dir, draft_path = create_draft_workspace(src_folder, config["paths"]["output_folder"])
+    out_path = generate_video_pipeline(
+        audio_dir, os.path.dirname(draft_path), draft_config(config, draft_res),
+        status_container, log_callback, engine_version, out_path=draft_path
+    )
+    st.session_state.setdefault("pending_drafts", []).append(out_path)
+    return out_path
+
+
+def render_final_from_draft(draft_path, config, status_container, log_callback):
+    """Render de producción ejecutando el plan guardado del borrador (o su semilla y motor)."""
+    audio_dir, seed, draft_engine = final_plan_from_draft(draft_path)
+    plan = load_draft_plan(draft_path)
+    # Con plan guardado no se vuelve a planificar: la semilla solo sirve sin él
+    return generate_video_pipeline(
+        audio_dir, config["paths"]["output_folder"], config,
+        status_container, log_callback, draft_engine, seed=seed if plan is None else None, plan=plan
+    )
+
+
 # ---------------------------------------------------------
 # INTERFAZ PRINCIPAL
 # ---------------------------------------------------------
@@ -296,7 +211,23 @@ with st.sidebar:
     
     st.divider()
     
+    # Borrador rápido -> aprobación -> final (mismo plan de render)
+    draft_mode = st.checkbox("📝 Borrador antes del final", value=False, help="Renderiza primero a baja resolución; el final (calidad seleccionada) reutiliza las mismas fotos y movimientos.")
+    draft_label = st.selectbox(
+        "Calidad del Borrador",
+        options=list(res_options.keys()),
+        index=len(res_options) - 1,
+        disabled=not draft_mode
+    )
+    draft_res = res_options[draft_label] if draft_mode else None
+    
+    st.divider()
+    
     sound_on = st.checkbox("🔔 Sonido al Finalizar", value=True)
+    
+    # Informe de tiempos por etapa junto a cada video (<video>.profile.json)
+    if CFG:
+        CFG["video_settings"]["profile"] = st.checkbox("⏱️ Perfilar render", value=CFG["video_settings"].get("profile", False), help="Guarda junto al video el tiempo y la memoria de cada etapa (imágenes, frames, audio, encoder).")
 
 # SELECTOR DE MODO (Por defecto Automático)
 # ---------------------------------------------------------
@@ -353,13 +284,13 @@ if mode == "Manual (Carpetas)":
                      
                  # LLAMADA AL NUEVO PIPELINE CON LA CARPETA
                  try:
-                     out_video = generate_video_pipeline(
+                     out_video = generate_video_or_draft(
                          path_lote, 
-                         CFG["paths"]["output_folder"], 
                          CFG, 
                          status, 
                          log_manual, 
-                         engine_version
+                         engine_version,
+                         draft_res=draft_res
                      )
                      status.write(f"✅ Video {vid_id+1} OK: {os.path.basename(out_video)}")
                  except Exception as e:
@@ -486,13 +417,13 @@ elif mode == "Automático (IA)":
                     st_edit_status.info("🔄 Renderizando...")
                     t4 = time.time()
                     
-                    final_video_path = generate_video_pipeline(
+                    final_video_path = generate_video_or_draft(
                         audio_output_folder,
-                        CFG["paths"]["output_folder"],
                         CFG,
                         status,  # Status container global para logs de ffmpeg si fuera necesario
                         log_cb,
-                        engine_version
+                        engine_version,
+                        draft_res=draft_res
                     )
                     
                     t5 = time.time()
@@ -556,4 +487,40 @@ elif mode == "Automático (IA)":
                 st.rerun()
                 
         with st.expander("📝 Detalle de Logs Globales"):
-            for l in logs_auto: st.write(l)
\ No newline at end of file
+            for l in logs_auto: st.write(l)
+
+# ---------------------------------------------------------
+# BORRADORES PENDIENTES (Aprobar -> Render Final con el mismo plan)
+# ---------------------------------------------------------
+pending_drafts = [p for p in st.session_state.get("pending_drafts", []) if os.path.exists(p)]
+if pending_drafts:
+    st.markdown("---")
+    st.markdown("### 📝 Borradores pendientes de aprobación")
+    
+    for draft_path in pending_drafts:
+        col_video, col_actions = st.columns([1, 2])
+        with col_video:
+            st.video(draft_path)
+        with col_actions:
+            st.write(f"📄 `{os.path.basename(draft_path)}`")
+            
+            if st.button(f"✅ Aprobar y renderizar en {selected_res_label}", key=f"approve_{draft_path}"):
+                target_res = res_options[selected_res_label]
+                CFG["video_settings"]["resolution"] = [target_res[0] - target_res[0] % 2, target_res[1] - target_res[1] % 2]
+                logs_final = []
+                with st.status("🎬 Renderizando versión final...", expanded=True) as status:
+                    try:
+                        final_path = render_final_from_draft(draft_path, CFG, status, logs_final.append)
+                        discard_draft(draft_path)
+                        status.update(label=f"✅ Final OK: {os.path.basename(final_path)}", state="complete", expanded=False)
+                        st.video(final_path)
+                    except Exception as e:
+                        status.error(f"❌ Error en el render final: {e}")
+                with st.expander("Logs"):
+                    for l in logs_final: st.write(l)
+                    
+            if st.button("🗑️ Descartar borrador", key=f"discard_{draft_path}"):
+                discard_draft(draft_path)
+                st.rerun()
+    
+    st.session_state["pending_drafts"] = [p for p in pending_drafts if os.path.exists(p)]
@@ -0,0 +1,314 @@
+import os
+import json
+import time
+import fnmatch
+import threading
+
+from PIL import Image
+
+# ==========================================
+# ÍNDICE PERSISTENTE DE LA BIBLIOTECA DE ASSETS
+# ==========================================
+# BIBLIOTECA_PRESIDENTES y BIBLIOTECA_INTRO suelen estar en una carpeta
+# sincronizada (Drive) donde cada listdir/glob es lento. El índice
+# (<cache>/asset_index.json) guarda por carpeta de personaje sus tokens
+# normalizados, sus fotos (y las que empiezan por 'i'), videos y siluetas, sus
+# etiquetas (tags.txt) y el tamaño y la orientación EXIF de cada imagen. Solo
+# se vuelve a listar una carpeta si cambió su mtime; entre comprobaciones
+# (cache.asset_index_check_seconds) no se toca el disco.
+# Con el vigilante de la biblioteca (src/library_watcher.py) el índice no mira
+# la biblioteca (follow_disk=False): lee la última instantánea publicada por el
+# vigilante, que solo incluye archivos que ya terminaron de copiarse.
+
+INDEX_VERSION = 2
+
+# Mismos patrones que los glob de get_president_assets (src/utils.py)
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png")
+VIDEO_PATTERNS = ("*.mp4", "*.mov")
+# Y que los de get_mystery_silhouette_image (src/logic.py)
+MYSTERY_PATTERNS = ("*silueta*", "*silhouette*")
+MYSTERY_EXTS = (".jpg", ".jpeg", ".png")
+# Etiquetas opcionales del personaje (una por línea o separadas por comas) para la whitelist del guionista
+TAGS_FILE = "tags.txt"
+
+_EXIF_ORIENTATION = 0x0112
+
+_indexes = {}
+
+
+def folder_tokens(folder_name):
+    """Nombre de carpeta normalizado y sus tokens (mismo criterio que find_best_match_folder)."""
+    clean = folder_name.replace("_", " ").lower()
+    return clean, clean.split()
+
+
+def image_header(path):
+    """(ancho, alto, orientación EXIF) leyendo solo la cabecera; Nones si no se puede abrir."""
+    try:
+        with Image.open(path) as img:
+            return img.size[0], img.size[1], img.getexif().get(_EXIF_ORIENTATION, 1)
+    except Exception:
+        return None, None, None
+
+
+def read_tags(path):
+    """Etiquetas de un tags.txt (una por línea o separadas por comas)."""
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return [t.strip() for t in f.read().replace("\n", ",").split(",") if t.strip()]
+
+
+def _matches(name, patterns):
+    return [p for p in patterns if fnmatch.fnmatch(name, p)]
+
+
+def scan_folder(folder_path, naming, previous=None):
+    """
+    Entrada del índice para una carpeta de personaje. `naming`: (video_suffix, silhouette_keyword).
+    `previous`: entrada anterior; las imágenes sin cambios (mtime, tamaño) no se vuelven a abrir.
+    """
+    suffix_video, key_silueta = naming
+    old_files = (previous or {}).get("files", {})
+    files = {}
+    names = []
+    with os.scandir(folder_path) as it:
+        for entry in it:
+            # glob('*') no devuelve ocultos
+            if entry.name.startswith(".") or not entry.is_file():
+                continue
+            names.append(entry.name)
+            if not _matches(entry.name, IMAGE_PATTERNS + VIDEO_PATTERNS + MYSTERY_PATTERNS):
+                continue
+            st = entry.stat()
+            info = {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+            if _matches(entry.name, IMAGE_PATTERNS) or entry.name.lower().endswith(MYSTERY_EXTS):
+                old = old_files.get(entry.name)
+                if old and (old["mtime_ns"], old["size"]) == (info["mtime_ns"], info["size"]):
+                    info.update(width=old.get("width"), height=old.get("height"), orientation=old.get("orientation"))
+                else:
+                    w, h, orientation = image_header(entry.path)
+                    info.update(width=w, height=h, orientation=orientation)
+            files[entry.name] = info
+    names.sort()
+
+    # Clasificación de get_president_assets: siluetas, videos y fotos
+    photos, videos, silhouettes = [], [], []
+    for name in names:
+        if not _matches(name, IMAGE_PATTERNS + VIDEO_PATTERNS):
+            continue
+        lower = name.lower()
+        if key_silueta in lower:
+            silhouettes.append(name)
+        elif suffix_video in os.path.splitext(lower)[0] or name.endswith(('.mp4', '.mov')):
+            videos.append(name)
+        else:
+            photos.append(name)
+
+    # Siluetas específicas del Top 1 (get_mystery_silhouette_image)
+    mystery = [name for pattern in MYSTERY_PATTERNS for name in names if fnmatch.fnmatch(name, pattern)]
+    mystery = sorted(name for name in mystery if name.lower().endswith(MYSTERY_EXTS))
+
+    tags = read_tags(os.path.join(folder_path, TAGS_FILE)) if TAGS_FILE in names else []
+
+    clean, tokens = folder_tokens(os.path.basename(folder_path))
+    return {
+        "mtime_ns": os.stat(folder_path).st_mtime_ns,
+        "clean": clean,
+        "tokens": tokens,
+        "files": files,
+        "photos": photos,
+        "intro_photos": [name for name in photos if name.lower().startswith("i")],
+        "videos": videos,
+        "silhouettes": silhouettes,
+        "mystery": mystery,
+        "tags": tags,
+    }
+
+
+class AssetIndex:
+
+    def __init__(self, path, naming, check_seconds=5.0, follow_disk=True):
+        self.path = path
+        self.naming = list(naming)
+        self.check_seconds = check_seconds
+        self.follow_disk = follow_disk
+        self._lock = threading.Lock()
+        self._checked = {}
+        self._dirty = False
+        self._data = None
+        self._loaded_mtime = None
+        self._load()
+
+    def _load(self):
+        try:
+            self._loaded_mtime = os.stat(self.path).st_mtime_ns
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        # Otra versión u otra convención de nombres: la clasificación guardada no sirve
+        if data.get("version") != INDEX_VERSION or data.get("naming") != self.naming:
+            data = {"version": INDEX_VERSION, "naming": self.naming, "roots": {}}
+        self._data = data
+
+    def _reload_snapshot(self):
+        """Relee el índice si otro proceso (el vigilante) publicó una versión nueva."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._loaded_mtime and not self._dirty:
+            self._load()
+
+    # --- Actualización incremental ---
+    def refresh(self, root, force=False):
+        """
+        Sincroniza la raíz con el disco: solo se listan las carpetas cuyo mtime cambió.
+        Sin follow_disk (y sin `force`) solo se relee la instantánea del vigilante.
+        """
+        root = os.path.abspath(root)
+        with self._lock:
+            now = time.monotonic()
+            last = self._checked.get(root)
+            if not force and last is not None and now - last < self.check_seconds:
+                return self._data["roots"].get(root, {}).get("folders", {})
+            self._checked[root] = now
+            if not self.follow_disk and not force:
+                self._reload_snapshot()
+                known = self._data["roots"].get(root)
+                if known is not None:
+                    return known["folders"]
+                # Raíz que el vigilante aún no ha indexado: primera sincronización con el disco
+            folders, changed = self._sync_root(root)
+        if changed:
+            self.save()
+        return folders
+
+    def _sync_root(self, root):
+        roots = self._data["roots"]
+        try:
+            root_mtime = os.stat(root).st_mtime_ns
+        except OSError:
+            if roots.pop(root, None) is not None:
+                self._dirty = True
+                return {}, True
+            return {}, False
+
+        known = roots.get(root)
+        if known is None or known["mtime_ns"] != root_mtime:
+            # Altas/bajas de carpetas: hay que listar la raíz
+            with os.scandir(root) as it:
+                names = sorted(e.name for e in it if e.is_dir())
+        else:
+            names = list(known["folders"])
+        old_folders = known["folders"] if known else {}
+
+        folders = {}
+        changed = known is None or known["mtime_ns"] != root_mtime
+        for name in names:
+            folder_path = os.path.join(root, name)
+            previous = old_folders.get(name)
+            try:
+                mtime = os.stat(folder_path).st_mtime_ns
+                if previous is not None and previous["mtime_ns"] == mtime:
+                    folders[name] = previous
+                    continue
+                folders[name] = scan_folder(folder_path, self.naming, previous)
+            except OSError:
+                pass
+            changed = True
+        if changed:
+            roots[root] = {"mtime_ns": root_mtime, "folders": folders}
+            self._dirty = True
+        return folders, changed
+
+    def update_folder(self, folder_path):
+        """
+        Vuelve a indexar una carpeta de personaje (o la quita si ya no existe).
+        Devuelve (entrada anterior, entrada nueva); cualquiera puede ser None.
+        """
+        root, name = os.path.split(os.path.abspath(folder_path))
+        with self._lock:
+            known = self._data["roots"].get(root)
+            if known is None:
+                folders, _ = self._sync_root(root)
+                previous, entry = None, folders.get(name)
+            else:
+                previous = known["folders"].get(name)
+                try:
+                    entry = scan_folder(os.path.join(root, name), self.naming, previous)
+                except OSError:
+                    entry = None
+                folders = {k: v for k, v in known["folders"].items() if k != name}
+                if entry is not None:
+                    folders[name] = entry
+                known["folders"] = dict(sorted(folders.items()))
+                self._dirty = True
+        self.save()
+        return previous, entry
+
+    def invalidate(self, root=None):
+        """Fuerza a comprobar el disco en la próxima consulta (de una raíz o de todas)."""
+        with self._lock:
+            if root is None:
+                self._checked.clear()
+            else:
+                self._checked.pop(os.path.abspath(root), None)
+
+    # --- Consultas ---
+    def snapshot(self, root):
+        """Carpetas indexadas de la raíz tal como están ahora en el índice (sin tocar el disco)."""
+        with self._lock:
+            return dict(self._data["roots"].get(os.path.abspath(root), {}).get("folders", {}))
+
+    def folder_names(self, root):
+        """Carpetas de personaje de la raíz (orden alfabético)."""
+        return list(self.refresh(root))
+
+    def folder(self, folder_path):
+        """Entrada del índice de una carpeta de personaje, o None."""
+        root, name = os.path.split(os.path.abspath(folder_path))
+        return self.refresh(root).get(name)
+
+    def assets(self, folder_path):
+        """(fotos, videos, siluetas) con rutas completas, como get_president_assets."""
+        entry = self.folder(folder_path) or {}
+        full = lambda names: [os.path.join(folder_path, n) for n in names]
+        return full(entry.get("photos", [])), full(entry.get("videos", [])), full(entry.get("silhouettes", []))
+
+    def silhouette_images(self, folder_path):
+        """Siluetas específicas (*silueta* / *silhouette*) de la carpeta, como las busca el Top 1."""
+        entry = self.folder(folder_path) or {}
+        return [os.path.join(folder_path, n) for n in entry.get("mystery", [])]
+
+    def image_info(self, image_path):
+        """{'width', 'height', 'orientation', 'mtime_ns', 'size'} de una imagen indexada, o None."""
+        folder_path, name = os.path.split(image_path)
+        entry = self.folder(folder_path) or {}
+        return entry.get("files", {}).get(name)
+
+    def save(self):
+        """Persiste el índice si cambió (escritura atómica)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+            self._loaded_mtime = os.stat(self.path).st_mtime_ns
+            self._dirty = False
+
+
+def get_asset_index(config):
+    """AssetIndex según config["cache"] (una instancia por carpeta), o None si está desactivado."""
+    cache_cfg = config.get("cache", {})
+    if not cache_cfg.get("asset_index_enabled", True):
+        return None
+    path = os.path.join(cache_cfg.get("folder", "./cache"), "asset_index.json")
+    naming = config["naming_convention"]
+    naming = (naming["video_suffix"], naming["silhouette_keyword"])
+    if path not in _indexes or tuple(_indexes[path].naming) != naming:
+        # LibraryWatcher.start (src/library_watcher.py) pone follow_disk=False en este proceso
+        _indexes[path] = AssetIndex(path, naming, float(cache_cfg.get("asset_index_check_seconds", 5)))
+    return _indexes[path]
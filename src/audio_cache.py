@@ -0,0 +1,90 @@
+import os
+import json
+import threading
+import numpy as np
+
+from src.cache import DiskCache, file_signature, file_digest
+from src.audio_mix import decode_audio, probe_audio_duration, trim_segment_audio
+
+# ==========================================
+# CACHÉ DE AUDIO DECODIFICADO + ÍNDICE DE DURACIONES
+# ==========================================
+# Cada mp3 (voces TTS, 'pagina.mp3') se decodifica una sola vez a PCM float32
+# (n, 2) y se guarda como <hash>.npy, que se abre con memmap. El índice
+# (<cache>/audio_index.json) guarda por (ruta, mtime, tamaño) el hash del
+# contenido y la duración de los metadatos: planificar no abre ffmpeg.
+
+_caches = {}
+
+
+class AudioCache:
+
+    def __init__(self, folder, max_bytes, index_path):
+        self.store = DiskCache(folder, max_bytes)
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                self._index = json.load(f)
+        except (OSError, ValueError):
+            self._index = {}
+
+    def info(self, path):
+        """{'hash', 'duration'} del audio (del índice si el archivo no ha cambiado)."""
+        abspath, mtime_ns, size = file_signature(path)
+        key = f"{abspath}|{mtime_ns}|{size}"
+        with self._lock:
+            entry = self._index.get(key)
+        if entry is None:
+            entry = {"hash": file_digest(path), "duration": probe_audio_duration(path)}
+            with self._lock:
+                self._index[key] = entry
+                self._dirty = True
+            # Los workers de render paralelo son procesos: se persiste en cada alta
+            self.save()
+        return entry
+
+    def duration(self, path):
+        return self.info(path)["duration"]
+
+    def digest(self, path):
+        return self.info(path)["hash"]
+
+    def samples(self, path):
+        """PCM float32 (n, 2) a AUDIO_FPS, de solo lectura (memmap)."""
+        key = self.digest(path)
+        cached = self.store.get(key, "npy")
+        if cached is None:
+            pcm = decode_audio(path)
+            cached = self.store.put(key, "npy", lambda tmp_path: np.save(tmp_path, pcm))
+        return np.load(cached, mmap_mode="r")
+
+    def segment_voice(self, path):
+        """Voz del segmento ya recortada (0.15 s) y con fadeout (0.05 s)."""
+        return trim_segment_audio(self.samples(path), nominal_duration=self.duration(path))
+
+    def save(self):
+        """Persiste el índice si hay entradas nuevas (escritura atómica)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._index, f)
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+
+
+def get_audio_cache(config):
+    """AudioCache según config["cache"] (una instancia por carpeta), o None si está desactivada."""
+    cache_cfg = config.get("cache", {})
+    if not cache_cfg.get("audio_enabled", True):
+        return None
+    base = cache_cfg.get("folder", "./cache")
+    folder = os.path.join(base, "audio")
+    if folder not in _caches:
+        max_bytes = int(cache_cfg.get("audio_max_mb", 1024)) * 1024 * 1024
+        _caches[folder] = AudioCache(folder, max_bytes, os.path.join(base, "audio_index.json"))
+    return _caches[folder]
+
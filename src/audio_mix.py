@@ -0,0 +1,106 @@
+import subprocess
+import numpy as np
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+from src.ffmpeg_writer import get_ffmpeg_binary, AUDIO_FPS
+
+# ==========================================
+# MEZCLA DE AUDIO EN UN SOLO BUFFER (NumPy)
+# ==========================================
+# En vez de un CompositeAudioClip (make_frame de cada subclip por bloque), cada
+# mp3 se decodifica una vez a PCM float y se suma en un array preasignado en
+# su offset. El recorte de 0.15 s y el fadeout de 0.05 s de cada voz son
+# operaciones sobre el array.
+
+CHANNELS = 2
+
+# Mismos valores que load_segment_audio (src/logic.py)
+TAIL_TRIM = 0.15
+TAIL_FADE = 0.05
+MIN_TRIM_DURATION = 0.2
+
+# Adelanto del efecto 'pagina.mp3' respecto al corte entre segmentos
+SFX_LEAD = 0.2
+
+
+def decode_audio(path, fps=AUDIO_FPS, channels=CHANNELS):
+    """Decodifica un archivo de audio a float32 (n, canales) con un único proceso ffmpeg."""
+    cmd = [
+        get_ffmpeg_binary(), "-loglevel", "error", "-i", path, "-vn",
+        "-f", "f32le", "-acodec", "pcm_f32le", "-ac", str(channels), "-ar", str(fps), "-",
+    ]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise IOError(f"ffmpeg no pudo decodificar {path}: {proc.stderr.decode(errors='ignore')}")
+    return np.frombuffer(proc.stdout, dtype=np.float32).reshape(-1, channels)
+
+
+def probe_audio_duration(path):
+    """Duración según los metadatos (la misma que AudioFileClip.duration)."""
+    return float(ffmpeg_parse_infos(path)["duration"])
+
+
+def segment_voice_duration(nominal_duration, fps=AUDIO_FPS):
+    """Duración de la voz tras trim_segment_audio, a partir de la duración de los metadatos."""
+    if nominal_duration <= MIN_TRIM_DURATION:
+        return nominal_duration
+    return int(round((nominal_duration - TAIL_TRIM) * fps)) / fps
+
+
+def trim_segment_audio(samples, fps=AUDIO_FPS, nominal_duration=None):
+    """
+    Recorte de 0.15 s al final + fadeout lineal de 0.05 s (como load_segment_audio).
+    `nominal_duration`: duración de los metadatos del mp3. MoviePy recorta sobre
+    ella (incluye el relleno del codificador), no sobre las muestras decodificadas.
+    """
+    if nominal_duration is None:
+        nominal_duration = len(samples) / fps
+    if nominal_duration <= MIN_TRIM_DURATION:
+        return samples
+    n = int(round((nominal_duration - TAIL_TRIM) * fps))
+    out = np.zeros((n,) + samples.shape[1:], dtype=np.float32)
+    m = min(n, len(samples))
+    out[:m] = samples[:m]
+    fade_n = min(n, int(round(TAIL_FADE * fps)))
+    if fade_n > 0:
+        # Ganancia (duración - t) / fade en la ventana final
+        gain = (np.arange(fade_n, 0, -1, dtype=np.float32) / (TAIL_FADE * fps))
+        out[n - fade_n:] *= np.minimum(gain, 1.0)[:, None]
+    return out
+
+
+def mix_into(buffer, samples, start):
+    """Suma `samples` en `buffer` a partir de la muestra `start` (recorta lo que no cabe)."""
+    if start >= len(buffer) or len(samples) == 0:
+        return
+    end = min(len(buffer), start + len(samples))
+    buffer[start:end] += samples[:end - start]
+
+
+def build_soundtrack(audio_paths, durations, sfx_path=None, fps=AUDIO_FPS, decoder=decode_audio,
+                     duration_of=probe_audio_duration, sfx_offsets=None):
+    """
+    Pista final: voz de cada segmento (recortada) en su offset + SFX en cada corte.
+    `durations`: duración de cada segmento en el video. `sfx_offsets`: inicio de cada SFX (transiciones
+    del plan); None = SFX_LEAD antes de cada corte. Devuelve (array (n, 2) float32, duración total).
+    """
+    total_dur = float(sum(durations))
+    buffer = np.zeros((int(round(total_dur * fps)), CHANNELS), dtype=np.float32)
+
+    offsets = np.concatenate([[0.0], np.cumsum(durations)[:-1]]) if durations else []
+    for path, offset in zip(audio_paths, offsets):
+        voice = trim_segment_audio(decoder(path), fps, nominal_duration=duration_of(path))
+        mix_into(buffer, voice, int(round(offset * fps)))
+
+    if len(audio_paths) > 1 and sfx_path:
+        try:
+            sfx = decoder(sfx_path)
+        except Exception:
+            sfx = None
+        if sfx is not None:
+            if sfx_offsets is None:
+                sfx_offsets = [max(0.0, offset - SFX_LEAD) for offset in offsets[1:]]
+            for start in sfx_offsets:
+                mix_into(buffer, sfx, int(round(start * fps)))
+
+    return buffer, total_dur
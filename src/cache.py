@@ -0,0 +1,157 @@
+import os
+import hashlib
+import json
+import threading
+
+# ==========================================
+# CACHÉ EN DISCO (LRU por tamaño)
+# ==========================================
+# Cada entrada es un archivo <hash>.<ext> dentro de la carpeta de la caché.
+# El "último uso" es el mtime del archivo: un acierto lo actualiza (os.utime)
+# y al superar max_bytes se borran primero las entradas más antiguas.
+# El tamaño total se lleva en memoria (se lee de disco una vez y se actualiza
+# en cada put/borrado): la carpeta solo se vuelve a listar al pasar del límite.
+# Las entradas fijadas (pin) no se desalojan mientras un render las necesita.
+
+
+def cache_key(*parts):
+    """Hash estable (sha1) de cualquier combinación de valores serializables a JSON."""
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """sha1 del contenido del archivo (no de su ruta ni de su mtime)."""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def file_signature(path):
+    """(ruta absoluta, mtime_ns, tamaño) de un archivo: cambia si el archivo cambia."""
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+
+class DiskCache:
+
+    def __init__(self, folder, max_bytes):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        os.makedirs(folder, exist_ok=True)
+        self._lock = threading.Lock()
+        self._total = None
+        self._pinned = set()
+
+    def path_for(self, key, ext):
+        return os.path.join(self.folder, f"{key}.{ext}")
+
+    def get(self, key, ext):
+        """Ruta de la entrada si existe (y la marca como usada), o None."""
+        path = self.path_for(key, ext)
+        if not os.path.exists(path):
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return path
+
+    def _file_size(self, path):
+        try:
+            return os.stat(path).st_size
+        except OSError:
+            return 0
+
+    def _add(self, delta):
+        """Suma `delta` al total en memoria (leyéndolo de disco la primera vez)."""
+        with self._lock:
+            if self._total is None:
+                self._total = sum(size for _, size, _ in self.entries())
+            else:
+                self._total = max(0, self._total + delta)
+            return self._total
+
+    def put(self, key, ext, write_func):
+        """
+        Crea la entrada llamando a write_func(ruta_temporal) y la publica de forma atómica.
+        Devuelve la ruta final.
+        """
+        path = self.path_for(key, ext)
+        tmp_path = f"{path}.{os.getpid()}.tmp.{ext}"
+        try:
+            write_func(tmp_path)
+            size = self._file_size(tmp_path)
+            replaced = self._file_size(path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                try: os.remove(tmp_path)
+                except OSError: pass
+        if self._add(size - replaced) > self.max_bytes:
+            # Nunca desaloja la entrada que acaba de crear
+            self.evict(keep=(path,))
+        return path
+
+    def pin(self, path):
+        """Protege la entrada del desalojo (en este proceso) hasta unpin."""
+        with self._lock:
+            self._pinned.add(os.path.abspath(path))
+
+    def unpin(self, path):
+        with self._lock:
+            self._pinned.discard(os.path.abspath(path))
+
+    def invalidate(self, key, ext):
+        path = self.path_for(key, ext)
+        if os.path.exists(path):
+            size = self._file_size(path)
+            try:
+                os.remove(path)
+                self._add(-size)
+            except OSError: pass
+
+    def entries(self):
+        """Lista de (ruta, tamaño, mtime) de las entradas publicadas."""
+        result = []
+        try:
+            names = os.listdir(self.folder)
+        except OSError:
+            return result
+        for name in names:
+            if ".tmp." in name:
+                continue
+            path = os.path.join(self.folder, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if os.path.isfile(path):
+                result.append((path, st.st_size, st.st_mtime))
+        return result
+
+    def total_bytes(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, keep=()):
+        """Borra las entradas menos usadas (salvo las fijadas y `keep`) hasta quedar por debajo de max_bytes."""
+        # Listado real: incluye lo que hayan escrito o borrado otros procesos
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_bytes:
+            with self._lock:
+                protected = self._pinned | {os.path.abspath(p) for p in keep}
+            for path, size, _ in sorted(entries, key=lambda e: e[2]):
+                if os.path.abspath(path) in protected:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    continue
+                if total <= self.max_bytes:
+                    break
+        with self._lock:
+            self._total = total
@@ -0,0 +1,153 @@
+import os
+import re
+import math
+import unicodedata
+import threading
+from collections import Counter
+
+from src.asset_index import get_asset_index, read_tags, TAGS_FILE
+
+# ==========================================
+# WHITELIST DE PERSONAJES (Prompt del guionista)
+# ==========================================
+# {{AVAILABLE_CHARACTERS}} restringe a Gemini a los personajes con carpeta en
+# BIBLIOTECA_PRESIDENTES. La lista se construye desde el índice de assets
+# (src/asset_index.py) y se reutiliza mientras no cambie ninguna carpeta.
+# Con script_whitelist.top_k solo se inyectan los K personajes más afines al
+# tema según BM25 sobre el nombre y las etiquetas de cada carpeta (tags.txt),
+# completando hasta K en orden de biblioteca: el prompt deja de crecer con la
+# biblioteca. Sin tema (modo aleatorio) o sin top_k, la lista es completa.
+
+UNRESTRICTED = "Cualquier presidente de USA (Sin restricción)"
+
+# Parámetros estándar de BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Un guion necesita 5 personajes distintos
+MIN_TOP_K = 5
+
+STOPWORDS = frozenset((
+    "the", "a", "an", "of", "in", "on", "and", "or", "to", "for", "with", "by", "at", "from", "us", "usa",
+    "president", "presidents", "history", "who", "was", "were", "most", "top", "5",
+    "el", "la", "los", "las", "de", "del", "y", "en", "un", "una", "que", "por", "con", "presidente", "presidentes",
+))
+
+# Sufijos que se recortan para casar variantes ('corrupt' / 'corruption', 'scandals' / 'scandal')
+SUFFIXES = ("ations", "ation", "ions", "ion", "ing", "ed", "es", "s", "ly")
+
+_whitelists = {}
+_lock = threading.Lock()
+
+
+def display_name(folder):
+    """Nombre legible para la IA: 'GeorgeWBush' -> 'George W Bush' (si ya tiene espacios, se respeta)."""
+    if " " in folder:
+        return folder
+    return re.sub(r'(?<!^)(?=[A-Z])', ' ', folder)
+
+
+def stem(token):
+    for suffix in SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 4:
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text):
+    """Tokens en minúsculas, sin acentos ni palabras vacías, y con los sufijos comunes recortados."""
+    text = unicodedata.normalize("NFKD", text.replace("_", " ")).encode("ascii", "ignore").decode("ascii")
+    return [stem(t) for t in re.findall(r"[a-z0-9]+", text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+
+    def __init__(self, documents):
+        self.docs = [Counter(doc) for doc in documents]
+        self.lengths = [len(doc) for doc in documents]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        df = Counter(t for doc in self.docs for t in doc)
+        n = len(self.docs)
+        self.idf = {t: math.log(1 + (n - f + 0.5) / (f + 0.5)) for t, f in df.items()}
+
+    def scores(self, query_tokens):
+        scores = [0.0] * len(self.docs)
+        for t in set(query_tokens):
+            idf = self.idf.get(t)
+            if idf is None:
+                continue
+            for i, doc in enumerate(self.docs):
+                tf = doc.get(t)
+                if tf:
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[i] / max(self.avg_length, 1e-9))
+                    scores[i] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+
+class CharacterWhitelist:
+
+    def __init__(self, folders, tags=None):
+        """`folders`: carpetas de personaje (orden de biblioteca); `tags`: {carpeta: [etiquetas]}."""
+        tags = tags or {}
+        self.folders = list(folders)
+        self.names = [display_name(f) for f in self.folders]
+        self.bm25 = BM25Index([tokenize(f"{f} {name} " + " ".join(tags.get(f, [])))
+                               for f, name in zip(self.folders, self.names)])
+
+    def top(self, topic, k):
+        """Los `k` nombres más afines a `topic` (BM25); si faltan coincidencias, completa en orden de biblioteca."""
+        scores = self.bm25.scores(tokenize(topic))
+        ranked = sorted((i for i, s in enumerate(scores) if s > 0), key=lambda i: (-scores[i], i))[:k]
+        if len(ranked) < k:
+            chosen = set(ranked)
+            ranked += [i for i in range(len(self.names)) if i not in chosen][:k - len(ranked)]
+        return [self.names[i] for i in ranked]
+
+    def text(self, topic=None, top_k=None):
+        """Texto para {{AVAILABLE_CHARACTERS}}."""
+        if not self.names:
+            return UNRESTRICTED
+        if topic and topic.strip() and top_k and top_k < len(self.names):
+            return ", ".join(self.top(topic, max(int(top_k), MIN_TOP_K)))
+        return ", ".join(self.names)
+
+
+def _library_snapshot(library_base, config):
+    """(firma, carpetas, etiquetas) de la biblioteca: del índice de assets o, sin él, del disco."""
+    index = get_asset_index(config)
+    if index is not None:
+        folders = index.refresh(library_base)
+        signature = tuple((name, entry["mtime_ns"], tuple(entry.get("tags", []))) for name, entry in folders.items())
+        return signature, list(folders), {name: entry.get("tags", []) for name, entry in folders.items()}
+
+    with os.scandir(library_base) as it:
+        entries = sorted((e.name, e.stat().st_mtime_ns) for e in it if e.is_dir())
+    tags = {}
+    for name, _ in entries:
+        tags_path = os.path.join(library_base, name, TAGS_FILE)
+        if os.path.exists(tags_path):
+            tags[name] = read_tags(tags_path)
+    return tuple(entries), [name for name, _ in entries], tags
+
+
+def get_character_whitelist(config):
+    """CharacterWhitelist de library_base, reconstruida solo si la biblioteca cambió. None si no existe."""
+    library_base = config.get("paths", {}).get("library_base")
+    if not library_base or not os.path.isdir(library_base):
+        return None
+    signature, folders, tags = _library_snapshot(library_base, config)
+    with _lock:
+        cached = _whitelists.get(library_base)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        whitelist = CharacterWhitelist(folders, tags)
+        _whitelists[library_base] = (signature, whitelist)
+        return whitelist
+
+
+def available_characters(config, topic=None):
+    """Texto para {{AVAILABLE_CHARACTERS}} según config["script_whitelist"]."""
+    whitelist = get_character_whitelist(config)
+    if whitelist is None:
+        return UNRESTRICTED
+    return whitelist.text(topic, config.get("script_whitelist", {}).get("top_k"))
@@ -0,0 +1,184 @@
+import os
+import time
+import subprocess
+import tempfile
+from contextlib import nullcontext
+import numpy as np
+from moviepy.config import get_setting
+from proglog import default_bar_logger
+
+from src.profiler import get_profiler, profile_stage
+
+# ==========================================
+# SALIDA DIRECTA A FFMPEG (Sin write_videofile)
+# ==========================================
+# El timeline final es una secuencia de clips a pantalla completa. En vez de
+# concatenate_videoclips(method="compose") + write_videofile, recorremos el
+# timeline nosotros, copiamos cada frame a un buffer RGB preasignado y lo
+# escribimos en el stdin de ffmpeg. El audio va como PCM crudo en una segunda
+# entrada (archivo temporal: los named pipes no existen en Windows).
+
+AUDIO_FPS = 44100
+
+
+def get_ffmpeg_binary():
+    return get_setting("FFMPEG_BINARY")
+
+
+def flatten_timeline(clips):
+    """
+    Lista de (inicio, fin, clip_hoja) recorriendo las concatenaciones de MoviePy
+    (clips con .tt y .clips), para no pasar por su CompositeVideoClip.
+    """
+    entries = []
+
+    def walk(clip, offset):
+        tt = getattr(clip, "tt", None)
+        children = getattr(clip, "clips", None)
+        if tt is not None and children is not None and len(children) == len(tt) - 1:
+            for child, t0, t1 in zip(children, tt[:-1], tt[1:]):
+                walk(child, offset + t0)
+            return
+        entries.append((offset, offset + clip.duration, clip))
+
+    t = 0.0
+    for clip in clips:
+        walk(clip, t)
+        t += clip.duration
+    return entries
+
+
+def release_clip(clip):
+    """Libera los recursos de un clip hoja ya reproducido (solo si sabe hacerlo: LazyClip)."""
+    release = getattr(clip, "release", None)
+    if release is not None:
+        release()
+
+
+def blit_center(frame, buffer):
+    """Copia `frame` centrado en `buffer` (mismo criterio que set_position('center'))."""
+    if frame.ndim == 2:
+        frame = frame[:, :, None]  # Escala de grises: se replica en los 3 canales
+    H, W = buffer.shape[:2]
+    h, w = frame.shape[:2]
+    if (h, w) == (H, W):
+        np.copyto(buffer, frame[..., :3], casting="unsafe")
+        return
+    buffer.fill(0)
+    # Origen (recorte) y destino (relleno) para cada eje
+    sx, dx = max(0, (w - W) // 2), max(0, (W - w) // 2)
+    sy, dy = max(0, (h - H) // 2), max(0, (H - h) // 2)
+    cw, ch = min(w, W), min(h, H)
+    np.copyto(buffer[dy:dy + ch, dx:dx + cw], frame[sy:sy + ch, sx:sx + cw, :3], casting="unsafe")
+
+
+def audio_to_pcm(audio, duration, path, fps=AUDIO_FPS):
+    """Vuelca un AudioClip (o un array float [-1, 1] de shape (n, canales)) a PCM s16le. Devuelve el nº de canales."""
+    if isinstance(audio, np.ndarray):
+        samples = audio
+    else:
+        # Por bloques, igual que el writer de audio de MoviePy
+        chunks = [np.asarray(c) for c in audio.set_duration(duration).iter_chunks(fps=fps, chunksize=50000)]
+        chunks = [c[:, None] if c.ndim == 1 else c for c in chunks]
+        samples = np.concatenate(chunks) if chunks else np.zeros((0, audio.nchannels))
+    if samples.ndim == 1:
+        samples = samples[:, None]
+    pcm = (np.clip(samples, -0.99, 0.99) * 32768).astype("<i2")
+    pcm.tofile(path)
+    return pcm.shape[1]
+
+
+def write_timeline_ffmpeg(clips, out_path, fps, resolution, audio=None, codec="libx264", audio_codec="aac",
+                          preset="ultrafast", threads=8, bitrate=None, logger="bar", temp_folder=None):
+    """
+    Renderiza la secuencia `clips` (uno tras otro) en `out_path` escribiendo frames RGB crudos en ffmpeg.
+    `audio`: AudioClip de MoviePy, array float (n, canales) a AUDIO_FPS, o None.
+    """
+    W, H = resolution
+    entries = flatten_timeline(clips)
+    duration = entries[-1][1] if entries else 0.0
+    nframes = int(duration * fps + 1e-6)
+
+    logger = default_bar_logger(logger)
+    ffmpeg = get_ffmpeg_binary()
+
+    audio_path = None
+    cmd = [
+        ffmpeg, "-y", "-loglevel", "error",
+        "-f", "rawvideo", "-vcodec", "rawvideo",
+        "-s", f"{W}x{H}", "-pix_fmt", "rgb24", "-r", str(fps),
+        "-i", "-",
+    ]
+    if audio is not None:
+        if temp_folder:
+            os.makedirs(temp_folder, exist_ok=True)
+        fd, audio_path = tempfile.mkstemp(suffix=".pcm", dir=temp_folder)
+        os.close(fd)
+        logger(message="Moviepy - Writing audio (PCM)")
+        with profile_stage("audio_pcm"):
+            channels = audio_to_pcm(audio, duration, audio_path)
+        cmd += ["-f", "s16le", "-ar", str(AUDIO_FPS), "-ac", str(channels), "-i", audio_path,
+                "-map", "0:v", "-map", "1:a", "-acodec", audio_codec]
+    cmd += ["-vcodec", codec, "-preset", preset, "-threads", str(threads), "-pix_fmt", "yuv420p"]
+    if bitrate:
+        cmd += ["-b:v", bitrate]
+    cmd += ["-t", f"{duration:.3f}", out_path]
+
+    buffer = np.zeros((H, W, 3), dtype=np.uint8)
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    # Tiempos para el perfilador: generación de frames (por clip) y escritura en el encoder.
+    # La etapa 'frame_generation' excluye lo anidado (clips perezosos construidos al llegar a ellos).
+    profiler = get_profiler()
+    frame_seconds = [0.0] * len(entries)
+    frame_counts = [0] * len(entries)
+    write_seconds = 0.0
+
+    try:
+        logger(message=f"Moviepy - Writing video {out_path} (ffmpeg pipe)")
+        with (profiler.stage("frame_generation", calls=nframes) if profiler else nullcontext()):
+            idx = 0
+            for i in logger.iter_bar(t=range(nframes)):
+                t = i / fps
+                while idx < len(entries) - 1 and t >= entries[idx][1]:
+                    # Clip terminado: libera lo que haya materializado (LazyClip, src/renderer.py)
+                    release_clip(entries[idx][2])
+                    idx += 1
+                start, _, clip = entries[idx]
+                t0 = time.perf_counter()
+                # Clips del renderizador escriben directamente en el buffer (src/renderer.py)
+                into = getattr(clip, "frame_into", None)
+                if into is None or not into(t - start, buffer):
+                    blit_center(clip.get_frame(t - start), buffer)
+                t1 = time.perf_counter()
+                proc.stdin.write(buffer.data)
+                write_seconds += time.perf_counter() - t1
+                frame_seconds[idx] += t1 - t0
+                frame_counts[idx] += 1
+            for _, _, clip in entries[idx:]:
+                release_clip(clip)
+            t1 = time.perf_counter()
+            proc.stdin.close()
+            err = proc.stderr.read()
+            if proc.wait() != 0:
+                raise IOError(f"ffmpeg falló escribiendo {out_path}: {err.decode(errors='ignore')}")
+            write_seconds += time.perf_counter() - t1
+            if profiler is not None:
+                profiler.add("encoder_write", write_seconds, calls=nframes)
+    except Exception:
+        if proc.poll() is None:
+            proc.kill()
+        raise
+    finally:
+        if proc.stderr:
+            proc.stderr.close()
+        if audio_path and os.path.exists(audio_path):
+            os.remove(audio_path)
+
+    if profiler is not None:
+        for k, (_, _, clip) in enumerate(entries):
+            if frame_counts[k]:
+                profiler.add_clip(getattr(clip, "profile_label", f"clip_{k}"), frame_counts[k], frame_seconds[k])
+
+    logger(message=f"Moviepy - video ready {out_path}")
+    return out_path
@@ -6,6 +6,9 @@ from datetime import datetime
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from src.utils import load_config as load_project_config
+from src.character_whitelist import available_characters, UNRESTRICTED
+
 # Cargar variables de entorno
 load_dotenv()
 
@@ -36,49 +39,16 @@ def normalize_filename(name):
     name = name.replace(' ', '_')
     return name
 
-def get_available_assets():
+def get_available_assets(user_topic=None):
     """
     Lista dinámicamente las carpetas de presidentes disponibles para restringir a Gemini.
+    Desde el índice de assets y cacheada (src/character_whitelist.py); con
+    script_whitelist.top_k y un tema, solo los personajes más afines a él.
     """
     try:
-        config = load_config()
-        # Construimos la ruta asumiendo estructura: root/presidents_folder
-        # Ojo: load_config ya nos da 'paths', podemos reusarlo si instanciamos o leemos el json raw
-        # Para ser seguros y rápidos, leemos la variable de entorno y json crudo
-        root = os.getenv("TIKTOK_ROOT_PATH")
-        if not root: return "Cualquier presidente de USA (Sin restricción)"
-        
-        folders_cfg = config.get("folder_structure", {})
-        presis_folder = folders_cfg.get("presidents_folder", "BIBLIOTECA_PRESIDENTES")
-        full_path = os.path.join(root, presis_folder)
-        
-        if not os.path.exists(full_path):
-             return "Cualquier presidente de USA (Sin restricción)"
-             
-        # Listar carpetas reales y limpiarlas para que la IA las entienda mejor
-        folders = [f for f in os.listdir(full_path) if os.path.isdir(os.path.join(full_path, f))]
-        
-        if not folders:
-            return "Cualquier presidente de USA (Sin restricción)"
-            
-        # Limpieza Avanzada (CamelCase -> Spaced)
-        # Ej: GeorgeWBush -> George W Bush
-        # Ej: WarrenGHarding -> Warren G Harding
-        clean_names = []
-        print("\n🔎 TRADUCCIÓN DE NOMBRES DETECTADA:")
-        for name in folders:
-            # 1. Si ya tiene espacios, respetar. Si no, aplicar split por mayúsculas.
-            if " " in name:
-                clean = name
-            else:
-                 # Regex: Insertar espacio antes de cualquier Mayúscula que NO sea la primera letra
-                clean = re.sub(r'(?<!^)(?=[A-Z])', ' ', name)
-            
-            clean_names.append(clean)
-            print(f"  - {name} \t-> {clean}")
-            
-        print(f"✅ Total procesados: {len(clean_names)}\n")
-        return ", ".join(clean_names)
+        # Sin TIKTOK_ROOT_PATH no hay biblioteca que consultar
+        if not os.getenv("TIKTOK_ROOT_PATH"): return UNRESTRICTED
+        return available_characters(load_project_config(), user_topic)
         
     except Exception as e:
         print(f"⚠️ Error listando assets: {e}")
@@ -103,10 +73,9 @@ def generate_script(user_topic=None, creative_mode=False):
     config = load_config()
     prompts = config.get("prompts", {})
     
-    # 3. Obtener Whitelist de Personajes
-    available_chars = get_available_assets()
-    print(f"📋 Whitelist DETALLADA inyectada a Gemini ({len(available_chars.split(','))} personajes detectados):")
-    print(f"LISTA COMPLETA: {available_chars}")
+    # 3. Obtener Whitelist de Personajes (filtrada por tema si script_whitelist.top_k)
+    available_chars = get_available_assets(user_topic)
+    print(f"📋 Whitelist inyectada a Gemini: {len(available_chars.split(','))} personajes")
     
     if user_topic and user_topic.strip():
         # Modo Específico
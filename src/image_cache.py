@@ -0,0 +1,108 @@
+import os
+import numpy as np
+from PIL import Image, ImageOps
+
+from src.cache import DiskCache, cache_key, file_signature
+from src.profiler import profile_stage
+
+# ==========================================
+# CACHÉ DE IMÁGENES REDIMENSIONADAS
+# ==========================================
+# Las fotos de la biblioteca se reutilizan en muchos videos. En vez de abrir,
+# rotar (EXIF) y redimensionar con LANCZOS en cada aparición, se guarda el
+# array RGB ya orientado y escalado, por (archivo, mtime, tamaño, regla, resolución).
+
+# Reglas de escala de cada motor
+SCALE_COVER_V1 = "cover_1.28"   # V1: cubrir pantalla x1.28
+SCALE_FIT_WIDTH_V2 = "fit_width"  # V2: ancho de imagen = ancho de pantalla
+
+# Si el original es al menos este factor más grande que el destino, se usa draft JPEG
+DRAFT_MIN_FACTOR = 2.0
+
+_EXIF_ORIENTATION = 0x0112
+_ROTATED_ORIENTATIONS = (5, 6, 7, 8)
+
+_caches = {}
+
+
+def get_image_cache(config):
+    """DiskCache de imágenes según config["cache"] (una instancia por carpeta), o None si está desactivada."""
+    cache_cfg = config.get("cache", {})
+    if not cache_cfg.get("images_enabled", True):
+        return None
+    folder = os.path.join(cache_cfg.get("folder", "./cache"), "images")
+    if folder not in _caches:
+        max_bytes = int(cache_cfg.get("images_max_mb", 2048)) * 1024 * 1024
+        _caches[folder] = DiskCache(folder, max_bytes)
+    return _caches[folder]
+
+
+def target_size(img_w, img_h, scale_rule, resolution):
+    """Tamaño final (w, h) de la imagen orientada según la regla de escala del motor."""
+    W, H = resolution
+    if scale_rule == SCALE_COVER_V1:
+        final_scale = max(W / img_w, H / img_h) * 1.28
+        return int(img_w * final_scale), int(img_h * final_scale)
+    if scale_rule == SCALE_FIT_WIDTH_V2:
+        master_scale = W / img_w
+        return int(img_w * master_scale), int(img_h * master_scale)
+    raise ValueError(f"Regla de escala desconocida: {scale_rule}")
+
+
+def _decode_scaled(image_path, scale_rule, resolution):
+    pil_img = Image.open(image_path)
+
+    # Tamaño orientado sin decodificar (solo cabecera + EXIF)
+    raw_w, raw_h = pil_img.size
+    orientation = pil_img.getexif().get(_EXIF_ORIENTATION, 1)
+    rotated = orientation in _ROTATED_ORIENTATIONS
+    img_w, img_h = (raw_h, raw_w) if rotated else (raw_w, raw_h)
+
+    new_w, new_h = target_size(img_w, img_h, scale_rule, resolution)
+
+    # DRAFT JPEG: el decoder reduce 1/2, 1/4 o 1/8 directamente (sin bajar del destino)
+    if pil_img.format == "JPEG" and img_w >= new_w * DRAFT_MIN_FACTOR and img_h >= new_h * DRAFT_MIN_FACTOR:
+        draft_size = (new_h, new_w) if rotated else (new_w, new_h)
+        pil_img.draft("RGB", draft_size)
+
+    pil_img = ImageOps.exif_transpose(pil_img)
+    pil_img = pil_img.convert("RGB")
+    return pil_img.resize((new_w, new_h), Image.Resampling.LANCZOS)
+
+
+def image_key(signature, scale_rule, resolution):
+    """Clave de la entrada para la firma (ruta, mtime, tamaño) de la imagen original."""
+    return cache_key("image", list(signature), scale_rule, list(resolution))
+
+
+def invalidate_image(cache, signature, resolutions):
+    """Borra las entradas de una versión (firma) de la imagen para cada regla y resolución dada."""
+    for scale_rule in (SCALE_COVER_V1, SCALE_FIT_WIDTH_V2):
+        for resolution in resolutions:
+            cache.invalidate(image_key(signature, scale_rule, resolution), "npy")
+
+
+def load_scaled_image(image_path, scale_rule, resolution, cache=None):
+    """
+    Abre la imagen, aplica la orientación EXIF y la escala según `scale_rule`.
+    Devuelve una imagen PIL RGB. Con `cache`, solo se decodifica una vez por archivo/resolución.
+    """
+    if cache is None:
+        with profile_stage("image_decode_resize"):
+            return _decode_scaled(image_path, scale_rule, resolution)
+
+    key = image_key(file_signature(image_path), scale_rule, resolution)
+    cached = cache.get(key, "npy")
+    if cached:
+        try:
+            with profile_stage("image_load_cached"):
+                return Image.fromarray(np.load(cached))
+        except Exception:
+            # Entrada corrupta (ej: escritura interrumpida): se regenera
+            cache.invalidate(key, "npy")
+
+    with profile_stage("image_decode_resize"):
+        pil_img = _decode_scaled(image_path, scale_rule, resolution)
+    arr = np.asarray(pil_img)
+    cache.put(key, "npy", lambda tmp: np.save(tmp, arr))
+    return pil_img
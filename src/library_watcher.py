@@ -0,0 +1,344 @@
+import os
+import sys
+import time
+import errno
+import fnmatch
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.asset_index import get_asset_index, IMAGE_PATTERNS, MYSTERY_EXTS
+from src.image_cache import get_image_cache, invalidate_image
+from src.proxies import get_proxy_cache, invalidate_proxies, ensure_proxy, proxy_resolutions, VIDEO_EXTS
+from src.utils import safe_resolution
+
+# ==========================================
+# VIGILANTE DE LA BIBLIOTECA (Índice y cachés al día)
+# ==========================================
+# En la biblioteca se añaden y reemplazan fotos a diario, también con renders
+# en marcha. El vigilante (inotify en Linux, sondeo de mtimes en el resto)
+# mantiene al día el índice de assets (src/asset_index.py), la caché de
+# imágenes redimensionadas y los proxies de video:
+#   - Una carpeta con cambios solo se procesa cuando su listado (nombre,
+#     tamaño, mtime de cada archivo) lleva `settle_seconds` sin cambiar: un
+#     archivo a medio copiar nunca entra en el índice.
+#   - Los archivos modificados o borrados invalidan sus entradas de caché por
+#     (ruta, mtime, tamaño) anteriores; los videos nuevos se encolan para proxy.
+#   - Mientras vigila, el índice de este proceso no mira la biblioteca: se
+#     planifica siempre contra la última instantánea publicada.
+# El sondeo solo ve cambios de mtime de las carpetas (altas, bajas, renombrados);
+# reemplazar un archivo en el sitio sin tocar la carpeta solo lo detecta inotify.
+
+DEFAULT_SETTLE_SECONDS = 2.0
+DEFAULT_POLL_SECONDS = 2.0
+
+_watcher = None
+
+# Constantes de <sys/inotify.h>
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_IGNORED = 0x00008000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (_IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO |
+               _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyBackend:
+    """Eventos del kernel (Linux) por carpeta vigilada, vía libc (sin dependencias)."""
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falló")
+        self._paths = {}
+
+    @staticmethod
+    def available():
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            return hasattr(ctypes.CDLL(ctypes.util.find_library("c")), "inotify_init1")
+        except OSError:
+            return False
+
+    def watch(self, path):
+        if path in self._paths.values():
+            return
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _WATCH_MASK)
+        if wd >= 0:
+            self._paths[wd] = path
+
+    def wait(self, timeout):
+        """Carpetas con eventos en los próximos `timeout` segundos (vacío si no hubo)."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return set()
+            raise
+        changed = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size + length
+            path = self._paths.get(wd)
+            if path is None:
+                continue
+            if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                # La carpeta misma desapareció: cambia su raíz
+                changed.add(os.path.dirname(path))
+            if mask & _IN_IGNORED:
+                self._paths.pop(wd, None)
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingBackend:
+    """Sondeo de los mtimes de las carpetas vigiladas (Windows, macOS o sin inotify)."""
+
+    def __init__(self):
+        self._mtimes = {}
+
+    def watch(self, path):
+        if path not in self._mtimes:
+            self._mtimes[path] = self._mtime(path)
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def wait(self, timeout):
+        time.sleep(timeout)
+        changed = set()
+        for path, old in list(self._mtimes.items()):
+            mtime = self._mtime(path)
+            if mtime != old:
+                changed.add(path)
+                if mtime is None:
+                    # Carpeta borrada: deja de vigilarse y cambia su raíz
+                    del self._mtimes[path]
+                    changed.add(os.path.dirname(path))
+                else:
+                    self._mtimes[path] = mtime
+        return changed
+
+    def close(self):
+        pass
+
+
+def is_image_name(name):
+    return any(fnmatch.fnmatch(name, p) for p in IMAGE_PATTERNS) or name.lower().endswith(MYSTERY_EXTS)
+
+
+class LibraryWatcher:
+
+    def __init__(self, config, backend=None, settle_seconds=None, log_callback=None):
+        cache_cfg = config.get("cache", {})
+        self.config = config
+        self.index = get_asset_index(config)
+        if self.index is None:
+            raise ValueError("El vigilante necesita el índice de assets (cache.asset_index_enabled)")
+        self.settle_seconds = float(settle_seconds if settle_seconds is not None else
+                                    cache_cfg.get("library_watcher_settle_seconds", DEFAULT_SETTLE_SECONDS))
+        self.log = log_callback or (lambda msg: None)
+        paths = config["paths"]
+        self.roots = [os.path.abspath(paths[k]) for k in ("library_base", "intro_library")]
+        self.backend = backend or (InotifyBackend() if InotifyBackend.available() else PollingBackend())
+        # Carpeta -> (listado observado, instante del último cambio)
+        self._pending = {}
+
+        self.image_cache = get_image_cache(config)
+        self.proxy_cache = get_proxy_cache(config)
+        self.fps = config["video_settings"]["fps"]
+        self.proxy_res = proxy_resolutions(config)
+        # Resoluciones con entradas en la caché de imágenes: la de salida y los presets
+        self.image_res = sorted(set([safe_resolution(config)] + self.proxy_res))
+        self.build_proxies = self.proxy_cache is not None and cache_cfg.get("proxies_background", True)
+        self._proxy_pool = ThreadPoolExecutor(max_workers=1) if self.build_proxies else None
+
+    # --- Estado inicial ---
+    def start(self):
+        """
+        Sincroniza el índice con el disco (incremental) y empieza a vigilar raíces y carpetas.
+        Desde aquí el índice de este proceso solo cambia a través del vigilante.
+        """
+        self.index.follow_disk = False
+        for root in self.roots:
+            before = self.index.snapshot(root)
+            after = self.index.refresh(root, force=True)
+            if before:
+                # Cambios mientras la app estaba cerrada (la primera indexación no tiene cachés que limpiar)
+                self._apply_root_diff(root, before, after)
+            self._watch_root(root, now=None)
+        return self
+
+    def _watch_root(self, root, now):
+        if not os.path.isdir(root):
+            return
+        self.backend.watch(root)
+        with os.scandir(root) as it:
+            for entry in it:
+                if entry.is_dir():
+                    self.backend.watch(entry.path)
+                    if now is not None and entry.path not in self._pending:
+                        # Carpeta nueva (quizá copiándose): espera a que se estabilice
+                        self._pending[entry.path] = (self.listing(entry.path), now)
+
+    # --- Detección de cambios estables ---
+    @staticmethod
+    def listing(path):
+        """Firma del contenido de la carpeta: (nombre, tamaño, mtime) de cada entrada. None si no existe."""
+        try:
+            with os.scandir(path) as it:
+                items = []
+                for entry in it:
+                    st = entry.stat()
+                    items.append((entry.name, entry.is_dir(), st.st_size, st.st_mtime_ns))
+            return tuple(sorted(items))
+        except OSError:
+            return None
+
+    def _owner(self, path):
+        """Raíz o carpeta de personaje (primer nivel) a la que pertenece `path`, o None."""
+        path = os.path.abspath(path)
+        for root in self.roots:
+            if path == root:
+                return root
+            if os.path.dirname(path) == root:
+                return path
+        return None
+
+    def notice(self, paths, now=None):
+        """Marca carpetas con cambios; se procesarán cuando dejen de cambiar."""
+        now = time.monotonic() if now is None else now
+        for path in paths:
+            folder = self._owner(path)
+            if folder is None:
+                continue
+            self._pending[folder] = (self.listing(folder), now)
+            if folder in self.roots:
+                self._watch_root(folder, now)
+
+    def process(self, now=None):
+        """Aplica las carpetas que llevan settle_seconds sin cambios. Devuelve cuántas se aplicaron."""
+        now = time.monotonic() if now is None else now
+        applied = 0
+        # Primero las carpetas de personaje; una raíz espera a que sus carpetas estén estables
+        for folder in sorted(self._pending, key=lambda p: p in self.roots):
+            observed, since = self._pending[folder]
+            current = self.listing(folder)
+            if current != observed:
+                self._pending[folder] = (current, now)
+                continue
+            if now - since < self.settle_seconds:
+                continue
+            if folder in self.roots and any(os.path.dirname(p) == folder for p in self._pending):
+                continue
+            del self._pending[folder]
+            self.apply(folder)
+            applied += 1
+        return applied
+
+    # --- Aplicar cambios ---
+    def apply(self, folder):
+        if folder in self.roots:
+            before = self.index.snapshot(folder)
+            after = self.index.refresh(folder, force=True)
+            self._apply_root_diff(folder, before, after)
+            return
+        previous, entry = self.index.update_folder(folder)
+        self._apply_folder_diff(folder, previous, entry)
+
+    def _apply_root_diff(self, root, before, after):
+        for name in set(before) | set(after):
+            if before.get(name) is not after.get(name):
+                self._apply_folder_diff(os.path.join(root, name), before.get(name), after.get(name))
+
+    def _apply_folder_diff(self, folder, previous, entry):
+        old_files = (previous or {}).get("files", {})
+        new_files = (entry or {}).get("files", {})
+        added = [n for n in new_files if n not in old_files]
+        removed = [n for n in old_files if n not in new_files]
+        changed = [n for n in new_files if n in old_files and
+                   (new_files[n]["mtime_ns"], new_files[n]["size"]) != (old_files[n]["mtime_ns"], old_files[n]["size"])]
+        if not (added or removed or changed):
+            return
+
+        # Entradas de caché de la versión anterior de cada archivo
+        for name in removed + changed:
+            info = old_files[name]
+            signature = (os.path.join(os.path.abspath(folder), name), info["mtime_ns"], info["size"])
+            if self.image_cache is not None and is_image_name(name):
+                invalidate_image(self.image_cache, signature, self.image_res)
+            if self.proxy_cache is not None and name.lower().endswith(VIDEO_EXTS):
+                invalidate_proxies(self.proxy_cache, signature, self.proxy_res, self.fps)
+
+        if self._proxy_pool is not None:
+            for name in added + changed:
+                if name.lower().endswith(VIDEO_EXTS):
+                    self._proxy_pool.submit(self._build_proxies, os.path.join(folder, name))
+
+        self.log(f"🔄 Biblioteca: '{os.path.basename(folder)}' actualizada "
+                 f"(+{len(added)} / ~{len(changed)} / -{len(removed)})")
+
+    def _build_proxies(self, video_path):
+        for res in self.proxy_res:
+            try:
+                ensure_proxy(video_path, res, self.fps, self.proxy_cache)
+            except Exception as e:
+                self.log(f"⚠️ Proxy fallido ({os.path.basename(video_path)} @ {res[0]}x{res[1]}): {e}")
+                return
+
+    # --- Bucle ---
+    def run(self, stop_event, poll_seconds=DEFAULT_POLL_SECONDS):
+        self.start()
+        try:
+            while not stop_event.is_set():
+                self.notice(self.backend.wait(poll_seconds))
+                self.process()
+        finally:
+            self.backend.close()
+            if self._proxy_pool is not None:
+                self._proxy_pool.shutdown(wait=False)
+
+
+def start_library_watcher(config, log_callback=None):
+    """
+    Lanza el vigilante en un hilo (uno por proceso) si cache.library_watcher.
+    Devuelve (vigilante, evento de parada) o None.
+    """
+    global _watcher
+    cache_cfg = config.get("cache", {})
+    if _watcher is not None or not cache_cfg.get("library_watcher", True) or get_asset_index(config) is None:
+        return _watcher
+    watcher = LibraryWatcher(config, log_callback=log_callback)
+    stop_event = threading.Event()
+    thread = threading.Thread(target=watcher.run, args=(stop_event,),
+                              kwargs={"poll_seconds": float(cache_cfg.get("library_watcher_poll_seconds", DEFAULT_POLL_SECONDS))},
+                              daemon=True)
+    thread.start()
+    _watcher = (watcher, stop_event)
+    return _watcher
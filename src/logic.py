@@ -8,6 +8,20 @@ from PIL import Image, ImageFilter, ImageOps
 import random
 import math
 import glob
+from src.renderer import create_slide_clip, create_zoom_clip, centered_position, MirrorCanvas, fit_to_resolution, concatenate_chain, LazyClip
+from src.motion import v1_slide_table, v1_bounce_table, v2_table
+from src.image_cache import load_scaled_image, get_image_cache, SCALE_COVER_V1, SCALE_FIT_WIDTH_V2
+from src.utils import safe_resolution, frame_duration
+from src.media_probe import get_probe_cache, plan_intro_chain
+from src.proxies import resolve_video_source
+from src.segment_cache import get_segment_cache, segment_cache_key, store_segment, load_cached_segment
+from src.audio_cache import get_audio_cache
+from src.asset_index import get_asset_index
+from src.preflight import get_quarantine
+from src.ffmpeg_writer import AUDIO_FPS
+from src.audio_mix import probe_audio_duration, segment_voice_duration
+from src.profiler import profile_stage
+from moviepy.audio.AudioClip import AudioArrayClip
 
 # ==========================================
 # EASING FUNCTIONS
@@ -27,36 +41,60 @@ DIR_UP = 3
 DIR_DOWN = 4
 DIR_CENTER = 5
 
+# ==========================================
+# DECISIONES ALEATORIAS DE LOS MOTORES (Plan)
+# ==========================================
+# Separadas del render para poder planificar un segmento sin crear clips.
+# Mismo orden y número de llamadas a rng que tenían los motores.
+
+def choose_motion_v1(prev_exit_dir, is_first_clip, rng):
+    """{'enter', 'exit'} del motor V1. 'enter' es el borde de continuidad (la salida anterior)."""
+    if is_first_clip:
+        return {"enter": DIR_CENTER, "exit": DIR_CENTER}
+    enter = prev_exit_dir
+    if enter not in (DIR_RIGHT, DIR_LEFT, DIR_UP, DIR_DOWN):
+        # Inicio aleatorio: (min_x), (max_x), (min_y), (max_y)
+        enter = rng.choice([DIR_LEFT, DIR_RIGHT, DIR_DOWN, DIR_UP])
+    # RANDOM COMBO - LINEAR ONLY
+    exit_dir = rng.choice([DIR_RIGHT, DIR_LEFT, DIR_UP, DIR_DOWN])
+    return {"enter": enter, "exit": exit_dir}
+
+
+def choose_motion_v2(prev_exit_dir, is_last_clip, rng):
+    """{'enter', 'exit'} del motor V2 (el último clip sale con zoom). 'enter' = salida anterior."""
+    next_exit = rng.choice([DIR_LEFT, DIR_RIGHT, DIR_UP, DIR_DOWN])
+    if is_last_clip:
+        next_exit = "ZOOM_EXIT"
+    return {"enter": prev_exit_dir, "exit": next_exit}
+
+
+def choose_motion(version, prev_exit_dir, is_first_clip, is_last_clip, rng):
+    if version == "v2_estable":
+        return choose_motion_v2(prev_exit_dir, is_last_clip, rng)
+    return choose_motion_v1(prev_exit_dir, is_first_clip, rng)
+
 # ==========================================
 # 🔒 LÓGICA V1 ESTABLE - NO TOCAR - (Flow corregido, Zoom solo inicio, Cero bordes negros)
 # ==========================================
-def create_smart_combo_clip_v1_stable(image_path, total_dur, resolution, prev_exit_dir, is_first_clip=False):
+def create_smart_combo_clip_v1_stable(image_path, total_dur, resolution, prev_exit_dir, is_first_clip=False, renderer="numpy", fps=30, motion_tables=True, image_cache=None, rng=None, motion=None):
     W, H = resolution
+    rng = rng or random
     
-    # 1. READ & EXIF FIX
+    # 1. READ & EXIF FIX + 2. ALGORITMO 'COVER' 1.28x (Safety Factor 1.28)
+    # Decodificado y escalado una sola vez por archivo/resolución (src/image_cache.py)
     try:
-        pil_img = Image.open(image_path)
-        pil_img = ImageOps.exif_transpose(pil_img)
+        pil_img = load_scaled_image(image_path, SCALE_COVER_V1, resolution, cache=image_cache)
     except Exception as e:
         print(f"Error {e}")
         return ColorClip(size=resolution, color=(0,0,0), duration=total_dur), prev_exit_dir
 
-    # 2. ALGORITMO 'COVER' 1.28x
-    img_w, img_h = pil_img.size
-    
-    ratio_w = W / img_w
-    ratio_h = H / img_h
-    
-    max_ratio = max(ratio_w, ratio_h)
-    
-    # Safety Factor 1.28
-    final_scale = max_ratio * 1.28
+    new_w, new_h = pil_img.size
     
-    new_w = int(img_w * final_scale)
-    new_h = int(img_h * final_scale)
-    
-    pil_img = pil_img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-    base_clip = ImageClip(np.array(pil_img)).set_duration(total_dur)
+    if renderer == "numpy":
+        # Renderizador NumPy: sin ImageClip ni CompositeVideoClip (src/renderer.py)
+        base_clip = None
+    else:
+        base_clip = ImageClip(np.array(pil_img)).set_duration(total_dur)
     
     # 3. CALCULATE EXCESS
     excess_x = new_w - W
@@ -71,7 +109,6 @@ def create_smart_combo_clip_v1_stable(image_path, total_dur, resolution, prev_ex
     
     # DEFINE BOUNCE LOGIC (Only for First Clip now)
     def create_bounce_clip(clip, duration):
-        clip = clip.set_position("center")
         def bounce_func(t):
             if duration == 0: return 1.0
             p = min(t / duration, 1.0)
@@ -84,8 +121,23 @@ def create_smart_combo_clip_v1_stable(image_path, total_dur, resolution, prev_ex
                 local_p = (p - 0.5) * 2.0
                 val = local_p * local_p
                 return lerp(1.0, 1.0 + boost, val)
-        zoomed = clip.resize(bounce_func)
-        return CompositeVideoClip([zoomed], size=resolution).set_duration(duration)
+        if motion_tables:
+            table = v1_bounce_table(duration, fps, (new_w, new_h), resolution)
+            bounce_func = table.zoom
+        if renderer == "numpy":
+            # Crop-then-scale: solo se remuestrea la ventana visible
+            center_func = table.position if motion_tables else centered_position(bounce_func, (new_w, new_h), resolution)
+            bounce_clip = create_zoom_clip(pil_img, center_func, bounce_func, resolution, duration)
+        else:
+            zoomed = clip.set_position("center").resize(bounce_func)
+            bounce_clip = CompositeVideoClip([zoomed], size=resolution).set_duration(duration)
+        if motion_tables:
+            bounce_clip.motion_table = table
+        return bounce_clip
+
+    # Decisiones (entrada/salida): del plan o aleatorias (choose_motion_v1)
+    if motion is None:
+        motion = choose_motion_v1(prev_exit_dir, is_first_clip, rng)
 
     # SPECIAL: FIRST CLIP (Apply Bounce)
     if is_first_clip:
@@ -93,39 +145,28 @@ def create_smart_combo_clip_v1_stable(image_path, total_dur, resolution, prev_ex
         return final_clip, DIR_CENTER
 
     # 4. START POINT (CONTINUITY - CORRECTED)
-    if prev_exit_dir == DIR_RIGHT:
+    enter_dir = motion["enter"]
+    if enter_dir == DIR_RIGHT:
         start_pos = (max_x, center_y) 
-    elif prev_exit_dir == DIR_LEFT:
+    elif enter_dir == DIR_LEFT:
         start_pos = (min_x, center_y) 
-    elif prev_exit_dir == DIR_UP:
+    elif enter_dir == DIR_UP:
         start_pos = (center_x, max_y) 
-    elif prev_exit_dir == DIR_DOWN:
+    else: # DIR_DOWN
         start_pos = (center_x, min_y)
-    else:
-        start_pos = random.choice([
-            (min_x, center_y), (max_x, center_y),
-            (center_x, min_y), (center_x, max_y)
-        ])
 
     # 5. END POINT (RANDOM COMBO - LINEAR ONLY)
-    modes = ["EXIT_RIGHT", "EXIT_LEFT", "EXIT_UP", "EXIT_DOWN"]
-    mode = random.choice(modes)
-    
+    exit_choice = motion["exit"]
     end_pos = (center_x, center_y)
-    exit_choice = DIR_CENTER
     
-    if mode == "EXIT_RIGHT":
+    if exit_choice == DIR_RIGHT:
         end_pos = (min_x, center_y)
-        exit_choice = DIR_RIGHT
-    elif mode == "EXIT_LEFT":
+    elif exit_choice == DIR_LEFT:
         end_pos = (max_x, center_y)
-        exit_choice = DIR_LEFT
-    elif mode == "EXIT_UP":
+    elif exit_choice == DIR_UP:
         end_pos = (center_x, max_y)
-        exit_choice = DIR_UP
-    elif mode == "EXIT_DOWN":
+    elif exit_choice == DIR_DOWN:
         end_pos = (center_x, min_y)
-        exit_choice = DIR_DOWN
 
     mid_pos = (center_x, center_y)
 
@@ -150,41 +191,48 @@ def create_smart_combo_clip_v1_stable(image_path, total_dur, resolution, prev_ex
         curr_y = max(min_y, min(max_y, curr_y))
             
         return int(curr_x), int(curr_y)
+
+    if motion_tables:
+        table = v1_slide_table(total_dur, fps, start_pos, mid_pos, end_pos, (min_x, max_x, min_y, max_y))
+        pos_func = table.position
         
-    final_clip = CompositeVideoClip([base_clip.set_position(pos_func)], size=resolution).set_duration(total_dur)
+    if renderer == "numpy":
+        final_clip = create_slide_clip(np.array(pil_img), pos_func, resolution, total_dur)
+    else:
+        final_clip = CompositeVideoClip([base_clip.set_position(pos_func)], size=resolution).set_duration(total_dur)
+    if motion_tables:
+        final_clip.motion_table = table
     
     return final_clip, exit_choice
 
 # ==========================================
 # 🧪 LÓGICA V2 BETA - EXPERIMENTAL (Para futuras mejoras)
 # ==========================================
-def create_smart_combo_clip_v2_estable(image_path, total_dur, resolution, prev_exit_dir, is_first_clip=False, is_last_clip=False):
+def create_smart_combo_clip_v2_estable(image_path, total_dur, resolution, prev_exit_dir, is_first_clip=False, is_last_clip=False, renderer="numpy", fps=30, motion_tables=True, image_cache=None, rng=None, motion=None):
     """
     MOTOR V2 (HYBRID OPT - 2025):
     - First/Last Clips (Zoom): FULL 3x3 GRID to ensure safe coverage during scale changes.
     - Middle Clips (Slide): DYNAMIC GRID (Optimized) based on flow.
     - Safety: Auto-fill vertical bounds for landscape images.
+    - renderer="numpy": Virtual mirror grid (single base tile, never materialized).
+      Middle clips are sliced straight from it (no CompositeVideoClip),
+      zoom clips resample only the visible window of the grid (crop-then-scale).
+    - motion_tables: Easing curves evaluated once per clip at `fps` (src/motion.py).
+    - image_cache: Oriented + scaled photo reused across videos (src/image_cache.py).
     """
     W, H = resolution
     
-    # 1. CARGA
+    # ===============================
+    # 1. CARGA + ESCALA 1.0 (Ancho de Pantalla)
+    # ===============================
+    # Decodificado y escalado una sola vez por archivo/resolución (src/image_cache.py)
     try:
-        pil_img = Image.open(image_path)
-        pil_img = ImageOps.exif_transpose(pil_img)
+        base_img = load_scaled_image(image_path, SCALE_FIT_WIDTH_V2, resolution, cache=image_cache)
     except Exception as e:
         print(f"Error loading {image_path}: {e}")
         return ColorClip(size=resolution, color=(0,0,0), duration=total_dur), prev_exit_dir
 
-    img_w, img_h = pil_img.size
-
-    # ===============================
-    # DEFINIR ESCALA 1.0 (Ancho de Pantalla)
-    # ===============================
-    master_scale = W / img_w
-    final_w = int(img_w * master_scale)
-    final_h = int(img_h * master_scale)
-    
-    base_img = pil_img.resize((final_w, final_h), Image.Resampling.LANCZOS)
+    final_w, final_h = base_img.size
     
     # ===============================
     # DECISIÓN DE DIRECCIONES
@@ -197,12 +245,10 @@ def create_smart_combo_clip_v2_estable(image_path, total_dur, resolution, prev_e
     elif prev_exit_dir == DIR_UP: enter_dir = DIR_DOWN
     elif prev_exit_dir == DIR_DOWN: enter_dir = DIR_UP
     
-    # 2. OUTPUT
-    possible_exits = [DIR_LEFT, DIR_RIGHT, DIR_UP, DIR_DOWN]
-    next_exit = random.choice(possible_exits)
-    
-    if is_last_clip:
-        next_exit = "ZOOM_EXIT"
+    # 2. OUTPUT: del plan o aleatoria (choose_motion_v2)
+    if motion is None:
+        motion = choose_motion_v2(prev_exit_dir, is_last_clip, rng or random)
+    next_exit = motion["exit"]
 
     # ===============================
     # GENERACIÓN DE GRID (HYBRID LOGIC)
@@ -242,33 +288,36 @@ def create_smart_combo_clip_v2_estable(image_path, total_dur, resolution, prev_e
     grid_cols = max_col - min_col + 1
     grid_rows = max_row - min_row + 1
     
-    # Dimensiones del Lienzo
-    canvas_w = final_w * grid_cols
-    canvas_h = final_h * grid_rows
-    
-    grid_img = Image.new('RGB', (canvas_w, canvas_h))
-    
-    # Preparar Variaciones
-    tile_normal = base_img
-    tile_mirror_h = ImageOps.mirror(base_img)
-    
-    # Populate function
-    def get_tile(c, r):
-        # Lógica de Espejos Original
-        base_t = tile_normal
-        if c == 0 or c == 2: base_t = tile_mirror_h
-        if r == 0 or r == 2: return ImageOps.flip(base_t)
-        return base_t
-
-    # Pintar Grid
-    for c in range(min_col, max_col + 1):
-        for r in range(min_row, max_row + 1):
-            tile = get_tile(c, r)
-            paste_x = (c - min_col) * final_w
-            paste_y = (r - min_row) * final_h
-            grid_img.paste(tile, (paste_x, paste_y))
-    
-    super_clip = ImageClip(np.array(grid_img)).set_duration(total_dur)
+    if renderer == "numpy":
+        # LIENZO VIRTUAL: solo el tile base + mapas de índices espejo (src/renderer.py).
+        # Los frames se muestrean del tile; el grid nunca se materializa.
+        canvas = MirrorCanvas(np.asarray(base_img), range(min_col, max_col + 1), range(min_row, max_row + 1))
+    else:
+        # Dimensiones del Lienzo
+        canvas_w = final_w * grid_cols
+        canvas_h = final_h * grid_rows
+        
+        grid_img = Image.new('RGB', (canvas_w, canvas_h))
+        
+        # Preparar Variaciones
+        tile_normal = base_img
+        tile_mirror_h = ImageOps.mirror(base_img)
+        
+        # Populate function
+        def get_tile(c, r):
+            # Lógica de Espejos Original
+            base_t = tile_normal
+            if c == 0 or c == 2: base_t = tile_mirror_h
+            if r == 0 or r == 2: return ImageOps.flip(base_t)
+            return base_t
+
+        # Pintar Grid
+        for c in range(min_col, max_col + 1):
+            for r in range(min_row, max_row + 1):
+                tile = get_tile(c, r)
+                paste_x = (c - min_col) * final_w
+                paste_y = (r - min_row) * final_h
+                grid_img.paste(tile, (paste_x, paste_y))
     
     # ===============================
     # 3. ANIMACIÓN DE POSICIÓN
@@ -364,189 +413,178 @@ def create_smart_combo_clip_v2_estable(image_path, total_dur, resolution, prev_e
                 curr_y = center_y + (end_y - center_y) * p
                 return (int(curr_x), int(curr_y))
 
+    if motion_tables:
+        table = v2_table(
+            total_dur, fps, resolution,
+            tile_size=(final_w, final_h),
+            local_center=(local_center_col, local_center_row),
+            center=(center_x, center_y), start=(start_x, start_y), end=(end_x, end_y),
+            is_first_clip=is_first_clip, is_last_clip=is_last_clip
+        )
+        pos_func, zoom_func = table.position, table.zoom
+
     # APLICAR
-    if is_first_clip or is_last_clip:
-        final_clip = super_clip.resize(zoom_func).set_position(pos_func)
+    if renderer == "numpy":
+        if is_first_clip or is_last_clip:
+            out_clip = create_zoom_clip(canvas, pos_func, zoom_func, resolution, total_dur)
+        else:
+            out_clip = create_slide_clip(canvas, pos_func, resolution, total_dur)
     else:
-        final_clip = super_clip.set_position(pos_func)
+        super_clip = ImageClip(np.array(grid_img)).set_duration(total_dur)
+        if is_first_clip or is_last_clip:
+            final_clip = super_clip.resize(zoom_func).set_position(pos_func)
+        else:
+            final_clip = super_clip.set_position(pos_func)
+        out_clip = CompositeVideoClip([final_clip], size=resolution).set_duration(total_dur)
+
+    # Tabla de trayectoria disponible para inspección / reutilización
+    if motion_tables:
+        out_clip.motion_table = table
     
-    return CompositeVideoClip([final_clip], size=resolution).set_duration(total_dur), next_exit
+    return out_clip, next_exit
 
 # ==========================================
 # DISPATCHER
 # ==========================================
-def create_smart_combo_clip(image_path, total_dur, resolution, prev_exit_dir, is_first_clip=False, is_last_clip=False, version="v1_estable"):
+def create_smart_combo_clip(image_path, total_dur, resolution, prev_exit_dir, is_first_clip=False, is_last_clip=False, version="v1_estable", renderer="numpy", fps=30, motion_tables=True, image_cache=None, rng=None, motion=None):
+    # rng: random.Random sembrado del segmento (None = módulo random global)
+    # motion: decisiones ya planificadas (choose_motion); si se pasa, rng no se usa
     if version == "v2_estable":
-        return create_smart_combo_clip_v2_estable(image_path, total_dur, resolution, prev_exit_dir, is_first_clip, is_last_clip)
+        return create_smart_combo_clip_v2_estable(image_path, total_dur, resolution, prev_exit_dir, is_first_clip, is_last_clip, renderer=renderer, fps=fps, motion_tables=motion_tables, image_cache=image_cache, rng=rng, motion=motion)
     else:
-        return create_smart_combo_clip_v1_stable(image_path, total_dur, resolution, prev_exit_dir, is_first_clip)
+        return create_smart_combo_clip_v1_stable(image_path, total_dur, resolution, prev_exit_dir, is_first_clip, renderer=renderer, fps=fps, motion_tables=motion_tables, image_cache=image_cache, rng=rng, motion=motion)
 
 
 # ==========================================
 # DYNAMIC INTRO GENERATOR
 # ==========================================
-def generate_dynamic_intro(audio_clip, config, candidate_videos, log_callback=None):
-    target_duration = audio_clip.duration
+def plan_dynamic_intro(target_duration, config, candidate_videos, log_callback=None, rng=None):
+    """[(ruta, duración), ...] de la intro, o None. Solo metadatos: no abre ningún video."""
+    rng = rng or random
     
     # Use provided candidates (found by get_president_assets)
     candidates = candidate_videos if candidate_videos else []
                 
     if not candidates:
         if log_callback: log_callback("⚠️ No se encontraron videos de intro.")
-        return None, "NEUTRAL"
+        return None
 
     if log_callback: log_callback(f"✅ Generando Intro Dinámica ({target_duration:.1f}s) con {len(candidates)} clips...")
 
     # 2. Smart Fill Loop with Distributed Trimming
-    selected_clips_data = [] # List of tuples (clip, final_duration)
-    
-    attempts = 0
-    max_attempts = 20
-    
-    W, H = tuple(config["video_settings"]["resolution"])
-    
-    import random
+    # Se planifica solo con metadatos cacheados (src/media_probe.py); después
+    # se abren únicamente los clips elegidos.
+    with profile_stage("intro_probe"):
+        probes = get_probe_cache(config)
+        durations = {}
+        for vid_path in candidates:
+            info = probes.probe(vid_path)
+            if info:
+                durations[vid_path] = info["duration"]
+        probes.save()
+    
+    chain = plan_intro_chain(durations, target_duration, rng)
+    if not chain:
+        print("⚠️ Intro generator max attempts reached. Returning simple fallback.")
+    return chain
+
+
+def video_is_readable(vid_path, config):
+    """
+    El video existe y ffmpeg lee sus metadatos (sondeo cacheado, src/media_probe.py).
+    Los LazyClip solo abren el archivo durante la escritura: un video roto se descarta aquí.
+    """
+    if not os.path.exists(vid_path):
+        return False
+    probes = get_probe_cache(config)
+    info = probes.probe(vid_path)
+    probes.save()
+    return info is not None
+
+
+def open_intro_clip(vid_path, desired_dur, config, resolution):
+    # Proxy normalizado si existe (src/proxies.py); si no, mute + cubrir y recortar a WxH
+    with profile_stage("video_open"):
+        clip = fit_to_resolution(VideoFileClip(resolve_video_source(vid_path, config), audio=False), resolution)
     
-    while attempts < max_attempts:
-        current_selection = []
-        current_dur = 0.0
-        
-        # Shuffle/Random pick
-        random.shuffle(candidates)
-        pool_idx = 0
-        
-        # Build chain: Add clips until we exceed target
-        possible_chain = [] # List of VideoFileClip
-        chain_dur = 0.0
-        
-        while chain_dur < target_duration:
-            if pool_idx >= len(candidates):
-                # Repopulate
-                pool_idx = 0
-                random.shuffle(candidates)
-            
-            vid_path = candidates[pool_idx]
-            pool_idx += 1
-            
-            try:
-                clip = VideoFileClip(vid_path)
-                # Validation: If raw clip is < 2.0s, it's useless for our constraints. Skip it.
-                if clip.duration < 2.0:
-                    clip.close()
-                    continue
-                    
-                possible_chain.append(clip)
-                chain_dur += clip.duration
-            except:
-                continue
-                
-        # Now we have a chain where sum(durations) >= target_duration
-        # Optimization: Check if it's statistically possible to fit.
-        # Constraint: Each clip must be >= 2.0s
-        min_needed = len(possible_chain) * 2.0
-        
-        if min_needed > target_duration:
-            # Too many clips / clips too short to cover target effectively.
-            # Close and retry shuffle
-            for c in possible_chain: c.close()
-            attempts += 1
-            continue
-            
-        # Optimization: Distribute Cuts
-        # Strategy 1: Proportional Shrinker
-        # scale = target / chain_dur
-        # proposed = [d * scale]
-        # If all proposed >= 2.0 -> Winner.
-        
-        scale = target_duration / chain_dur
-        proposed_durs = [c.duration * scale for c in possible_chain]
-        
-        if min(proposed_durs) >= 2.0:
-            # Plan A Success: Proportional
-            final_durs = proposed_durs
-        else:
-            # Plan B: Backwards Squeeze
-            # Cut excess from end to start, adhering to 2.0 floor.
-            excess = chain_dur - target_duration
-            current_durs = [c.duration for c in possible_chain]
-            valid_squeeze = True
-            
-            for i in range(len(current_durs)-1, -1, -1):
-                can_cut = current_durs[i] - 2.0
-                take = min(can_cut, excess)
-                current_durs[i] -= take
-                excess -= take
-                if excess <= 0.001: break
-            
-            if excess > 0.001:
-                # Still have excess and hit all floors. Impossible combo.
-                for c in possible_chain: c.close()
-                attempts += 1
-                continue
-            
-            final_durs = current_durs
+    # SUBCLIP TO EXACT DURATION
+    # Start from 0 is safer for continuity/intros ("recorta el ultimo...").
+    return clip.subclip(0, desired_dur)
 
-        # If we got here, we have a valid plan (possible_chain + final_durs)
-        # Apply cuts
-        processed_intro = []
-        running_time = 0.0
-        
-        for i, clip in enumerate(possible_chain):
-            desired_dur = final_durs[i]
-            
-            # Mute & Resize Logic SAME AS BEFORE
-            clip = clip.without_audio()
-            
-            if clip.h != H:
-               clip = clip.resize(height=H)
-            if clip.w > W:
-                clip = clip.crop(x1=(clip.w - W)/2, width=W, height=H)
-            elif clip.w < W:
-                clip = clip.resize(width=W)
-                clip = clip.crop(y1=(clip.h - H)/2, width=W, height=H)
-                
-            # SUBCLIP TO EXACT DURATION
-            # Random subclip? Or start from 0? 
-            # Start from 0 is safer for continuity/intros, but random could be fun.
-            # Let's keep 0 for stability as per user request ("recorta el ultimo...").
-            clip = clip.subclip(0, desired_dur)
-            
+
+def build_intro_clip(chain, config, log_callback=None):
+    """
+    Abre y concatena los clips de la intro planificada. None si alguno no se puede abrir.
+    Con video_settings.lazy_clips, cada video se abre al llegar a él (LazyClip) y aquí
+    solo se comprueba que ffmpeg pueda leerlo.
+    """
+    W, H = safe_resolution(config)
+    sets = config["video_settings"]
+    lazy = sets.get("lazy_clips", True)
+    processed_intro = []
+    try:
+        for vid_path, desired_dur in chain:
+            if lazy:
+                if not video_is_readable(vid_path, config):
+                    raise IOError(f"Video ilegible o inexistente: {vid_path}")
+                clip = LazyClip(lambda p=vid_path, d=desired_dur: open_intro_clip(p, d, config, (W, H)),
+                                desired_dur, (W, H), fps=sets["fps"])
+            else:
+                clip = open_intro_clip(vid_path, desired_dur, config, (W, H))
+            clip.profile_label = f"intro:{os.path.basename(vid_path)}"
             processed_intro.append(clip)
-            
-        # ALL GOOD
-        final_intro_video = concatenate_videoclips(processed_intro, method="compose")
-        final_intro_video = final_intro_video.set_audio(audio_clip)
-        
-        return final_intro_video, "NEUTRAL"
+    except Exception as e:
+        # No dejar procesos ffmpeg abiertos si falla alguno
+        for c in processed_intro: c.close()
+        if log_callback: log_callback(f"⚠️ Error abriendo clip de intro: {e}")
+        return None
         
-    print("⚠️ Intro generator max attempts reached. Returning simple fallback.")
-    return None, "NEUTRAL"
+    # ALL GOOD
+    return concatenate_chain(processed_intro)
+
+
+def generate_dynamic_intro(audio_clip, config, candidate_videos, log_callback=None, rng=None):
+    chain = plan_dynamic_intro(audio_clip.duration, config, candidate_videos, log_callback, rng=rng)
+    if not chain:
+        return None, "NEUTRAL"
+    
+    final_intro_video = build_intro_clip(chain, config, log_callback)
+    if final_intro_video is None:
+        return None, "NEUTRAL"
+    
+    return final_intro_video.set_audio(audio_clip), "NEUTRAL"
 
 
 
-def get_mystery_silhouette_image(top1_name, list_previous_presidents, library_path, specific_folder):
+def get_mystery_silhouette_image(top1_name, list_previous_presidents, library_path, specific_folder, rng=None, asset_index=None, quarantine=None):
     """
     Selecciona la imagen para el audio del Top 1 (Bait/Pregunta).
     Prioridad:
     1. Silueta específica en la carpeta del presidente (*silueta*, *silhouette*)
     2. Comodín 'Viral' (Si Trump NO ha salido antes)
     3. Comodín 'Genérico' (Si Trump YA salió antes)
+    `asset_index`: índice de la biblioteca (src/asset_index.py); sin él, glob en la carpeta.
+    `quarantine`: cuarentena del preflight (src/preflight.py); sus siluetas no se eligen.
     """
     
     # 1. Buscar silueta específica
     # Buscamos patrones en español e inglés
     specific_silhouettes = []
-    if specific_folder and os.path.exists(specific_folder):
+    if specific_folder and asset_index is not None:
+        specific_silhouettes = asset_index.silhouette_images(specific_folder)
+    elif specific_folder and os.path.exists(specific_folder):
         specific_silhouettes = glob.glob(os.path.join(specific_folder, "*silueta*")) + \
                                glob.glob(os.path.join(specific_folder, "*silhouette*"))
     
     # Filtrar solo archivos de imagen (evitar carpetas o basura)
     valid_exts = ('.jpg', '.jpeg', '.png')
-    specific_silhouettes = [f for f in specific_silhouettes if f.lower().endswith(valid_exts)]
+    specific_silhouettes = sorted(f for f in specific_silhouettes if f.lower().endswith(valid_exts))
+    if quarantine is not None:
+        specific_silhouettes = quarantine.filter(specific_silhouettes)
 
     if specific_silhouettes:
          # SI EXISTE: Úsala.
-         return random.choice(specific_silhouettes)
+         return (rng or random).choice(specific_silhouettes)
 
     # 2. Lógica de Comodines (Si no hay silueta específica)
     # Analiza si Trump ya salió en los puestos previos.
@@ -564,14 +602,56 @@ def get_mystery_silhouette_image(top1_name, list_previous_presidents, library_pa
          return os.path.join(library_path, "comodin_silueta_1.png")
 
 
-def create_video_segment(audio_path, puesto, president_name, config, video_token_used, log_callback=None, engine_version="v1_estable", revealed_presidents=None):
+def load_segment_audio(audio_path, audio_cache=None):
+    """
+    Audio de un segmento tal y como se monta en el video:
+    recorte agresivo de 0.15s al final (glitch/palabra fantasma) + fadeout de 0.05s.
+    Con `audio_cache` se usa el PCM ya decodificado (sin lector ffmpeg).
+    """
+    if audio_cache is not None:
+        return AudioArrayClip(audio_cache.segment_voice(audio_path), fps=AUDIO_FPS)
+    
+    # Manual Volume Reduction REMOVED due to instability
+    audio = AudioFileClip(audio_path)
+    
+    # AGGRESSIVE GLITCH REMOVAL
+    # Cortamos las últimas décimas donde suele estar el ruido/palabra fantasma
+    # y aplicamos un fadeout rápido para suavizar el corte.
+    if audio.duration > 0.2:
+        new_dur = audio.duration - 0.15 # Hard Trim de 0.15s
+        audio = audio.subclip(0, new_dur)
+        audio = audio.fx(audio_fadeout, 0.05) # Suavizado final
+    return audio
+
+
+def segment_audio_duration(audio_path, audio_cache=None):
+    """Duración de la voz del segmento ya recortada, sin decodificar (índice de audio o metadatos)."""
+    nominal = audio_cache.duration(audio_path) if audio_cache is not None else probe_audio_duration(audio_path)
+    return segment_voice_duration(nominal)
+
+
+# ==========================================
+# PLAN DEL SEGMENTO (Selección -> JSON)
+# ==========================================
+# Un segmento se decide en dos pasos separados:
+#   plan_segment:    elige archivos, duraciones y movimientos (solo metadatos).
+#   execute_segment: construye los clips de MoviePy a partir del plan.
+# El plan es un dict serializable a JSON e independiente de la resolución
+# (los movimientos son relativos a la pantalla):
+#   {audio_path, puesto, president, engine_version, seed, duration,
+#    kind: "intro" | "body", silhouette,
+#    clips: [{type: "photo" | "video", path, duration, [is_first, is_last, motion]}]}
+
+def plan_segment(audio_path, puesto, president_name, config, engine_version="v1_estable", revealed_presidents=None, seed=None, log_callback=None):
+    """Plan del segmento, o None si no hay recursos. Mismas decisiones que el render directo con la misma semilla."""
     from src.utils import get_president_assets, find_best_match_folder
     
     paths = config["paths"]
-    res = tuple(config["video_settings"]["resolution"])
-    W, H = res
+    # Semilla del segmento: mismas entradas + misma semilla = mismo plan
+    rng = random.Random(seed) if seed is not None else random
     
-    photos, videos, silhouettes = get_president_assets(paths["library_base"], president_name, config)
+    with profile_stage("asset_lookup"):
+        photos, videos, silhouettes = get_president_assets(paths["library_base"], president_name, config)
     
     if log_callback:
         n_p = len(photos) if photos else 0
@@ -581,30 +661,30 @@ def create_video_segment(audio_path, puesto, president_name, config, video_token
         
     if not photos and not videos and not silhouettes: 
         if log_callback: log_callback(f"⚠️ No se encontraron recursos para {president_name}")
-        return None, video_token_used
-
-    # Manual Volume Reduction REMOVED due to instability
-    audio = AudioFileClip(audio_path)
+        return None
+
+    # Frames enteros: es la duración real del segmento codificado y fija los cortes del plan
+    dur_total = frame_duration(segment_audio_duration(audio_path, get_audio_cache(config)), config["video_settings"]["fps"])
+    plan = {
+        "audio_path": audio_path,
+        "puesto": puesto,
+        "president": president_name,
+        "engine_version": engine_version,
+        "seed": seed,
+        "duration": dur_total,
+        "kind": "body",
+        "silhouette": False,
+        "clips": [],
+    }
     
-    # AGGRESSIVE GLITCH REMOVAL
-    # Cortamos las últimas décimas donde suele estar el ruido/palabra fantasma
-    # y aplicamos un fadeout rápido para suavizar el corte.
-    if audio.duration > 0.2:
-        new_dur = audio.duration - 0.15 # Hard Trim de 0.15s
-        audio = audio.subclip(0, new_dur)
-        audio = audio.fx(audio_fadeout, 0.05) # Suavizado final
-    
-    audio_clip = audio
-    # No .fx, no .fl, no Arrays on Stack. Just pure audio.
-    dur_total = audio_clip.duration
-    
-    # --- INTRO LOGIC (DYNAMIC) ---
     # --- INTRO LOGIC (DYNAMIC) ---
     if "intro" in os.path.basename(audio_path).lower():
          if log_callback: log_callback("✅ Detectado archivo INTRO. Generando montaje visual...")
-         dynamic_intro, exit_state = generate_dynamic_intro(audio_clip, config, videos, log_callback)
-         if dynamic_intro:
-             return dynamic_intro, video_token_used
+         chain = plan_dynamic_intro(dur_total, config, videos, log_callback, rng=rng)
+         if chain:
+             plan["kind"] = "intro"
+             plan["clips"] = [{"type": "video", "path": p, "duration": d} for p, d in chain]
+             return plan
 
     # --- SILHOUETTE LOGIC (TOP 1 MYSTERY) ---
     is_silhouette_mode = False
@@ -615,19 +695,27 @@ def create_video_segment(audio_path, puesto, president_name, config, video_token
     if puesto == 1:
         # Lógica mejorada para Top 1
         
-        # 1. Recuperar carpeta específica para buscar siluetas a fondo
-        target_folder = find_best_match_folder(president_name, paths["library_base"])
-        
-        # 2. Obtener la silueta "Ideal" (Específica o Comodín Inteligente)
-        mystery_image = get_mystery_silhouette_image(
-            top1_name=president_name,
-            list_previous_presidents=revealed_presidents,
-            library_path=paths["resources_library"],
-            specific_folder=target_folder
-        )
-        
-        # 3. Verificar si la imagen existe
-        if mystery_image and os.path.exists(mystery_image):
+        with profile_stage("asset_lookup"):
+            # 1. Recuperar carpeta específica para buscar siluetas a fondo
+            asset_index = get_asset_index(config)
+            quarantine = get_quarantine(config)
+            target_folder = find_best_match_folder(
+                president_name, paths["library_base"],
+                folders=asset_index.folder_names(paths["library_base"]) if asset_index else None)
+            
+            # 2. Obtener la silueta "Ideal" (Específica o Comodín Inteligente)
+            mystery_image = get_mystery_silhouette_image(
+                top1_name=president_name,
+                list_previous_presidents=revealed_presidents,
+                library_path=paths["resources_library"],
+                specific_folder=target_folder,
+                rng=rng,
+                asset_index=asset_index,
+                quarantine=quarantine
+            )
+        
+        # 3. Verificar si la imagen existe (y no está rota según el preflight)
+        if mystery_image and os.path.exists(mystery_image) and not (quarantine and quarantine.reason(mystery_image)):
             is_silhouette_mode = True
             forced_silhouettes = [mystery_image]
             if log_callback: log_callback(f"👤 Modo Silueta Activado (Top 1) - Imagen: {os.path.basename(mystery_image)}")
@@ -638,6 +726,7 @@ def create_video_segment(audio_path, puesto, president_name, config, video_token
                 is_silhouette_mode = True
                 forced_silhouettes = silhouettes
                 if log_callback: log_callback("👤 Modo Silueta Activado (Top 1) - Fallback a siluetas detectadas")
+    plan["silhouette"] = is_silhouette_mode
 
     # --- PREPARE CLIPS ---
     
@@ -657,7 +746,7 @@ def create_video_segment(audio_path, puesto, president_name, config, video_token
         elif len(silhouettes) > 1:
             # Rule: "Si encuentras más de 1 silueta: Elige aleatoriamente 2 distinct."
             # "Si solo 1: Úsala para toda la duración."
-            selected_files = random.sample(silhouettes, min(len(silhouettes), 2))
+            selected_files = rng.sample(silhouettes, min(len(silhouettes), 2))
         else:
             selected_files = [silhouettes[0]]
             
@@ -677,10 +766,10 @@ def create_video_segment(audio_path, puesto, president_name, config, video_token
         # 2. SELECT SLOT 1
         slot1_img = None
         if list_intro:
-             slot1_img = random.choice(list_intro)
+             slot1_img = rng.choice(list_intro)
              # Intro picks don't deplete list_normal
         elif list_normal:
-             slot1_img = random.choice(list_normal)
+             slot1_img = rng.choice(list_normal)
              # CRITICAL: Consumed from normal list
              list_normal.remove(slot1_img)
              
@@ -708,7 +797,7 @@ def create_video_segment(audio_path, puesto, president_name, config, video_token
         num_rest = min(ideal_num_rest, available_count)
         
         if num_rest > 0:
-            picked_rest = random.sample(list_normal, num_rest)
+            picked_rest = rng.sample(list_normal, num_rest)
             selected_files.extend(picked_rest)
             
         # Fallback: If after all logic we have 0 clips (e.g. only 1 photo total and it was used in slot1),
@@ -718,8 +807,6 @@ def create_video_segment(audio_path, puesto, president_name, config, video_token
         
     clip_dur = remaining_dur / max(1, len(selected_files))
     
-    processed_clips = []
-    
     # --- STATE TRACKING ---
     prev_exit = DIR_CENTER # Default start
     
@@ -729,14 +816,8 @@ def create_video_segment(audio_path, puesto, president_name, config, video_token
     for i, file_path in enumerate(selected_files):
         # VIDEO Handling (Pass-through)
         if file_path.lower().endswith(('.mp4', '.mov')):
-            try:
-                vid = VideoFileClip(file_path).resize(height=H) # Crude fit
-                vid = vid.crop(x1=(vid.w - W)/2, width=W, height=H)
-                vid = vid.set_duration(clip_dur)
-                processed_clips.append(vid)
-                # prev_exit remains UNCHANGED
-            except:
-                pass
+            plan["clips"].append({"type": "video", "path": file_path, "duration": clip_dur})
+            # prev_exit remains UNCHANGED
             continue
             
         # PHOTO Handling (Dynamic)
@@ -744,21 +825,114 @@ def create_video_segment(audio_path, puesto, president_name, config, video_token
         is_first = (i == image_indices[0]) if image_indices else False
         is_last = (i == image_indices[-1]) if image_indices else False
         
-        clip, new_exit = create_smart_combo_clip(file_path, clip_dur, res, prev_exit, is_first_clip=is_first, is_last_clip=is_last, version=engine_version)
-        processed_clips.append(clip)
+        motion = choose_motion(engine_version, prev_exit, is_first, is_last, rng)
+        plan["clips"].append({"type": "photo", "path": file_path, "duration": clip_dur,
+                              "is_first": is_first, "is_last": is_last, "motion": motion})
         
         # Update State
-        prev_exit = new_exit
-        
-    final_body = None
-    if processed_clips:
-        final_body = concatenate_videoclips(processed_clips, method="compose")
-        
-    # Simplify concatenation logic as we removed intro_clips list
-    full_visual = final_body
+        prev_exit = motion["exit"]
+        
+    if not plan["clips"]:
+        return None
+    return plan
+
+
+def execute_segment(plan, config, log_callback=None):
+    """Construye el segmento (video + voz) a partir de su plan, a la resolución de config. None si falla."""
+    # Resolución nativa de salida (pares): todos los clips del segmento se crean ya a este tamaño
+    res = safe_resolution(config)
+    fps = config["video_settings"]["fps"]
+    renderer = config["video_settings"].get("renderer", "numpy")
+    motion_tables = config["video_settings"].get("motion_tables", True)
+    image_cache = get_image_cache(config)
+    # Clips perezosos (src/renderer.py): imagen y lienzo se construyen al llegar a cada clip
+    lazy = config["video_settings"].get("lazy_clips", True)
+    
+    with profile_stage("audio_load"):
+        audio_clip = load_segment_audio(plan["audio_path"], get_audio_cache(config))
+    # Etiqueta de cada clip en el informe del perfilador (src/profiler.py)
+    label = plan.get("name") or os.path.splitext(os.path.basename(plan["audio_path"]))[0]
+    
+    if plan["kind"] == "intro":
+        full_visual = build_intro_clip([(c["path"], c["duration"]) for c in plan["clips"]], config, log_callback)
+    else:
+        processed_clips = []
+        for i, c in enumerate(plan["clips"]):
+            # VIDEO Handling (Pass-through)
+            if c["type"] == "video":
+                def open_video(c=c):
+                    with profile_stage("video_open"):
+                        vid = fit_to_resolution(VideoFileClip(resolve_video_source(c["path"], config), audio=False), res)
+                    return vid.set_duration(c["duration"])
+                try:
+                    if lazy:
+                        if not video_is_readable(c["path"], config):
+                            continue
+                        vid = LazyClip(open_video, c["duration"], res, fps=fps)
+                    else:
+                        vid = open_video()
+                    vid.profile_label = f"{label}#{i}:{os.path.basename(c['path'])}"
+                    processed_clips.append(vid)
+                except:
+                    pass
+                continue
+            
+            # PHOTO Handling (Dynamic): movimiento ya decidido en el plan
+            def build_photo(c=c):
+                motion = c["motion"]
+                with profile_stage("clip_build"):
+                    clip, _ = create_smart_combo_clip(c["path"], c["duration"], res, motion["enter"], is_first_clip=c["is_first"], is_last_clip=c["is_last"], version=plan["engine_version"], renderer=renderer, fps=fps, motion_tables=motion_tables, image_cache=image_cache, motion=motion)
+                return clip
+            clip = LazyClip(build_photo, c["duration"], res, fps=fps) if lazy else build_photo()
+            clip.profile_label = f"{label}#{i}:{os.path.basename(c['path'])}"
+            processed_clips.append(clip)
+        
+        # Todos los clips miden exactamente res: concatenación sin lienzo compuesto
+        full_visual = concatenate_chain(processed_clips) if processed_clips else None
     
     if not full_visual:
+        return None
+    
+    # Garantía de resolución nativa (no-op si ya mide res)
+    return fit_to_resolution(full_visual, res).set_audio(audio_clip)
+
+
+def render_segment(plan, config, log_callback=None, logger=None, use_cache=True):
+    """
+    execute_segment con caché de segmentos: un plan ya codificado se reutiliza tal cual.
+    `logger`: progreso (proglog) de la codificación del segmento al guardarlo en caché.
+    `use_cache=False`: sin caché (ni consulta ni codificación del segmento).
+    """
+    audio_cache = get_audio_cache(config)
+    segment_cache = get_segment_cache(config) if use_cache else None
+    segment_key = None
+    if segment_cache is not None:
+        with profile_stage("segment_cache"):
+            segment_key = segment_cache_key(plan["audio_path"], [c["path"] for c in plan["clips"]], config,
+                                            plan["engine_version"], plan["puesto"], plan["president"],
+                                            audio_digest=audio_cache.digest(plan["audio_path"]) if audio_cache else None,
+                                            plan=plan)
+            cached_path = segment_cache.get(segment_key, "mp4")
+            if cached_path:
+                if log_callback: log_callback(f"♻️ Segmento reutilizado desde caché: {os.path.basename(plan['audio_path'])}")
+                return load_cached_segment(cached_path, load_segment_audio(plan["audio_path"], audio_cache),
+                                           duration=plan["duration"])
+    
+    clip = execute_segment(plan, config, log_callback)
+    
+    # Guarda el segmento recién creado (solo video) para la próxima vez
+    if clip is not None and segment_key is not None:
+        try:
+            clip.cached_path = store_segment(segment_cache, segment_key, clip, config, logger=logger)
+        except Exception as e:
+            if log_callback: log_callback(f"⚠️ No se pudo guardar el segmento en caché: {e}")
+    return clip
+
+
+def create_video_segment(audio_path, puesto, president_name, config, video_token_used, log_callback=None, engine_version="v1_estable", revealed_presidents=None, seed=None):
+    """Plan + render en un paso (sin guardar el plan)."""
+    plan = plan_segment(audio_path, puesto, president_name, config, engine_version=engine_version,
+                        revealed_presidents=revealed_presidents, seed=seed, log_callback=log_callback)
+    if plan is None:
         return None, video_token_used
-        
-    full_visual = full_visual.set_audio(audio_clip)
-    return full_visual, video_token_used
+    return render_segment(plan, config, log_callback), video_token_used
@@ -0,0 +1,136 @@
+import os
+import json
+import threading
+
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+from src.cache import file_signature
+
+# ==========================================
+# METADATOS DE VIDEO (Sondeo cacheado)
+# ==========================================
+# Para planificar la intro solo hacen falta duración, tamaño y fps de cada
+# candidato. Se leen una vez por archivo con `ffmpeg -i` (sin decodificador
+# abierto) y se guardan en <cache>/probes.json, por (ruta, mtime, tamaño).
+
+_probe_caches = {}
+
+
+class ProbeCache:
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dirty = False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    @staticmethod
+    def _key(video_path):
+        abspath, mtime_ns, size = file_signature(video_path)
+        return f"{abspath}|{mtime_ns}|{size}"
+
+    def probe(self, video_path):
+        """{'duration', 'size', 'fps'} del video, o None si ffmpeg no lo puede leer."""
+        try:
+            key = self._key(video_path)
+        except OSError:
+            return None
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+        try:
+            infos = ffmpeg_parse_infos(video_path)
+            info = {
+                "duration": float(infos["duration"]),
+                "size": list(infos["video_size"]),
+                "fps": float(infos["video_fps"]),
+            } if infos.get("video_found") else None
+        except Exception:
+            info = None
+        with self._lock:
+            self._entries[key] = info
+            self._dirty = True
+        return info
+
+    def save(self):
+        """Persiste las entradas nuevas (escritura atómica)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+
+def get_probe_cache(config):
+    """ProbeCache en la carpeta de caché de config (una instancia por carpeta)."""
+    path = os.path.join(config.get("cache", {}).get("folder", "./cache"), "probes.json")
+    if path not in _probe_caches:
+        _probe_caches[path] = ProbeCache(path)
+    return _probe_caches[path]
+
+
+# ==========================================
+# PLAN DE LA INTRO (Solo metadatos)
+# ==========================================
+MIN_INTRO_CLIP = 2.0
+
+
+def plan_intro_chain(durations, target_duration, rng, max_attempts=20, min_clip=MIN_INTRO_CLIP):
+    """
+    Elige una cadena de videos y la duración de cada uno para cubrir `target_duration`.
+    `durations`: {ruta: duración}. Devuelve [(ruta, duración_final), ...] o None.
+    Misma lógica que antes con clips abiertos: mezcla, encadena hasta superar el
+    objetivo y reparte el recorte (proporcional, o desde el final con suelo de 2 s).
+    """
+    # Clips de menos de 2 s no sirven para las restricciones
+    candidates = sorted(p for p, d in durations.items() if d is not None and d >= min_clip)
+    if not candidates:
+        return None
+
+    for _ in range(max_attempts):
+        rng.shuffle(candidates)
+        pool_idx = 0
+
+        chain = []
+        chain_dur = 0.0
+        while chain_dur < target_duration:
+            if pool_idx >= len(candidates):
+                # Repopulate
+                pool_idx = 0
+                rng.shuffle(candidates)
+            path = candidates[pool_idx]
+            pool_idx += 1
+            chain.append(path)
+            chain_dur += durations[path]
+
+        # Constraint: Each clip must be >= 2.0s
+        if len(chain) * min_clip > target_duration:
+            continue
+
+        # Plan A: Proportional
+        scale = target_duration / chain_dur
+        final_durs = [durations[p] * scale for p in chain]
+
+        if min(final_durs) < min_clip:
+            # Plan B: Backwards Squeeze
+            excess = chain_dur - target_duration
+            final_durs = [durations[p] for p in chain]
+            for i in range(len(final_durs) - 1, -1, -1):
+                take = min(final_durs[i] - min_clip, excess)
+                final_durs[i] -= take
+                excess -= take
+                if excess <= 0.001: break
+            if excess > 0.001:
+                continue
+
+        return list(zip(chain, final_durs))
+    return None
@@ -0,0 +1,174 @@
+import numpy as np
+
+# ==========================================
+# TABLAS DE TRAYECTORIA (Motion Tables)
+# ==========================================
+# Las curvas de easing de los motores (pos_func / zoom_func / bounce_func) se
+# evalúan UNA vez por clip, vectorizadas, a los fps de salida. El productor de
+# frames solo indexa (x, y, scale) por número de frame.
+
+
+class MotionTable:
+    """
+    Trayectoria precalculada de un clip: posición entera (x, y) del lienzo
+    respecto a la pantalla y escala, una entrada por frame a `fps`.
+    """
+
+    def __init__(self, x, y, scale, fps, duration):
+        self.x = np.asarray(x, dtype=np.int64)
+        self.y = np.asarray(y, dtype=np.int64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.fps = fps
+        self.duration = duration
+
+    def __len__(self):
+        return len(self.x)
+
+    def frame_index(self, t):
+        i = int(round(t * self.fps))
+        return min(max(i, 0), len(self.x) - 1)
+
+    def position(self, t):
+        i = self.frame_index(t)
+        return int(self.x[i]), int(self.y[i])
+
+    def zoom(self, t):
+        return float(self.scale[self.frame_index(t)])
+
+    def to_dict(self):
+        return {
+            "fps": self.fps,
+            "duration": self.duration,
+            "x": self.x.tolist(),
+            "y": self.y.tolist(),
+            "scale": self.scale.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["x"], data["y"], data["scale"], data["fps"], data["duration"])
+
+
+def frame_times(duration, fps):
+    """Instantes t = i/fps de cada frame del clip (incluye el último instante)."""
+    n = int(duration * fps) + 1
+    return np.arange(n, dtype=np.float64) / fps
+
+
+def _trunc(values):
+    # Igual que int() de Python: trunca hacia cero.
+    return np.trunc(values).astype(np.int64)
+
+
+def _lerp(a, b, t):
+    return a + (b - a) * t
+
+
+def _relay(t, duration):
+    """Curva de 2 fases del motor V1 (ease-out hasta la mitad, ease-in después)."""
+    if duration == 0:
+        return np.zeros_like(t), np.zeros(t.shape, dtype=bool)
+    p = np.minimum(t / duration, 1.0)
+    first_half = p < 0.5
+    local_in = p * 2.0
+    local_out = (p - 0.5) * 2.0
+    val = np.where(first_half, local_in * (2.0 - local_in), local_out * local_out)
+    return val, first_half
+
+
+# ==========================================
+# MOTOR V1
+# ==========================================
+def v1_slide_table(total_dur, fps, start_pos, mid_pos, end_pos, bounds):
+    """Equivalente vectorizado de pos_func (V1). bounds = (min_x, max_x, min_y, max_y)."""
+    min_x, max_x, min_y, max_y = bounds
+    t = frame_times(total_dur, fps)
+    if total_dur == 0:
+        x = np.full(t.shape, start_pos[0], dtype=np.float64)
+        y = np.full(t.shape, start_pos[1], dtype=np.float64)
+        return MotionTable(_trunc(x), _trunc(y), np.ones_like(t), fps, total_dur)
+
+    val, first_half = _relay(t, total_dur)
+    x = np.where(first_half, _lerp(start_pos[0], mid_pos[0], val), _lerp(mid_pos[0], end_pos[0], val))
+    y = np.where(first_half, _lerp(start_pos[1], mid_pos[1], val), _lerp(mid_pos[1], end_pos[1], val))
+
+    # FINAL CLAMP
+    x = np.maximum(min_x, np.minimum(max_x, x))
+    y = np.maximum(min_y, np.minimum(max_y, y))
+    return MotionTable(_trunc(x), _trunc(y), np.ones_like(t), fps, total_dur)
+
+
+def v1_bounce_table(total_dur, fps, clip_size, resolution, boost=0.35):
+    """Equivalente vectorizado de bounce_func (V1) + posición 'center' del blit."""
+    W, H = resolution
+    w, h = clip_size
+    t = frame_times(total_dur, fps)
+    if total_dur == 0:
+        scale = np.ones_like(t)
+    else:
+        val, first_half = _relay(t, total_dur)
+        scale = np.where(first_half, _lerp(1.0 + boost, 1.0, val), _lerp(1.0, 1.0 + boost, val))
+
+    # MoviePy: tamaño = int(w * s); 'center' = int((W - wi) / 2)
+    x = _trunc((W - _trunc(w * scale)) / 2)
+    y = _trunc((H - _trunc(h * scale)) / 2)
+    return MotionTable(x, y, scale, fps, total_dur)
+
+
+# ==========================================
+# MOTOR V2
+# ==========================================
+def v2_table(total_dur, fps, resolution, tile_size, local_center, center, start, end, is_first_clip=False, is_last_clip=False):
+    """
+    Equivalente vectorizado de zoom_func + pos_func (V2).
+    tile_size = (final_w, final_h), local_center = (col, row) del tile central en el lienzo.
+    """
+    W, H = resolution
+    final_w, final_h = tile_size
+    center_x, center_y = center
+    start_x, start_y = start
+    end_x, end_y = end
+
+    t = frame_times(total_dur, fps)
+    t_mid = total_dur * 0.5
+    first_half = t < t_mid
+
+    # Evita divisiones por cero en clips degenerados (duración 0)
+    dur_in = t_mid if t_mid > 0 else 1.0
+    dur_out = (total_dur - t_mid) if (total_dur - t_mid) > 0 else 1.0
+
+    p_in = t / dur_in
+    p_out = (t - t_mid) / dur_out
+
+    # ZOOM
+    scale = np.ones_like(t)
+    if is_last_clip:
+        scale = np.where(~first_half, 1.0 + (0.3 * p_out ** 2), scale)
+    elif is_first_clip:
+        scale = np.where(first_half, 1.3 - (0.3 * (1 - (1 - p_in) ** 2)), scale)
+
+    # PIVOTE REAL (Centro de la imagen central en el canvas)
+    pivot_x_in_img = (local_center[0] + 0.5) * final_w
+    pivot_y_in_img = (local_center[1] + 0.5) * final_h
+    dyn_x = (W / 2) - (pivot_x_in_img * scale)
+    dyn_y = (H / 2) - (pivot_y_in_img * scale)
+
+    # Fase de entrada (ease-out cúbico) y de salida (ease-in cúbico)
+    e_in = 1 - (1 - p_in) ** 3
+    in_x = start_x + (center_x - start_x) * e_in
+    in_y = start_y + (center_y - start_y) * e_in
+    e_out = p_out ** 3
+    out_x = center_x + (end_x - center_x) * e_out
+    out_y = center_y + (end_y - center_y) * e_out
+
+    if is_first_clip:
+        x = np.where(first_half, dyn_x, out_x)
+        y = np.where(first_half, dyn_y, out_y)
+    elif is_last_clip:
+        x = np.where(first_half, in_x, dyn_x)
+        y = np.where(first_half, in_y, dyn_y)
+    else:
+        x = np.where(first_half, in_x, out_x)
+        y = np.where(first_half, in_y, out_y)
+
+    return MotionTable(_trunc(x), _trunc(y), scale, fps, total_dur)
@@ -0,0 +1,127 @@
+import difflib
+from collections import Counter, OrderedDict
+
+import numpy as np
+
+# ==========================================
+# BÚSQUEDA DIFUSA DE CARPETAS (Matcher precompilado)
+# ==========================================
+# find_best_match_folder (src/utils.py) recorría todas las carpetas en cada
+# búsqueda: tokens normalizados + difflib contra cada nombre. El matcher se
+# construye una vez por lista de carpetas y conserva la misma semántica:
+#   1. La primera carpeta (en el orden dado) cuyo nombre normalizado es igual
+#      al del input o cuyos tokens están todos en el input -> índice invertido.
+#   2. Si no hay ninguna, la de mayor SequenceMatcher.ratio() (> 0.6, primera
+#      en caso de empate). Un índice de recuento de caracteres da para todas
+#      las carpetas a la vez la cota de quick_ratio() (nunca menor que ratio()),
+#      así que difflib solo se ejecuta con las pocas que aún pueden ganar.
+
+FUZZY_THRESHOLD = 0.6
+
+# Matchers recientes por lista de carpetas (la biblioteca cambia poco)
+MAX_MATCHERS = 8
+
+_matchers = OrderedDict()
+
+
+def clean_query(character_name_raw):
+    """Nombre del TXT/Gemini normalizado: sin '_', en minúsculas y solo letras y espacios."""
+    clean = character_name_raw.replace("_", " ").lower()
+    return "".join([c for c in clean if c.isalpha() or c.isspace()])
+
+
+def clean_folder(folder):
+    return folder.replace("_", " ").lower()
+
+
+class FolderMatcher:
+
+    def __init__(self, folders):
+        self.folders = list(folders)
+        self.cleans = [clean_folder(f) for f in self.folders]
+
+        # 1. Coincidencia exacta (primera carpeta con ese nombre normalizado)
+        self.exact = {}
+        for i, clean in enumerate(self.cleans):
+            self.exact.setdefault(clean, i)
+
+        # 2. Índice invertido token -> carpetas, y nº de tokens distintos de cada carpeta
+        self.postings = {}
+        self.token_counts = []
+        for i, clean in enumerate(self.cleans):
+            tokens = set(clean.split())
+            self.token_counts.append(len(tokens))
+            for token in tokens:
+                self.postings.setdefault(token, []).append(i)
+
+        # 3. Recuento de caracteres por carpeta (cota de quick_ratio)
+        self.char_ids = {}
+        for clean in self.cleans:
+            for c in clean:
+                self.char_ids.setdefault(c, len(self.char_ids))
+        self.char_counts = np.zeros((len(self.cleans), len(self.char_ids)), dtype=np.int32)
+        for i, clean in enumerate(self.cleans):
+            for c, n in Counter(clean).items():
+                self.char_counts[i, self.char_ids[c]] = n
+        self.lengths = np.array([len(clean) for clean in self.cleans], dtype=np.int64)
+
+    def first_token_match(self, clean_input):
+        """Índice de la primera carpeta exacta o contenida en los tokens del input, o None."""
+        first = self.exact.get(clean_input)
+        hits = Counter()
+        for token in set(clean_input.split()):
+            hits.update(self.postings.get(token, ()))
+        for i, common in hits.items():
+            if self.token_counts[i] > 0 and common >= self.token_counts[i] and (first is None or i < first):
+                first = i
+        return first
+
+    def quick_ratio_bounds(self, clean_input):
+        """quick_ratio() de difflib frente a cada carpeta, vectorizado."""
+        query = np.zeros(len(self.char_ids), dtype=np.int32)
+        for c, n in Counter(clean_input).items():
+            if c in self.char_ids:
+                query[self.char_ids[c]] = n
+        matches = np.minimum(self.char_counts, query).sum(axis=1)
+        total = self.lengths + len(clean_input)
+        return np.where(total > 0, 2.0 * matches / np.maximum(total, 1), 1.0)
+
+    def best_fuzzy(self, clean_input):
+        """(índice, ratio) de la carpeta más parecida según difflib, o (None, 0)."""
+        best, best_score = None, 0
+        if not self.folders:
+            return best, best_score
+        bounds = self.quick_ratio_bounds(clean_input)
+        # Mayor cota primero; a igual cota, orden original
+        for i in np.lexsort((np.arange(len(bounds)), -bounds)):
+            bound = bounds[i]
+            if bound <= FUZZY_THRESHOLD or bound < best_score:
+                break
+            score = difflib.SequenceMatcher(None, clean_input, self.cleans[i]).ratio()
+            if score > best_score or (score == best_score and best is not None and i < best):
+                best, best_score = int(i), score
+        return best, best_score
+
+    def match(self, character_name_raw):
+        """(carpeta, ratio) con la semántica de find_best_match_folder; ratio None si no fue difusa."""
+        clean_input = clean_query(character_name_raw)
+        i = self.first_token_match(clean_input)
+        if i is not None:
+            return self.folders[i], None
+        i, score = self.best_fuzzy(clean_input)
+        if i is not None and score > FUZZY_THRESHOLD:
+            return self.folders[i], score
+        return None, None
+
+
+def get_folder_matcher(folders):
+    """FolderMatcher para esta lista de carpetas (reutilizado mientras no cambie)."""
+    key = tuple(folders)
+    matcher = _matchers.get(key)
+    if matcher is None:
+        matcher = _matchers[key] = FolderMatcher(key)
+        while len(_matchers) > MAX_MATCHERS:
+            _matchers.popitem(last=False)
+    else:
+        _matchers.move_to_end(key)
+    return matcher
@@ -0,0 +1,598 @@
+import os
+import copy
+import glob
+import json
+import random
+import hashlib
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import PIL.Image
+from proglog import default_bar_logger
+from moviepy.audio.AudioClip import AudioArrayClip
+
+from src.logic import plan_segment, render_segment, execute_segment
+from src.audio_mix import build_soundtrack, SFX_LEAD
+from src.audio_cache import get_audio_cache
+from src.ffmpeg_writer import audio_to_pcm, get_ffmpeg_binary, write_timeline_ffmpeg, AUDIO_FPS
+from src.segment_cache import write_segment_video, get_segment_cache
+from src.utils import safe_resolution, frame_duration
+from src.renderer import concatenate_chain
+from src.profiler import RenderProfiler, get_profiler, profile_stage
+
+# Mismo parche que main.py: los workers (spawn) no importan main.py
+if not hasattr(PIL.Image, 'ANTIALIAS'):
+    PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
+
+
+# ==========================================
+# ORDEN Y NOMBRES DE SEGMENTOS
+# ==========================================
+def collect_audio_order(src_folder):
+    """Audios .mp3 de la carpeta en orden de montaje: Intro primero, luego 5, 4, 3, 2, 1."""
+    if not os.path.exists(src_folder):
+        raise FileNotFoundError(f"No existe la carpeta fuente: {src_folder}")
+
+    local_audios = glob.glob(os.path.join(src_folder, "*.mp3"))
+    if not local_audios:
+        raise ValueError("No se encontraron archivos .mp3 en la carpeta indicada.")
+
+    # Ordenar (Intro primero, luego resto reverso numérico)
+    intro_file = None
+    body_files = []
+
+    for aud in local_audios:
+        if "intro" in os.path.basename(aud).lower():
+            intro_file = aud
+        else:
+            body_files.append(aud)
+
+    # Ordenar numéricamente inverso (5, 4, 3, 2, 1)
+    # Asumimos que empiezan con número N_Name.mp3
+    try:
+        body_files.sort(key=lambda x: int(os.path.basename(x).split('_')[0]), reverse=True)
+    except:
+        # Fallback por nombre si no cumple formato
+        body_files.sort(key=lambda x: os.path.basename(x), reverse=True)
+
+    final_audio_order = []
+    if intro_file: final_audio_order.append(intro_file)
+    final_audio_order.extend(body_files)
+    return final_audio_order
+
+
+def parse_segment_name(aud):
+    """(nombre, puesto, personaje) a partir de 'N_Nombre.mp3' o 'intro.mp3'."""
+    name = os.path.splitext(os.path.basename(aud))[0]
+    try:
+        parts = name.split('_')
+        if "intro" in name.lower():
+            puesto = 1
+            presi = "Intro"
+        elif len(parts) >= 2:
+            puesto = int(parts[0])
+            # Reconstruir nombre si tenía espacios o guiones
+            presi = "_".join(parts[1:])
+        else:
+            puesto = 0
+            presi = name
+    except:
+        puesto = 0
+        presi = name
+    return name, puesto, presi
+
+
+def next_output_path(output_folder):
+    """Siguiente nombre libre TikTok_AUTO_N.mp4 en la carpeta de salida."""
+    # NAMING CONVENTION (V2 - Sequential)
+    try:
+        current_mp4s = [f for f in os.listdir(output_folder) if f.endswith(".mp4") and "TikTok_AUTO_" in f]
+        count = len(current_mp4s)
+        out_name = f"TikTok_AUTO_{count + 1}.mp4"
+    except:
+        timestamp = datetime.now().strftime("%H%M%S")
+        out_name = f"TikTok_AUTO_{timestamp}.mp4"
+
+    # Fallback de Seguridad (Si existe, apendice Timestamp)
+    if os.path.exists(os.path.join(output_folder, out_name)):
+        timestamp = datetime.now().strftime("%H%M%S")
+        name_no_ext = os.path.splitext(out_name)[0]
+        out_name = f"{name_no_ext}_{timestamp}.mp4"
+
+    return os.path.join(output_folder, out_name)
+
+
+# ==========================================
+# SEMILLAS (RENDERS REPRODUCIBLES)
+# ==========================================
+# Cada video tiene una semilla; la de cada segmento se deriva de ella y del
+# nombre del segmento (no de su posición), así que cambiar un audio no altera
+# la selección de fotos ni los movimientos del resto. La semilla queda
+# guardada junto al video en '<video>.render.json'.
+
+def resolve_video_seed(config, seed=None):
+    """Semilla del video: la indicada, la de config (video_settings.seed) o una nueva aleatoria."""
+    if seed is None:
+        seed = config["video_settings"].get("seed")
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 31)
+    return int(seed)
+
+
+def derive_segment_seed(video_seed, segment_name):
+    digest = hashlib.sha1(f"{video_seed}:{segment_name}".encode("utf-8")).hexdigest()
+    return int(digest[:8], 16)
+
+
+def render_record_path(out_path):
+    return os.path.splitext(out_path)[0] + ".render.json"
+
+
+def write_render_record(out_path, config, engine_version, video_seed, audio_order):
+    """Guarda la semilla (y las derivadas por segmento) junto al video para poder reproducirlo."""
+    segments = []
+    for aud in audio_order:
+        name = parse_segment_name(aud)[0]
+        segments.append({"audio": os.path.basename(aud), "seed": derive_segment_seed(video_seed, name)})
+    record = {
+        "video": os.path.basename(out_path),
+        "seed": video_seed,
+        "engine_version": engine_version,
+        "resolution": list(config["video_settings"]["resolution"]),
+        "fps": config["video_settings"]["fps"],
+        "segments": segments,
+    }
+    path = render_record_path(out_path)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=4, ensure_ascii=False)
+    return path
+
+
+# ==========================================
+# PLAN DEL VIDEO (JSON entre selección y render)
+# ==========================================
+# plan_video decide todo el video sin crear clips: el plan de cada segmento
+# (src/logic.py: archivos, duraciones, movimientos), los cortes y el offset
+# de cada 'pagina.mp3'. Se guarda junto al video en '<video>.plan.json' y se
+# puede ejecutar después (secuencial o en paralelo), a cualquier resolución.
+# Las duraciones van en frames enteros (las del video codificado) y el audio
+# final coloca cada 'pagina.mp3' en el sfx_start de sus transiciones.
+
+PLAN_VERSION = 1
+
+
+def plan_video(audio_order, config, engine_version="v1_estable", seed=None, log_callback=None):
+    """Plan completo del video (dict serializable a JSON)."""
+    video_seed = resolve_video_seed(config, seed)
+    log = log_callback or (lambda msg: None)
+    log(f"🎲 Semilla del video: {video_seed}")
+
+    segments = []
+    revealed_presidents = []
+    for aud in audio_order:
+        name, puesto, presi = parse_segment_name(aud)
+        log(f"⚙️ Procesando segmento: **{name}** (Personaje: {presi})")
+        try:
+            seg_plan = plan_segment(
+                aud, puesto, presi, config, engine_version=engine_version,
+                # Personajes de los segmentos anteriores (silueta comodín del Top 1)
+                revealed_presidents=list(revealed_presidents),
+                seed=derive_segment_seed(video_seed, name), log_callback=log
+            )
+            # Como en el render original: un segmento que falla no cuenta como revelado
+            revealed_presidents.append(presi)
+        except Exception as e:
+            log(f"❌ Error creando segmento {os.path.basename(aud)}: {e}")
+            seg_plan = None
+        if seg_plan:
+            seg_plan["name"] = name
+            segments.append(seg_plan)
+
+    # Cortes entre segmentos y SFX de transición (0.2 s antes de cada corte)
+    sfx_path = os.path.join(config["paths"]["resources_library"], "pagina.mp3")
+    sfx_path = sfx_path if os.path.exists(sfx_path) else None
+    cuts = []
+    elapsed = 0.0
+    for seg_plan in segments:
+        if elapsed > 0:
+            cuts.append(elapsed)
+        elapsed += seg_plan["duration"]
+    transitions = [{"time": t, "sfx_start": max(0.0, t - SFX_LEAD) if sfx_path else None} for t in cuts]
+
+    return {
+        "version": PLAN_VERSION,
+        "seed": video_seed,
+        "engine_version": engine_version,
+        "sfx": sfx_path,
+        "duration": elapsed,
+        "segments": segments,
+        "transitions": transitions,
+    }
+
+
+def plan_path(out_path):
+    return os.path.splitext(out_path)[0] + ".plan.json"
+
+
+def save_plan(plan, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(plan, f, indent=4, ensure_ascii=False)
+    return path
+
+
+def load_plan(path):
+    with open(path, "r", encoding="utf-8") as f:
+        plan = json.load(f)
+    if plan.get("version") != PLAN_VERSION:
+        raise ValueError(f"Versión de plan no soportada: {plan.get('version')}")
+    return plan
+
+
+# ==========================================
+# RENDER PARALELO POR SEGMENTOS
+# ==========================================
+# Cada segmento (intro + tops) se renderiza a su propio .mp4 (solo video) en un
+# pool de procesos. Después se unen con el concat demuxer de ffmpeg sin
+# recodificar (-c:v copy) y se mezcla el audio completo (voces + 'pagina.mp3')
+# en un único mux final.
+
+def render_segment_job(job):
+    """Worker: ejecuta el plan del segmento y lo escribe (sin audio). Devuelve dict con ruta, duración y logs."""
+    logs = []
+    config = job["config"]
+    sets = config["video_settings"]
+    audio_path = job["plan"]["audio_path"]
+    result = {"index": job["index"], "audio_path": audio_path, "path": None, "duration": 0.0, "logs": logs}
+    # Perfilador propio del worker: su informe se une al del proceso principal
+    profiler = RenderProfiler().start() if job.get("profile") else None
+
+    try:
+        seg = render_segment(job["plan"], config, log_callback=logs.append)
+        if not seg:
+            return result
+
+        fps = sets["fps"]
+        # Segmento ya codificado en la caché (acierto, o recién guardado): se concatena tal cual
+        cached_path = getattr(seg, "cached_path", None)
+        if cached_path:
+            result["path"] = cached_path
+        else:
+            write_segment_video(seg, job["out_path"], config)
+            result["path"] = job["out_path"]
+        # Duración real del archivo: frames enteros (alinea audio y SFX con el video concatenado)
+        result["duration"] = frame_duration(seg.duration, fps)
+        seg.close()
+    except Exception as e:
+        logs.append(f"❌ Error creando segmento {os.path.basename(audio_path)}: {e}")
+    finally:
+        if profiler is not None:
+            result["profile"] = profiler.stop().to_dict()
+    return result
+
+
+def build_segment_jobs(plan, config, work_dir, profile=False):
+    """Un job por segmento del plan (el plan del segmento viaja entero al worker)."""
+    return [{
+        "index": idx,
+        "name": seg_plan["name"],
+        "plan": seg_plan,
+        "config": config,
+        "out_path": os.path.join(work_dir, f"seg_{idx:02d}.mp4"),
+        "profile": profile,
+    } for idx, seg_plan in enumerate(plan["segments"])]
+
+
+def plan_sfx_offsets(plan, segments):
+    """
+    Inicio de cada 'pagina.mp3' según plan["transitions"], o None si los segmentos renderizados
+    no son los del plan (alguno falló al renderizar y los cortes se recalculan).
+    """
+    if [seg["audio_path"] for seg in segments] != [seg["audio_path"] for seg in plan["segments"]]:
+        return None
+    return [t["sfx_start"] for t in plan.get("transitions", []) if t.get("sfx_start") is not None]
+
+
+def build_final_audio(segments, sfx_path=None, audio_cache=None, sfx_offsets=None):
+    """
+    Audio completo (array PCM float): voz de cada segmento en su offset + 'pagina.mp3' en cada corte.
+    `sfx_offsets`: inicio de cada SFX (plan_sfx_offsets); None = calculado desde las duraciones.
+    """
+    paths = [seg["audio_path"] for seg in segments]
+    durations = [seg["duration"] for seg in segments]
+    with profile_stage("audio_mix"):
+        if audio_cache is None:
+            return build_soundtrack(paths, durations, sfx_path, sfx_offsets=sfx_offsets)
+        return build_soundtrack(paths, durations, sfx_path, decoder=audio_cache.samples, duration_of=audio_cache.duration,
+                                sfx_offsets=sfx_offsets)
+
+
+def concat_segments(segment_paths, out_path, audio_pcm_path=None, channels=2, audio_codec='aac', list_dir=None):
+    """Une los segmentos con el concat demuxer (stream copy) y mezcla el audio PCM en el mismo paso."""
+    list_dir = list_dir or os.path.dirname(os.path.abspath(out_path))
+    list_path = os.path.join(list_dir, "concat_list.txt")
+    with open(list_path, "w", encoding="utf-8") as f:
+        for p in segment_paths:
+            safe = os.path.abspath(p).replace("\\", "/").replace("'", "'\\''")
+            f.write(f"file '{safe}'\n")
+
+    cmd = [get_ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path]
+    if audio_pcm_path:
+        cmd += ["-f", "s16le", "-ar", str(AUDIO_FPS), "-ac", str(channels), "-i", audio_pcm_path,
+                "-map", "0:v", "-map", "1:a", "-acodec", audio_codec, "-shortest"]
+    cmd += ["-c:v", "copy", out_path]
+
+    try:
+        proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if proc.returncode != 0:
+            raise IOError(f"ffmpeg concat falló: {proc.stderr.decode(errors='ignore')}")
+    finally:
+        if os.path.exists(list_path):
+            os.remove(list_path)
+    return out_path
+
+
+def join_encoded_segments(segments, plan, out_path, config, work_dir):
+    """
+    Video final a partir de segmentos ya codificados ({audio_path, path, duration}):
+    audio completo en un solo mux y concat de los videos sin recodificar.
+    """
+    # AUDIO FINAL (un solo mux): voces + transiciones mezcladas en un buffer (src/audio_mix.py)
+    # Con las duraciones reales (frames enteros) de cada segmento codificado
+    sfx_path = plan.get("sfx")
+    final_audio, total_dur = build_final_audio(segments, sfx_path if sfx_path and os.path.exists(sfx_path) else None,
+                                               audio_cache=get_audio_cache(config),
+                                               sfx_offsets=plan_sfx_offsets(plan, segments))
+    pcm_path = os.path.join(work_dir, "audio.pcm")
+    with profile_stage("audio_pcm"):
+        channels = audio_to_pcm(final_audio, total_dur, pcm_path)
+
+    with profile_stage("concat"):
+        concat_segments([s["path"] for s in segments], out_path, audio_pcm_path=pcm_path, channels=channels,
+                        list_dir=work_dir)
+    return out_path
+
+
+def render_plan_parallel(plan, out_path, config, log_callback=None, logger="bar", max_workers=None):
+    """
+    Ejecuta un plan de video: cada segmento en un proceso distinto, unidos sin recodificar.
+    Guarda el plan y el registro de semillas junto al video. Devuelve la ruta del video final.
+    """
+    logger = default_bar_logger(logger)
+    log = log_callback or (lambda msg: None)
+    max_workers = max_workers or config["video_settings"].get("parallel_workers") or os.cpu_count()
+    if not plan["segments"]:
+        raise RuntimeError("No se generaron clips válidos.")
+
+    work_dir = os.path.join(config["paths"]["temp_folder"], f"segments_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}")
+    os.makedirs(work_dir, exist_ok=True)
+
+    try:
+        profiler = get_profiler()
+        jobs = build_segment_jobs(plan, config, work_dir, profile=profiler is not None)
+
+        results = []
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs))) as pool:
+            futures = [pool.submit(render_segment_job, job) for job in jobs]
+            # Progreso por segmento terminado
+            logger(segment__total=len(futures))
+            for fut in logger.iter_bar(segment=as_completed(futures)):
+                results.append(fut.result())
+
+        results.sort(key=lambda r: r["index"])
+        for r in results:
+            for msg in r["logs"]: log(msg)
+            if profiler is not None and r.get("profile"):
+                profiler.merge(r["profile"])
+
+        segments = [r for r in results if r["path"]]
+        if not segments:
+            raise RuntimeError("No se generaron clips válidos.")
+
+        join_encoded_segments(segments, plan, out_path, config, work_dir)
+        write_render_record(out_path, config, plan["engine_version"], plan["seed"], [s["audio_path"] for s in segments])
+        save_plan(plan, plan_path(out_path))
+        return out_path
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def render_video_parallel(audio_order, out_path, config, engine_version="v1_estable", log_callback=None, logger="bar", max_workers=None, seed=None):
+    """plan_video + render_plan_parallel. Devuelve la ruta del video final."""
+    plan = plan_video(audio_order, config, engine_version=engine_version, seed=seed, log_callback=log_callback)
+    return render_plan_parallel(plan, out_path, config, log_callback=log_callback, logger=logger, max_workers=max_workers)
+
+
+# ==========================================
+# RENDER SECUENCIAL (Un solo proceso)
+# ==========================================
+def render_plan_sequential(plan, out_path, config, log_callback=None, logger="bar"):
+    """
+    Ejecuta cada segmento del plan en este proceso. Con la caché de segmentos, cada uno se codifica
+    al guardarlo y el final se une sin recodificar; sin ella, se escribe en una sola pasada.
+    """
+    log = log_callback or (lambda msg: None)
+    sets = config["video_settings"]
+    # El backend 'moviepy' (respaldo heredado) no usa el pipe de ffmpeg con el que se codifican
+    # los segmentos cacheados: con él, render sin caché en una sola pasada con MoviePy
+    use_cache = sets.get("output_backend", "moviepy") == "ffmpeg_pipe"
+    segment_cache = get_segment_cache(config) if use_cache else None
+    clips = []
+    rendered_plans = []
+    pinned = []
+    for seg_plan in plan["segments"]:
+        aud = seg_plan["audio_path"]
+        try:
+            # El logger recibe el progreso de cada segmento que se codifica al guardarlo en caché
+            seg = render_segment(seg_plan, config, log_callback=log, logger=logger, use_cache=use_cache)
+            if seg:
+                # Fijado hasta unirlo: los put de los segmentos siguientes no lo desalojan
+                if segment_cache is not None and getattr(seg, "cached_path", None):
+                    segment_cache.pin(seg.cached_path)
+                    pinned.append(seg.cached_path)
+                clips.append(seg)
+                rendered_plans.append(seg_plan)
+        except Exception as e:
+            log(f"❌ Error creando segmento {os.path.basename(aud)}: {e}")
+            print(f"Error detallado: {e}")
+
+    try:
+        return write_sequential_output(clips, rendered_plans, plan, out_path, config, log, logger)
+    finally:
+        for path in pinned:
+            segment_cache.unpin(path)
+
+
+def write_sequential_output(clips, seg_plans, plan, out_path, config, log, logger):
+    """Escribe el video final de render_plan_sequential a partir de los clips de sus segmentos."""
+    if not clips:
+        raise RuntimeError("No se generaron clips válidos.")
+    sets = config["video_settings"]
+
+    # Con la caché de segmentos, cada segmento ya está codificado (acierto o recién guardado):
+    # se unen sin recodificar, como en el render paralelo, en vez de volver a generar sus frames
+    if all(getattr(c, "cached_path", None) for c in clips):
+        # Otro proceso con la misma caché pudo desalojar alguno: esos se vuelven a generar
+        # y el video se escribe en una sola pasada
+        missing = [i for i, c in enumerate(clips) if not os.path.exists(c.cached_path)]
+        if missing:
+            log(f"⚠️ {len(missing)} segmento(s) desalojados de la caché antes de unirlos: render en una sola pasada")
+            for i in missing:
+                clips[i].close()
+                clips[i] = execute_segment(seg_plans[i], config, log)
+            seg_plans = [p for p, c in zip(seg_plans, clips) if c is not None]
+            clips = [c for c in clips if c is not None]
+            if not clips:
+                raise RuntimeError("No se generaron clips válidos.")
+        else:
+            rendered_audios = [p["audio_path"] for p in seg_plans]
+            fps = sets["fps"]
+            encoded = [{"audio_path": aud, "path": c.cached_path, "duration": frame_duration(c.duration, fps)}
+                       for aud, c in zip(rendered_audios, clips)]
+            work_dir = os.path.join(config["paths"]["temp_folder"], f"join_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}")
+            os.makedirs(work_dir, exist_ok=True)
+            try:
+                join_encoded_segments(encoded, plan, out_path, config, work_dir)
+            finally:
+                for c in clips: c.close()
+                shutil.rmtree(work_dir, ignore_errors=True)
+            write_render_record(out_path, config, plan["engine_version"], plan["seed"], rendered_audios)
+            save_plan(plan, plan_path(out_path))
+            return out_path
+
+    rendered_audios = [p["audio_path"] for p in seg_plans]
+
+    # Cada segmento ya mide exactamente la resolución de salida (execute_segment)
+    final = concatenate_chain(clips)
+
+    # Audio final: voces + transiciones ('pagina.mp3' 0.2s antes de cada corte),
+    # decodificados una vez (caché de audio) y mezclados en un único buffer PCM (src/audio_mix.py)
+    path_pagina = plan.get("sfx")
+    segments = [{"audio_path": aud, "duration": c.duration} for aud, c in zip(rendered_audios, clips)]
+    mixed_audio, _ = build_final_audio(
+        segments,
+        path_pagina if path_pagina and os.path.exists(path_pagina) else None,
+        audio_cache=get_audio_cache(config),
+        sfx_offsets=plan_sfx_offsets(plan, segments)
+    )
+    # ELIMINADO FADEOUT GLOBAL DE 1s POR PETICIÓN DE USUARIO
+
+    # Resolución de salida (pares): la misma con la que se crearon los segmentos
+    safe_w, safe_h = safe_resolution(config)
+
+    if sets.get("output_backend", "moviepy") == "ffmpeg_pipe":
+        # Salida directa: recorre los segmentos y escribe frames crudos en ffmpeg (src/ffmpeg_writer.py)
+        write_timeline_ffmpeg(
+            clips,
+            out_path,
+            fps=sets["fps"],
+            resolution=(safe_w, safe_h),
+            audio=mixed_audio,
+            codec='libx264',
+            audio_codec='aac',
+            logger=logger,
+            threads=8,
+            preset='ultrafast',
+            temp_folder=config["paths"]["temp_folder"]
+        )
+    else:
+        final = final.set_audio(AudioArrayClip(mixed_audio, fps=AUDIO_FPS))
+        # MoviePy genera y codifica en el mismo bucle: una sola etapa en el perfilador
+        with profile_stage("encode_moviepy"):
+            final.write_videofile(
+                out_path,
+                fps=sets["fps"],
+                codec='libx264',
+                audio_codec='aac',
+                logger=logger,
+                threads=8,
+                preset='ultrafast',
+                remove_temp=True, # Limpieza temporales ffmpeg
+                ffmpeg_params=['-pix_fmt', 'yuv420p']
+            )
+
+    write_render_record(out_path, config, plan["engine_version"], plan["seed"], rendered_audios)
+    save_plan(plan, plan_path(out_path))
+    return out_path
+
+
+def render_plan(plan, out_path, config, log_callback=None, logger="bar"):
+    """Ejecuta el plan en paralelo (video_settings.parallel_segments) o en un solo proceso."""
+    if config["video_settings"].get("parallel_segments", False):
+        return render_plan_parallel(plan, out_path, config, log_callback=log_callback, logger=logger)
+    return render_plan_sequential(plan, out_path, config, log_callback=log_callback, logger=logger)
+
+
+# ==========================================
+# BORRADOR + FINAL (Mismo plan de render)
+# ==========================================
+# El borrador se renderiza a baja resolución y guarda su plan (<borrador>.plan.json);
+# al aprobarlo, el final ejecuta ese mismo plan a resolución de producción:
+# mismas fotos, duraciones y movimientos (las posiciones del motor son
+# relativas a la pantalla). Sin plan guardado, se repite con la misma semilla.
+# Los audios se copian junto al borrador: las carpetas de origen son temporales.
+
+DRAFTS_FOLDER = "_borradores"
+
+
+def create_draft_workspace(src_folder, output_folder):
+    """Copia los .mp3 a <salida>/_borradores/<id>/audios. Devuelve (carpeta_audios, ruta_borrador)."""
+    draft_id = f"draft_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+    workspace = os.path.join(output_folder, DRAFTS_FOLDER, draft_id)
+    audio_dir = os.path.join(workspace, "audios")
+    os.makedirs(audio_dir, exist_ok=True)
+    for aud in glob.glob(os.path.join(src_folder, "*.mp3")):
+        shutil.copy2(aud, audio_dir)
+    return audio_dir, os.path.join(workspace, f"{draft_id}.mp4")
+
+
+def draft_config(config, resolution):
+    """Copia de config con la resolución del borrador (pares)."""
+    draft = copy.deepcopy(config)
+    w, h = resolution
+    draft["video_settings"]["resolution"] = [w - w % 2, h - h % 2]
+    return draft
+
+
+def load_render_record(video_path):
+    with open(render_record_path(video_path), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def final_plan_from_draft(draft_path):
+    """(carpeta_audios, semilla, motor) con los que se renderizó el borrador."""
+    record = load_render_record(draft_path)
+    audio_dir = os.path.join(os.path.dirname(draft_path), "audios")
+    return audio_dir, record["seed"], record["engine_version"]
+
+
+def load_draft_plan(draft_path):
+    """Plan guardado del borrador, o None (borradores anteriores al plan en JSON)."""
+    path = plan_path(draft_path)
+    return load_plan(path) if os.path.exists(path) else None
+
+
+def discard_draft(draft_path):
+    """Borra el borrador y su carpeta de trabajo (audios incluidos)."""
+    shutil.rmtree(os.path.dirname(draft_path), ignore_errors=True)
@@ -0,0 +1,250 @@
+import os
+import sys
+import json
+import time
+import subprocess
+import threading
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+
+from src.ffmpeg_writer import get_ffmpeg_binary
+
+# ==========================================
+# PREFLIGHT DE LA BIBLIOTECA (Salud de los assets)
+# ==========================================
+# Un JPEG corrupto, un archivo de 0 bytes o un video que ffmpeg no decodifica
+# (como el dummy_video.mp4 de generar_datos_prueba.py) solo fallaban en mitad
+# del render: create_video_segment se traga el error y el hueco se queda sin
+# clip. El preflight abre cada imagen (cabecera + decodificación reducida) y
+# sondea cada video (metadatos + primer frame) en un pool de procesos, y deja:
+#   <cache>/asset_health.json  informe completo (por ruta, mtime y tamaño).
+#   <cache>/quarantine.json    assets rotos; get_president_assets y la silueta
+#                              del Top 1 no los eligen.
+# Solo se vuelven a comprobar los archivos que cambiaron desde el último informe,
+# y un archivo en cuarentena sale de ella en cuanto se reemplaza (otra firma).
+#   python -m src.preflight [--workers N] [--full]
+
+REPORT_VERSION = 1
+IMAGE_EXTS = (".jpg", ".jpeg", ".png")
+VIDEO_EXTS = (".mp4", ".mov")
+
+_quarantines = {}
+
+
+def report_paths(config):
+    """(informe, cuarentena) en la carpeta de caché de config."""
+    folder = config.get("cache", {}).get("folder", "./cache")
+    return os.path.join(folder, "asset_health.json"), os.path.join(folder, "quarantine.json")
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+# --- Comprobaciones (se ejecutan en los procesos del pool) ---
+def check_image(path):
+    """Decodifica la imagen (JPEG a 1/8 con draft). Lanza excepción si está rota."""
+    with Image.open(path) as img:
+        w, h = img.size
+        img.draft("RGB", (max(1, w // 8), max(1, h // 8)))
+        img.load()
+    return {"width": w, "height": h}
+
+
+def check_video(path):
+    """Metadatos con `ffmpeg -i` y decodificación del primer frame. Lanza excepción si está roto."""
+    infos = ffmpeg_parse_infos(path)
+    if not infos.get("video_found"):
+        raise IOError("sin pista de video")
+    duration = float(infos.get("duration") or 0)
+    if duration <= 0:
+        raise IOError("duración nula")
+    cmd = [get_ffmpeg_binary(), "-v", "error", "-i", path, "-an", "-frames:v", "1", "-f", "null", "-"]
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise IOError(f"ffmpeg no decodifica el primer frame: {proc.stderr.decode(errors='ignore').strip()}")
+    return {"duration": duration, "resolution": list(infos["video_size"]), "fps": float(infos["video_fps"])}
+
+
+def check_asset(item):
+    """(ruta, tipo) -> entrada del informe. Nunca lanza: el error queda en la entrada."""
+    path, kind = item
+    entry = {"kind": kind, "ok": False, "error": None}
+    try:
+        st = os.stat(path)
+        entry.update(mtime_ns=st.st_mtime_ns, size=st.st_size)
+        if st.st_size == 0:
+            raise IOError("archivo vacío (0 bytes)")
+        entry.update(check_image(path) if kind == "image" else check_video(path))
+        entry["ok"] = True
+    except Exception as e:
+        entry["error"] = f"{type(e).__name__}: {e}"
+    return path, entry
+
+
+# --- Recorrido de la biblioteca ---
+def find_assets(config):
+    """(ruta absoluta, 'image' | 'video') de BIBLIOTECA_PRESIDENTES, BIBLIOTECA_INTRO y BIBLIOTECA_RECURSOS."""
+    paths = config["paths"]
+    found = []
+    for key in ("library_base", "intro_library", "resources_library"):
+        root = paths.get(key)
+        if not root or not os.path.isdir(root):
+            continue
+        for dirpath, dirnames, filenames in os.walk(os.path.abspath(root)):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+            for name in sorted(filenames):
+                lower = name.lower()
+                if name.startswith("."):
+                    continue
+                if lower.endswith(IMAGE_EXTS):
+                    found.append((os.path.join(dirpath, name), "image"))
+                elif lower.endswith(VIDEO_EXTS):
+                    found.append((os.path.join(dirpath, name), "video"))
+    return list(dict.fromkeys(found))
+
+
+def load_report(config):
+    """Último informe de salud, o None."""
+    try:
+        with open(report_paths(config)[0], "r", encoding="utf-8") as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return report if report.get("version") == REPORT_VERSION else None
+
+
+def run_preflight(config, workers=None, full=False, log_callback=None):
+    """
+    Comprueba todos los assets (solo los cambiados, salvo `full`) en paralelo y escribe
+    el informe y la cuarentena. Devuelve el informe.
+    """
+    log = log_callback or (lambda msg: None)
+    start = time.perf_counter()
+    workers = workers or config.get("cache", {}).get("preflight_workers") or os.cpu_count() or 1
+    previous = {} if full else (load_report(config) or {}).get("files", {})
+
+    assets = find_assets(config)
+    files, todo = {}, []
+    for path, kind in assets:
+        old = previous.get(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if old and old.get("kind") == kind and (old.get("mtime_ns"), old.get("size")) == (st.st_mtime_ns, st.st_size):
+            files[path] = old
+        else:
+            todo.append((path, kind))
+
+    log(f"🩺 Preflight: {len(todo)} de {len(assets)} assets por comprobar ({workers} procesos)")
+    if len(todo) > 1 and workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+            chunksize = max(1, len(todo) // (workers * 4))
+            results = list(pool.map(check_asset, todo, chunksize=chunksize))
+    else:
+        results = [check_asset(item) for item in todo]
+
+    for path, entry in results:
+        files[path] = entry
+        if not entry["ok"]:
+            log(f"❌ {entry['kind']} roto: {path} ({entry['error']})")
+    files = dict(sorted(files.items()))
+
+    bad = {path: {k: entry.get(k) for k in ("kind", "mtime_ns", "size", "error")}
+           for path, entry in files.items() if not entry["ok"]}
+    report = {
+        "version": REPORT_VERSION,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "elapsed_seconds": round(time.perf_counter() - start, 3),
+        "workers": workers,
+        "total": len(files),
+        "checked": len(todo),
+        "bad": len(bad),
+        "files": files,
+    }
+    report_path, quarantine_path = report_paths(config)
+    _write_json(report_path, report)
+    _write_json(quarantine_path, {"version": REPORT_VERSION, "generated_at": report["generated_at"], "files": bad})
+    log(f"🩺 Preflight: {len(files) - len(bad)} OK, {len(bad)} en cuarentena ({report['elapsed_seconds']}s)")
+    return report
+
+
+# --- Cuarentena (la consulta el selector de assets) ---
+class Quarantine:
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._files = {}
+
+    def _reload(self):
+        """Relee la lista si el preflight escribió una nueva."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        with self._lock:
+            if mtime == self._mtime:
+                return self._files
+            self._mtime = mtime
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._files = json.load(f).get("files", {})
+            except (OSError, ValueError, AttributeError):
+                self._files = {}
+            return self._files
+
+    def reason(self, path):
+        """Motivo de la cuarentena del archivo, o None si está sano (o ya se reemplazó)."""
+        entry = self._reload().get(os.path.abspath(path))
+        if entry is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return entry.get("error") or "no existe"
+        if (st.st_mtime_ns, st.st_size) != (entry.get("mtime_ns"), entry.get("size")):
+            return None
+        return entry.get("error") or "roto"
+
+    def filter(self, paths):
+        """`paths` sin los archivos en cuarentena (mismo orden)."""
+        if not paths or not self._reload():
+            return paths
+        return [p for p in paths if self.reason(p) is None]
+
+
+def get_quarantine(config):
+    """Quarantine según config["cache"] (una instancia por carpeta), o None si está desactivada."""
+    if not config.get("cache", {}).get("quarantine_enabled", True):
+        return None
+    path = report_paths(config)[1]
+    if path not in _quarantines:
+        _quarantines[path] = Quarantine(path)
+    return _quarantines[path]
+
+
+def main(argv=None):
+    import argparse
+    from src.utils import load_config
+
+    parser = argparse.ArgumentParser(description="Comprueba imágenes y videos de la biblioteca y pone en cuarentena los rotos.")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos (por defecto, cache.preflight_workers o nº de CPUs)")
+    parser.add_argument("--full", action="store_true", help="Volver a comprobar todo, no solo lo que cambió")
+    args = parser.parse_args(argv)
+
+    report = run_preflight(load_config(), workers=args.workers, full=args.full, log_callback=print)
+    return 1 if report["bad"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+import os
+import sys
+import json
+import time
+import threading
+import cProfile
+import pstats
+from contextlib import contextmanager
+
+# ==========================================
+# PERFILADO POR ETAPAS DEL RENDER
+# ==========================================
+# Con video_settings.profile, cada render guarda '<video>.profile.json' con el
+# tiempo y la memoria de cada etapa: búsqueda de recursos, carga/escalado de
+# imágenes, construcción de clips, generación de frames (por clip), mezcla de
+# audio y escritura en el encoder. Los tiempos son exclusivos (una etapa no
+# incluye los de las etapas anidadas), así que su suma + 'unaccounted' = total.
+# Con video_settings.profile_cprofile se añade una captura cProfile ('<video>.prof').
+# Sin perfilador activo, profile_stage() no mide nada.
+
+_active = None
+
+CPROFILE_TOP = 25
+
+
+def current_rss_mb():
+    """Memoria residente actual del proceso (MB), o None si no se puede medir."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil  # Windows / macOS (opcional)
+        return round(psutil.Process().memory_info().rss / (1024 * 1024), 1)
+    except Exception:
+        return None
+
+
+def peak_rss_mb(include_children=True):
+    """Pico de memoria residente (MB) del proceso (y de sus hijos ya terminados), o None."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if include_children:
+            peak = max(peak, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+        # Linux: KB; macOS: bytes
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+    except Exception:
+        return None
+
+
+class RenderProfiler:
+
+    def __init__(self, cprofile=False):
+        self.stages = {}
+        self.clips = {}
+        self.workers = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._cprofile = cProfile.Profile() if cprofile else None
+        self._start = None
+        self.total_seconds = 0.0
+        self.rss_start_mb = None
+
+    # --- Ciclo de vida ---
+    def start(self):
+        global _active
+        self._start = time.perf_counter()
+        self.rss_start_mb = current_rss_mb()
+        if self._cprofile is not None:
+            self._cprofile.enable()
+        _active = self
+        return self
+
+    def stop(self):
+        global _active
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self._start is not None:
+            self.total_seconds = time.perf_counter() - self._start
+        if _active is self:
+            _active = None
+        return self
+
+    # --- Registro ---
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def add(self, name, seconds, calls=1, rss_mb=None):
+        """Suma `seconds` a la etapa `name` y los descuenta de la etapa que la contiene."""
+        stack = self._stack()
+        if stack:
+            stack[-1][1] += seconds
+        with self._lock:
+            entry = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "rss_mb": None})
+            entry["calls"] += calls
+            entry["seconds"] += seconds
+            if rss_mb is not None:
+                entry["rss_mb"] = max(entry["rss_mb"] or 0.0, rss_mb)
+
+    @contextmanager
+    def stage(self, name, calls=1):
+        stack = self._stack()
+        frame = [name, 0.0]  # [etapa, tiempo de etapas anidadas]
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            self.add(name, max(0.0, elapsed - frame[1]), calls=calls, rss_mb=current_rss_mb())
+            # add() ya descontó la parte exclusiva del padre; falta la de los hijos
+            if stack:
+                stack[-1][1] += frame[1]
+
+    def add_clip(self, label, frames, seconds):
+        with self._lock:
+            entry = self.clips.setdefault(label, {"frames": 0, "seconds": 0.0})
+            entry["frames"] += frames
+            entry["seconds"] += seconds
+
+    def merge(self, data):
+        """Une el informe de un worker (to_dict) en este perfilador (render paralelo)."""
+        with self._lock:
+            for name, s in data.get("stages", {}).items():
+                entry = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "rss_mb": None})
+                entry["calls"] += s["calls"]
+                entry["seconds"] += s["seconds"]
+                if s.get("rss_mb") is not None:
+                    entry["rss_mb"] = max(entry["rss_mb"] or 0.0, s["rss_mb"])
+            for c in data.get("clips", []):
+                entry = self.clips.setdefault(c["label"], {"frames": 0, "seconds": 0.0})
+                entry["frames"] += c["frames"]
+                entry["seconds"] += c["seconds"]
+            self.workers += 1
+
+    # --- Informe ---
+    def to_dict(self):
+        total = self.total_seconds or (time.perf_counter() - self._start if self._start else 0.0)
+        with self._lock:
+            stages = {
+                name: {
+                    "calls": s["calls"],
+                    "seconds": round(s["seconds"], 4),
+                    "share": round(s["seconds"] / total, 4) if total else None,
+                    "rss_mb": s["rss_mb"],
+                }
+                for name, s in sorted(self.stages.items(), key=lambda kv: -kv[1]["seconds"])
+            }
+            clips = [
+                {"label": label, "frames": c["frames"], "seconds": round(c["seconds"], 4),
+                 "ms_per_frame": round(1000 * c["seconds"] / c["frames"], 3) if c["frames"] else None}
+                for label, c in sorted(self.clips.items(), key=lambda kv: -kv[1]["seconds"])
+            ]
+            accounted = sum(s["seconds"] for s in self.stages.values())
+        report = {
+            "total_seconds": round(total, 4),
+            "rss_start_mb": self.rss_start_mb,
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": stages,
+            "clips": clips,
+        }
+        if not self.workers:
+            # Con workers, las etapas suman tiempo de varios procesos a la vez
+            report["unaccounted_seconds"] = round(max(0.0, total - accounted), 4)
+        else:
+            report["workers"] = self.workers
+        return report
+
+    def cprofile_top(self, limit=CPROFILE_TOP):
+        """Funciones con más tiempo acumulado según cProfile."""
+        stats = pstats.Stats(self._cprofile)
+        rows = []
+        for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+            rows.append({"function": f"{os.path.basename(filename)}:{line}({func})", "calls": nc,
+                         "self_seconds": round(tt, 4), "cumulative_seconds": round(ct, 4)})
+        rows.sort(key=lambda r: -r["cumulative_seconds"])
+        return rows[:limit]
+
+    def save(self, out_path):
+        """Escribe '<video>.profile.json' (y '<video>.prof' con cProfile). Devuelve la ruta del JSON."""
+        report = {"video": os.path.basename(out_path)}
+        report.update(self.to_dict())
+        if self._cprofile is not None:
+            prof_path = os.path.splitext(out_path)[0] + ".prof"
+            self._cprofile.dump_stats(prof_path)
+            report["cprofile"] = {"path": os.path.basename(prof_path), "top": self.cprofile_top()}
+        path = profile_path(out_path)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+        return path
+
+
+def profile_path(out_path):
+    return os.path.splitext(out_path)[0] + ".profile.json"
+
+
+def get_profiler():
+    return _active
+
+
+@contextmanager
+def profile_stage(name):
+    """Mide el bloque como etapa `name` del perfilador activo (no-op si no hay ninguno)."""
+    profiler = _active
+    if profiler is None:
+        yield
+        return
+    with profiler.stage(name):
+        yield
+
+
+@contextmanager
+def render_profile(config, out_path):
+    """
+    Perfilador activo durante el bloque si video_settings.profile; si el bloque termina
+    sin errores, guarda el informe junto a `out_path`. Devuelve el perfilador (o None).
+    """
+    sets = config["video_settings"]
+    if not sets.get("profile", False):
+        yield None
+        return
+    profiler = RenderProfiler(cprofile=sets.get("profile_cprofile", False)).start()
+    ok = False
+    try:
+        yield profiler
+        ok = True
+    finally:
+        profiler.stop()
+        if ok:
+            profiler.save(out_path)
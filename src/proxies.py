@@ -0,0 +1,155 @@
+import os
+import glob
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.cache import DiskCache, cache_key, file_signature
+from src.ffmpeg_writer import get_ffmpeg_binary
+from src.utils import safe_resolution
+
+# ==========================================
+# PROXIES NORMALIZADOS (Intro y videos de presidentes)
+# ==========================================
+# Los videos de BIBLIOTECA_INTRO y los *_video de cada presidente suelen venir
+# en 4K horizontal y se escalaban + recortaban frame a frame en cada render.
+# Aquí se transcodifican una vez, sin audio, a cada resolución de salida
+# (cubrir + recorte centrado, igual que fit_to_resolution) y al fps del
+# proyecto. El render usa el proxy automáticamente si existe.
+
+VIDEO_EXTS = ('.mp4', '.mov')
+
+# Presets del selector de calidad de main.py
+DEFAULT_PROXY_RESOLUTIONS = [[1080, 1920], [720, 1280], [480, 854], [240, 426]]
+
+_caches = {}
+_background_started = False
+
+
+def get_proxy_cache(config):
+    """DiskCache de proxies según config["cache"], o None si están desactivados."""
+    cache_cfg = config.get("cache", {})
+    if not cache_cfg.get("proxies_enabled", True):
+        return None
+    folder = os.path.join(cache_cfg.get("folder", "./cache"), "proxies")
+    if folder not in _caches:
+        max_bytes = int(cache_cfg.get("proxies_max_mb", 8192)) * 1024 * 1024
+        _caches[folder] = DiskCache(folder, max_bytes)
+    return _caches[folder]
+
+
+def proxy_key(source_path, resolution, fps, signature=None):
+    """`signature`: firma (ruta, mtime, tamaño) ya conocida, p. ej. de una versión anterior del archivo."""
+    return cache_key("proxy", list(signature or file_signature(source_path)), list(resolution), fps)
+
+
+def proxy_resolutions(config, resolutions=None):
+    """Resoluciones de proxy configuradas, con el mismo redondeo a pares que el render."""
+    resolutions = resolutions or config.get("cache", {}).get("proxy_resolutions", DEFAULT_PROXY_RESOLUTIONS)
+    return [(w - w % 2, h - h % 2) for w, h in resolutions]
+
+
+def invalidate_proxies(cache, signature, resolutions, fps):
+    """Borra los proxies de una versión (firma) del video original."""
+    for res in resolutions:
+        cache.invalidate(proxy_key(None, res, fps, signature=signature), "mp4")
+
+
+def resolve_video_source(source_path, config):
+    """Ruta del proxy para la resolución/fps actuales si ya existe; si no, el original."""
+    cache = get_proxy_cache(config)
+    if cache is None:
+        return source_path
+    try:
+        key = proxy_key(source_path, safe_resolution(config), config["video_settings"]["fps"])
+    except OSError:
+        return source_path
+    return cache.get(key, "mp4") or source_path
+
+
+def transcode_proxy(source_path, out_path, resolution, fps):
+    """ffmpeg: sin audio, cubrir WxH + recorte centrado, fps fijo, yuv420p."""
+    W, H = resolution
+    cmd = [
+        get_ffmpeg_binary(), "-y", "-loglevel", "error",
+        "-i", source_path,
+        "-an",
+        "-vf", f"scale={W}:{H}:force_original_aspect_ratio=increase,crop={W}:{H}",
+        "-r", str(fps),
+        "-vcodec", "libx264", "-preset", "veryfast", "-crf", "18", "-pix_fmt", "yuv420p",
+        out_path,
+    ]
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise IOError(f"ffmpeg no pudo crear el proxy de {source_path}: {proc.stderr.decode(errors='ignore')}")
+    return out_path
+
+
+def ensure_proxy(source_path, resolution, fps, cache):
+    """Crea el proxy si falta. Devuelve (ruta, creado)."""
+    key = proxy_key(source_path, resolution, fps)
+    existing = cache.get(key, "mp4")
+    if existing:
+        return existing, False
+    return cache.put(key, "mp4", lambda tmp_path: transcode_proxy(source_path, tmp_path, resolution, fps)), True
+
+
+def find_library_videos(config):
+    """Videos de BIBLIOTECA_INTRO (recursivo) y de cada carpeta de BIBLIOTECA_PRESIDENTES."""
+    paths = config["paths"]
+    found = []
+    for root in (paths["intro_library"], paths["library_base"]):
+        if not os.path.exists(root):
+            continue
+        for f in glob.glob(os.path.join(root, "**", "*"), recursive=True):
+            if f.lower().endswith(VIDEO_EXTS) and os.path.isfile(f):
+                found.append(f)
+    return sorted(found)
+
+
+def build_proxy_library(config, resolutions=None, fps=None, max_workers=2, log_callback=None):
+    """
+    Genera los proxies que falten para cada video de la biblioteca y cada resolución.
+    Devuelve el nº de proxies creados.
+    """
+    cache = get_proxy_cache(config)
+    if cache is None:
+        return 0
+    log = log_callback or (lambda msg: None)
+    resolutions = proxy_resolutions(config, resolutions)
+    fps = fps or config["video_settings"]["fps"]
+
+    tasks = [(src, res) for src in find_library_videos(config) for res in resolutions]
+
+    def run(task):
+        src, res = task
+        try:
+            _, created = ensure_proxy(src, res, fps, cache)
+            return created
+        except Exception as e:
+            log(f"⚠️ Proxy fallido ({os.path.basename(src)} @ {res[0]}x{res[1]}): {e}")
+            return False
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        created = sum(pool.map(run, tasks))
+    if created:
+        log(f"🎞️ Proxies creados: {created}")
+    return created
+
+
+def start_background_proxy_build(config, log_callback=None):
+    """Lanza build_proxy_library en un hilo (una vez por proceso)."""
+    global _background_started
+    if _background_started or not config.get("cache", {}).get("proxies_background", True):
+        return None
+    _background_started = True
+    thread = threading.Thread(target=build_proxy_library, args=(config,),
+                              kwargs={"log_callback": log_callback}, daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == "__main__":
+    from src.utils import load_config
+
+    build_proxy_library(load_config(), log_callback=print)
@@ -0,0 +1,421 @@
+import math
+import numpy as np
+from moviepy.editor import VideoClip, CompositeAudioClip, concatenate_videoclips
+from PIL import Image
+
+# ==========================================
+# RENDERIZADOR NUMPY (Sin CompositeVideoClip)
+# ==========================================
+# Los motores de src/logic.py construyen un lienzo (grid espejo) y lo mueven
+# con set_position + CompositeVideoClip, lo que obliga a un blit completo por
+# frame. Aquí cada frame es directamente una ventana WxH del lienzo.
+
+
+def canvas_window(canvas, x, y, W, H, out=None):
+    """
+    Devuelve lo que se ve en pantalla (WxH) cuando el lienzo está colocado en (x, y).
+    Misma semántica que el blit de MoviePy: (x, y) es la esquina superior izquierda
+    del lienzo respecto a la pantalla. Si la ventana cae entera dentro del lienzo
+    se devuelve una vista (zero-copy); si no, se rellena con negro.
+    Con `out` (array HxW preasignado) el frame se escribe ahí y se devuelve `out`.
+    """
+    canvas_h, canvas_w = canvas.shape[:2]
+    src_x, src_y = -x, -y
+
+    if src_x >= 0 and src_y >= 0 and src_x + W <= canvas_w and src_y + H <= canvas_h:
+        view = canvas[src_y:src_y + H, src_x:src_x + W]
+        if out is None:
+            return view
+        np.copyto(out, view)
+        return out
+
+    # Cobertura parcial: fondo negro + la parte visible del lienzo
+    frame = blank_frame((H, W) + canvas.shape[2:], canvas.dtype, out)
+    x1, y1 = max(0, src_x), max(0, src_y)
+    x2, y2 = min(canvas_w, src_x + W), min(canvas_h, src_y + H)
+    if x1 < x2 and y1 < y2:
+        frame[y1 - src_y:y2 - src_y, x1 - src_x:x2 - src_x] = canvas[y1:y2, x1:x2]
+    return frame
+
+
+# ==========================================
+# LIENZO ESPEJO VIRTUAL (Sin materializar el grid 3x3)
+# ==========================================
+# El grid del motor V2 son copias del mismo tile: normal en el centro (col/fila 1),
+# espejado en horizontal en las columnas 0 y 2 y volteado en vertical en las
+# filas 0 y 2. Basta con guardar el tile base y un mapa de índices por eje.
+
+
+def _axis_map(tile_len, indices):
+    """Índice del tile base para cada píxel del eje del grid (1 = normal, 0/2 = espejo)."""
+    idx = np.arange(tile_len)
+    return np.concatenate([idx if i == 1 else idx[::-1] for i in indices])
+
+
+def _axis_runs(m):
+    """
+    Divide un tramo del mapa en recorridos continuos [(dst_ini, dst_fin, slice_del_tile)].
+    Entre tiles vecinos siempre hay un espejo, así que cada costura repite índice (diff == 0).
+    """
+    cuts = [0] + (np.flatnonzero(np.diff(m) == 0) + 1).tolist() + [len(m)]
+    runs = []
+    for d0, d1 in zip(cuts[:-1], cuts[1:]):
+        a, b = int(m[d0]), int(m[d1 - 1])
+        if a <= b and (d1 - d0 == 1 or m[d0 + 1] > a):
+            src = slice(a, b + 1)
+        else:
+            src = slice(a, b - 1 if b > 0 else None, -1)
+        runs.append((d0, d1, src))
+    return runs
+
+
+class MirrorCanvas:
+    """
+    Grid espejo virtual del motor V2 a partir de un único tile (array HxWx3).
+    cols / rows: columnas y filas activas del grid abstracto 3x3 (ej: range(0, 3)).
+    """
+
+    def __init__(self, tile, cols, rows):
+        self.tile = tile
+        self.tile.flags.writeable = False
+        tile_h, tile_w = tile.shape[:2]
+        self.col_map = _axis_map(tile_w, cols)
+        self.row_map = _axis_map(tile_h, rows)
+        self.width = len(self.col_map)
+        self.height = len(self.row_map)
+        self.size = (self.width, self.height)
+
+    def region(self, x1, y1, x2, y2, out=None):
+        """Píxeles del lienzo en [x1, x2) x [y1, y2) (dentro de los límites). Con `out`, se copian ahí."""
+        row_runs = _axis_runs(self.row_map[y1:y2])
+        col_runs = _axis_runs(self.col_map[x1:x2])
+        if len(row_runs) == 1 and len(col_runs) == 1:
+            # Dentro de un solo tile: vista del tile (zero-copy)
+            view = self.tile[row_runs[0][2], col_runs[0][2]]
+            if out is None:
+                return view
+            np.copyto(out, view)
+            return out
+
+        # Cruza costuras: copia por bloques (máx. 3x3 slices, sin gather por píxel)
+        if out is None:
+            out = np.empty((y2 - y1, x2 - x1) + self.tile.shape[2:], dtype=self.tile.dtype)
+        for r0, r1, src_rows in row_runs:
+            for c0, c1, src_cols in col_runs:
+                out[r0:r1, c0:c1] = self.tile[src_rows, src_cols]
+        return out
+
+    def window(self, x, y, W, H, out=None):
+        """Igual que canvas_window() pero sobre el lienzo virtual."""
+        src_x, src_y = -x, -y
+        if src_x >= 0 and src_y >= 0 and src_x + W <= self.width and src_y + H <= self.height:
+            return self.region(src_x, src_y, src_x + W, src_y + H, out)
+
+        frame = blank_frame((H, W) + self.tile.shape[2:], self.tile.dtype, out)
+        x1, y1 = max(0, src_x), max(0, src_y)
+        x2, y2 = min(self.width, src_x + W), min(self.height, src_y + H)
+        if x1 < x2 and y1 < y2:
+            self.region(x1, y1, x2, y2, frame[y1 - src_y:y2 - src_y, x1 - src_x:x2 - src_x])
+        return frame
+
+
+def create_slide_clip(canvas, pos_func, resolution, duration):
+    """
+    Clip de desplazamiento (sin zoom) equivalente a
+    CompositeVideoClip([ImageClip(canvas).set_position(pos_func)], size=resolution).
+    `canvas` es un array (lienzo real) o un MirrorCanvas (lienzo virtual).
+    """
+    W, H = resolution
+    if isinstance(canvas, MirrorCanvas):
+        window = canvas.window
+    else:
+        # Los frames pueden ser vistas del lienzo: lo protegemos contra escrituras.
+        canvas.flags.writeable = False
+        window = lambda x, y, w, h, out=None: canvas_window(canvas, x, y, w, h, out)
+    tile = canvas.tile if isinstance(canvas, MirrorCanvas) else canvas
+    rgb = tile.ndim == 3 and tile.shape[2] == 3 and tile.dtype == np.uint8
+
+    def make_frame(t):
+        x, y = pos_func(t)
+        return window(int(x), int(y), W, H)
+
+    def make_frame_into(t, out):
+        x, y = pos_func(t)
+        window(int(x), int(y), W, H, out)
+
+    return BufferedClip(make_frame, make_frame_into if rgb else None, resolution, duration)
+
+
+# ==========================================
+# ZOOM: RECORTE + ESCALADO (Crop-then-scale)
+# ==========================================
+# En vez de redimensionar el lienzo completo cada frame (clip.resize(zoom_func))
+# y luego recortar a WxH, se calcula qué ventana del lienzo original es visible
+# a escala `s` y se remuestrea solo esa ventana al tamaño de salida.
+
+# Margen (px) alrededor de la ventana para el soporte del filtro LANCZOS
+FILTER_MARGIN = 4
+
+
+def _resample_box(image, size, box, resample, scratch=None):
+    if not isinstance(image, MirrorCanvas):
+        return np.asarray(image.resize(size, resample, box=box))
+
+    # Lienzo virtual: solo se materializa la ventana visible (+ margen)
+    left, top, right, bottom = box
+    x1 = max(0, int(math.floor(left)) - FILTER_MARGIN)
+    y1 = max(0, int(math.floor(top)) - FILTER_MARGIN)
+    x2 = min(image.width, int(math.ceil(right)) + FILTER_MARGIN)
+    y2 = min(image.height, int(math.ceil(bottom)) + FILTER_MARGIN)
+    if scratch is not None:
+        patch = image.region(x1, y1, x2, y2, scratch.view((y2 - y1, x2 - x1) + image.tile.shape[2:]))
+    else:
+        patch = np.ascontiguousarray(image.region(x1, y1, x2, y2))
+    patch = Image.fromarray(patch)
+    return np.asarray(patch.resize(size, resample, box=(left - x1, top - y1, right - x1, bottom - y1)))
+
+
+
+def zoom_window(image, x, y, s, W, H, resample=Image.Resampling.LANCZOS, out=None, scratch=None):
+    """
+    Frame WxH equivalente a redimensionar `image` (PIL o MirrorCanvas) a escala `s` y colocarla en (x, y).
+    Igual que MoviePy, el tamaño escalado es (int(w*s), int(h*s)).
+    `out`: frame preasignado donde escribir; `scratch`: ScratchBuffer para el parche del lienzo virtual.
+    """
+    img_w, img_h = image.size
+    scaled_w, scaled_h = int(img_w * s), int(img_h * s)
+    fx, fy = img_w / scaled_w, img_h / scaled_h
+
+    # Zona de pantalla cubierta por la imagen escalada
+    dst_x1, dst_y1 = max(0, x), max(0, y)
+    dst_x2, dst_y2 = min(W, x + scaled_w), min(H, y + scaled_h)
+
+    if dst_x1 >= dst_x2 or dst_y1 >= dst_y2:
+        return blank_frame((H, W, 3), np.uint8, out)
+
+    # Ventana equivalente en coordenadas del original
+    box = (
+        (dst_x1 - x) * fx,
+        (dst_y1 - y) * fy,
+        min(img_w, (dst_x2 - x) * fx),
+        min(img_h, (dst_y2 - y) * fy),
+    )
+    window = _resample_box(image, (dst_x2 - dst_x1, dst_y2 - dst_y1), box, resample, scratch)
+
+    if (dst_x1, dst_y1, dst_x2, dst_y2) == (0, 0, W, H):
+        if out is None:
+            return window
+        np.copyto(out, window)
+        return out
+
+    frame = blank_frame((H, W) + window.shape[2:], np.uint8, out)
+    np.copyto(frame[dst_y1:dst_y2, dst_x1:dst_x2], window)
+    return frame
+
+
+def centered_position(zoom_func, size, resolution):
+    """Posición 'center' del blit de MoviePy para un clip que se escala con zoom_func."""
+    W, H = resolution
+    w, h = size
+
+    def pos_func(t):
+        s = zoom_func(t)
+        return int((W - int(w * s)) / 2), int((H - int(h * s)) / 2)
+
+    return pos_func
+
+
+def create_zoom_clip(image, pos_func, zoom_func, resolution, duration):
+    """
+    Clip con zoom equivalente a
+    CompositeVideoClip([ImageClip(image).resize(zoom_func).set_position(pos_func)], size=resolution).
+    `image` es una imagen PIL o un MirrorCanvas (lienzo virtual).
+    """
+    W, H = resolution
+    scratch = ScratchBuffer()
+
+    def make_frame(t):
+        x, y = pos_func(t)
+        return zoom_window(image, int(x), int(y), zoom_func(t), W, H)
+
+    def make_frame_into(t, out):
+        x, y = pos_func(t)
+        zoom_window(image, int(x), int(y), zoom_func(t), W, H, out=out, scratch=scratch)
+
+    rgb = image.tile.ndim == 3 and image.tile.shape[2] == 3 if isinstance(image, MirrorCanvas) else image.mode == "RGB"
+    return BufferedClip(make_frame, make_frame_into if rgb else None, resolution, duration)
+
+
+# ==========================================
+# FRAMES EN BUFFERS PREASIGNADOS (Sin reservas por frame)
+# ==========================================
+# get_frame() devuelve un array nuevo (o una vista) en cada frame: a 1080x1920x3
+# y 30 fps son decenas de MB por segundo de vida muy corta. El writer de
+# src/ffmpeg_writer.py pide en su lugar frame_into(t, out): el clip escribe el
+# frame directamente en el buffer del writer (copyto / slicing) y los parches
+# intermedios del zoom reutilizan un ScratchBuffer por clip. get_frame() no
+# cambia, así que quien guarde frames nunca ve un buffer reutilizado.
+
+def blank_frame(shape, dtype, out=None):
+    """Frame negro: `out` rellenado con ceros si se indica, o un array nuevo."""
+    if out is None:
+        return np.zeros(shape, dtype=dtype)
+    out.fill(0)
+    return out
+
+
+class ScratchBuffer:
+    """Memoria reutilizable: vistas contiguas de cualquier forma sobre un único buffer que solo crece."""
+
+    def __init__(self, dtype=np.uint8):
+        self.data = np.empty(0, dtype=dtype)
+
+    def view(self, shape):
+        n = math.prod(shape)
+        if n > self.data.size:
+            self.data = np.empty(n, dtype=self.data.dtype)
+        return self.data[:n].reshape(shape)
+
+
+class BufferedClip(VideoClip):
+    """
+    VideoClip WxH que además sabe escribir cada frame en un buffer preasignado.
+    `make_frame_into(t, out)`: misma imagen que make_frame(t), escrita en `out` (HxWx3 uint8).
+    """
+
+    def __init__(self, make_frame, make_frame_into, size, duration):
+        # El tamaño ya se conoce: sin el frame de prueba que haría VideoClip
+        super().__init__()
+        self.make_frame = self.own_make_frame = make_frame
+        self.make_frame_into = make_frame_into
+        self.size = tuple(size)
+        self.duration = self.end = duration
+
+    def frame_into(self, t, out):
+        """Escribe el frame `t` en `out`. False si no se puede (el llamador usa get_frame)."""
+        # Un clip transformado (fl, subclip...) ya no usa nuestro make_frame
+        if self.make_frame_into is None or self.make_frame is not self.own_make_frame:
+            return False
+        if out.dtype != np.uint8 or out.shape != (self.size[1], self.size[0], 3):
+            return False
+        self.make_frame_into(t, out)
+        return True
+
+
+# ==========================================
+# RESOLUCIÓN NATIVA (Todos los clips exactamente WxH)
+# ==========================================
+# Si cada clip del timeline mide exactamente la resolución de salida, la
+# concatenación puede usar method="chain" (sin lienzo compuesto) y no hace
+# falta ningún resize global del video final.
+
+def concatenate_chain(clips):
+    """
+    concatenate_videoclips(method="chain") conservando `.clips` (MoviePy solo lo guarda
+    si hay máscaras): flatten_timeline (src/ffmpeg_writer.py) recorre así cada clip hoja.
+    Sin máscaras, el resultado se arma aquí: MoviePy pide el frame 0 para medir el
+    tamaño, lo que materializaría el primer LazyClip al construir el timeline.
+    """
+    clips = list(clips)
+    if any(c.mask is not None for c in clips):
+        result = concatenate_videoclips(clips, method="chain")
+        result.clips = clips
+        return result
+
+    tt = np.cumsum([0] + [c.duration for c in clips])
+
+    def make_frame(t):
+        i = min(int(np.searchsorted(tt, t, side="right")) - 1, len(clips) - 1)
+        return clips[i].get_frame(t - tt[i])
+
+    result = VideoClip()
+    result.make_frame = make_frame
+    result.size = (max(c.size[0] for c in clips), max(c.size[1] for c in clips))
+    result.clips = clips
+    result.tt = tt
+    result.start_times = tt[:-1]
+    result.start, result.duration, result.end = 0, tt[-1], tt[-1]
+    audio_t = [(c.audio, t) for c, t in zip(clips, tt) if c.audio is not None]
+    if audio_t:
+        result.audio = CompositeAudioClip([a.set_start(t) for a, t in audio_t])
+    fpss = [c.fps for c in clips if getattr(c, "fps", None) is not None]
+    result.fps = max(fpss) if fpss else None
+    return result
+
+
+# ==========================================
+# CLIPS PEREZOSOS (Memoria acotada al clip en curso)
+# ==========================================
+# Un LazyClip solo conoce su duración y su tamaño: la imagen se decodifica y el
+# lienzo se construye (factory) al pedir su primer frame, y se liberan tras el
+# último. Así el pico de memoria de un render depende del clip que se está
+# generando, no de todos los clips del video.
+
+class LazyClip(VideoClip):
+
+    def __init__(self, factory, duration, size, fps=None):
+        """
+        `factory()`: construye el clip real (WxH = `size`, al menos `duration` s).
+        `fps`: si se indica, el clip se libera solo al servir su último frame
+        (para writers que no llaman a release(), como write_videofile).
+        """
+        # Sin make_frame en el constructor: VideoClip lo llamaría para medir el tamaño
+        super().__init__()
+        self.factory = factory
+        self.inner = None
+        self.make_frame = self.own_make_frame = self._make_frame
+        self.size = tuple(size)
+        self.fps = fps
+        self.duration = self.end = duration
+
+    @property
+    def materialized(self):
+        return self.inner is not None
+
+    def materialize(self):
+        if self.inner is None:
+            self.inner = self.factory()
+        return self.inner
+
+    def release(self):
+        """Libera el clip real (lienzo, lector de ffmpeg). Se reconstruye si se vuelve a pedir un frame."""
+        inner, self.inner = self.inner, None
+        if inner is not None:
+            inner.close()
+
+    def _release_after(self, t):
+        if self.fps and t + 1.0 / self.fps >= self.duration - 1e-9:
+            self.release()
+
+    def _make_frame(self, t):
+        frame = self.materialize().get_frame(t)
+        self._release_after(t)
+        return frame
+
+    def frame_into(self, t, out):
+        """frame_into() del clip real (BufferedClip). False si no lo soporta."""
+        if self.make_frame is not self.own_make_frame:
+            return False
+        into = getattr(self.materialize(), "frame_into", None)
+        if into is None or not into(t, out):
+            return False
+        self._release_after(t)
+        return True
+
+
+def fit_to_resolution(clip, resolution):
+    """
+    Escala el clip para cubrir la pantalla y recorta el centro a exactamente WxH.
+    Si ya mide WxH se devuelve sin tocar.
+    """
+    W, H = resolution
+    w, h = clip.size
+    if (w, h) == (W, H):
+        return clip
+    scale = max(W / w, H / h)
+    # max(): el redondeo nunca deja un lado por debajo de WxH
+    new_w = max(W, int(round(w * scale)))
+    new_h = max(H, int(round(h * scale)))
+    if (new_w, new_h) != (w, h):
+        clip = clip.resize(newsize=(new_w, new_h))
+    return clip.crop(x1=(new_w - W) // 2, y1=(new_h - H) // 2, width=W, height=H)
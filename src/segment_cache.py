@@ -0,0 +1,87 @@
+import os
+
+from moviepy.editor import VideoFileClip
+
+from src.cache import DiskCache, cache_key, file_signature, file_digest
+from src.ffmpeg_writer import write_timeline_ffmpeg
+from src.utils import safe_resolution
+
+# ==========================================
+# CACHÉ DE SEGMENTOS RENDERIZADOS
+# ==========================================
+# Un segmento (intro o top N) depende solo de su audio, de los recursos que
+# puede elegir y de los ajustes del motor. Al regenerar un video cambiando un
+# único audio, el resto de segmentos se reutilizan ya codificados (solo video,
+# el audio se vuelve a montar siempre desde el .mp3).
+# La clave es el contenido: hash de los bytes del audio + (ruta, mtime, tamaño)
+# de cada recurso + motor, resolución, fps y semilla.
+
+# Subir si cambia el render de los motores (invalida todas las entradas)
+SEGMENT_FORMAT_VERSION = 2
+
+# Ajustes de codificación de los segmentos: iguales en todos para poder
+# concatenarlos sin recodificar (-c:v copy)
+SEGMENT_CODEC = "libx264"
+SEGMENT_PRESET = "ultrafast"
+
+_caches = {}
+
+
+def get_segment_cache(config):
+    """DiskCache de segmentos según config["cache"] (una instancia por carpeta), o None si está desactivada."""
+    cache_cfg = config.get("cache", {})
+    if not cache_cfg.get("segments_enabled", True):
+        return None
+    folder = os.path.join(cache_cfg.get("folder", "./cache"), "segments")
+    if folder not in _caches:
+        max_bytes = int(cache_cfg.get("segments_max_mb", 4096)) * 1024 * 1024
+        _caches[folder] = DiskCache(folder, max_bytes)
+    return _caches[folder]
+
+
+def segment_cache_key(audio_path, asset_files, config, engine_version, puesto, president_name,
+                      revealed_presidents=None, seed=None, audio_digest=None, plan=None):
+    """
+    Clave de contenido de un segmento. `asset_files`: todos los archivos que el segmento puede usar.
+    `audio_digest`: hash del audio ya calculado (índice de src/audio_cache.py).
+    `plan`: plan del segmento (src/logic.py); con él, la clave es la de sus clips exactos.
+    """
+    sets = config["video_settings"]
+    assets = sorted(file_signature(p) for p in set(asset_files) if p and os.path.exists(p))
+    return cache_key(
+        "segment", SEGMENT_FORMAT_VERSION,
+        audio_digest or file_digest(audio_path),
+        assets,
+        engine_version,
+        list(sets["resolution"]), sets["fps"],
+        sets.get("renderer", "numpy"), sets.get("motion_tables", True),
+        puesto, president_name,
+        # Solo el Top 1 depende de los personajes anteriores (silueta comodín)
+        sorted(revealed_presidents or []) if puesto == 1 else None,
+        seed,
+        [plan["kind"], plan["clips"]] if plan else None,
+    )
+
+
+def write_segment_video(clip, out_path, config, logger=None):
+    """Escribe el segmento (solo video) con los ajustes comunes de segmento. `logger`: progreso (proglog)."""
+    return write_timeline_ffmpeg(
+        [clip], out_path, fps=config["video_settings"]["fps"], resolution=safe_resolution(config), audio=None,
+        codec=SEGMENT_CODEC, preset=SEGMENT_PRESET, threads=8, logger=logger
+    )
+
+
+def store_segment(cache, key, clip, config, logger=None):
+    """Codifica el segmento dentro de la caché. Devuelve la ruta de la entrada."""
+    return cache.put(key, "mp4", lambda tmp_path: write_segment_video(clip, tmp_path, config, logger=logger))
+
+
+def load_cached_segment(path, audio_clip, duration=None):
+    """
+    Clip del segmento cacheado con su audio. `.cached_path` apunta al .mp4 ya codificado.
+    `duration`: duración del segmento en el plan (por defecto, la del audio).
+    """
+    duration = audio_clip.duration if duration is None else duration
+    clip = VideoFileClip(path, audio=False).set_duration(duration).set_audio(audio_clip)
+    clip.cached_path = path
+    return clip
@@ -5,7 +5,10 @@ from dotenv import load_dotenv, find_dotenv
 
 import re
 import random
-import difflib
+
+from src.asset_index import get_asset_index
+from src.name_matcher import get_folder_matcher
+from src.preflight import get_quarantine
 
 # Cargar el archivo .env al inicio, buscando explícitamente
 load_dotenv(find_dotenv())
@@ -48,59 +51,41 @@ def load_config(config_path="config/config.json"):
     
     return config
 
-def find_best_match_folder(character_name_raw, assets_base_path):
+def safe_resolution(config):
+    """Resolución de salida con dimensiones pares (requisito de yuv420p)."""
+    safe_w, safe_h = tuple(config["video_settings"]["resolution"])
+    if safe_w % 2 != 0: safe_w -= 1
+    if safe_h % 2 != 0: safe_h -= 1
+    return safe_w, safe_h
+
+def frame_duration(duration, fps):
+    """Duración recortada a frames enteros (n / fps), estable frente al redondeo de coma flotante."""
+    return int(duration * fps + 1e-6) / fps
+
+def find_best_match_folder(character_name_raw, assets_base_path, folders=None):
     """
     Busca la carpeta más parecida ignorando guiones, mayúsculas e iniciales intermedias.
     Ej: 'Harry_S_Truman' -> Match con carpeta 'Harry Truman'
+    `folders`: nombres de carpeta ya listados (índice de src/asset_index.py); None = listar el disco.
     """
-    if not os.path.exists(assets_base_path):
+    if folders is None and not os.path.exists(assets_base_path):
         return None
         
-    # 1. Limpieza del nombre que viene del TXT/Gemini
-    # Quitamos prefijos numéricos '2_' y extensiones
-    clean_input = character_name_raw.replace("_", " ").lower()
-    clean_input = "".join([c for c in clean_input if c.isalpha() or c.isspace()])
-    input_tokens = set(clean_input.split())
+    if folders is not None:
+        available_folders = folders
+    else:
+        try:
+            available_folders = [f for f in os.listdir(assets_base_path) if os.path.isdir(os.path.join(assets_base_path, f))]
+        except Exception:
+            return None
     
-    try:
-        available_folders = [f for f in os.listdir(assets_base_path) if os.path.isdir(os.path.join(assets_base_path, f))]
-    except Exception:
+    # Exacta / subconjunto de tokens / difflib (umbral 0.6), con el matcher precompilado
+    best_match, score = get_folder_matcher(available_folders).match(character_name_raw)
+    if best_match is None:
         return None
-    
-    best_match = None
-    highest_score = 0
-    
-    for folder in available_folders:
-        folder_clean = folder.replace("_", " ").lower()
-        folder_tokens = set(folder_clean.split())
-        
-        # A. Coincidencia Exacta (normalizada)
-        if clean_input == folder_clean:
-            return os.path.join(assets_base_path, folder)
-        
-        # B. Coincidencia de Palabras Clave (Tokens)
-        common = input_tokens.intersection(folder_tokens)
-        score = len(common)
-        
-        # Penalizamos si la carpeta tiene palabras que NO están en el input
-        # Pero permitimos que el input tenga extras (la 'S' de Truman).
-        # Ajuste: Si la carpeta es subset del input, es un buen candidato.
-        if len(folder_tokens) > 0 and score >= len(folder_tokens): 
-             # ¡Match perfecto de subconjunto!
-             return os.path.join(assets_base_path, folder)
-             
-        # C. Difflib (Parecido visual para typos)
-        similarity = difflib.SequenceMatcher(None, clean_input, folder_clean).ratio()
-        if similarity > highest_score:
-            highest_score = similarity
-            best_match = folder
-
-    # Umbral de seguridad para difflib
-    if best_match and highest_score > 0.6:
-        print(f"   🔍 Match Inteligente: '{character_name_raw}' -> '{best_match}' ({highest_score:.2f})")
-        return os.path.join(assets_base_path, best_match)
-        
-    return None
+    if score is not None:
+        print(f"   🔍 Match Inteligente: '{character_name_raw}' -> '{best_match}' ({score:.2f})")
+    return os.path.join(assets_base_path, best_match)
 
 def get_president_assets(base_path, president_name, config):
     # 1. Definir la raíz de búsqueda correcta
@@ -113,12 +98,18 @@ def get_president_assets(base_path, president_name, config):
         
     # 2. Búsqueda UNIFICADA
     # 2. Búsqueda UNIFICADA con Inteligencia Difusa
-    target_folder = find_best_match_folder(president_name, root_search)
+    # Con el índice persistente (src/asset_index.py) no se lista ni se hace glob en el disco
+    index = get_asset_index(config)
+    target_folder = find_best_match_folder(president_name, root_search,
+                                           folders=index.folder_names(root_search) if index else None)
     
-    if target_folder is None or not os.path.exists(target_folder):
+    if target_folder is None or (index is None and not os.path.exists(target_folder)):
         print(f"Combinación no encontrada para: {president_name} (Buscado en {root_search})")
         return None, None, None
 
+    if index is not None:
+        return skip_quarantined(index.assets(target_folder), config)
+
     img_ext = ['*.jpg', '*.jpeg', '*.png']
     vid_ext = ['*.mp4', '*.mov']
     
@@ -126,6 +117,8 @@ def get_president_assets(base_path, president_name, config):
     # Buscar recursivamente o solo en la carpeta
     for ext in img_ext + vid_ext:
         all_files.extend(glob.glob(os.path.join(target_folder, ext)))
+    # Orden estable (glob depende del sistema de archivos): necesario para renders con semilla
+    all_files.sort()
 
     photos = []
     videos = []
@@ -148,7 +141,14 @@ def get_president_assets(base_path, president_name, config):
             photos.append(f)
     
     # Return the full list of candidates to handle "Max 2" logic upstream
-    return photos, videos, silhouette_candidates
+    return skip_quarantined((photos, videos, silhouette_candidates), config)
+
+def skip_quarantined(assets, config):
+    """Quita de (fotos, videos, siluetas) los archivos en cuarentena del último preflight (src/preflight.py)."""
+    quarantine = get_quarantine(config)
+    if quarantine is None:
+        return assets
+    return tuple(quarantine.filter(group) for group in assets)
 
 def find_president_folder(base_path, keyword):
     """
@@ -0,0 +1,51 @@
+import json
+import os
+
+import numpy as np
+from PIL import Image
+from moviepy.editor import AudioClip, ColorClip
+
+# ==========================================
+# MINI BIBLIOTECA SINTÉTICA PARA TESTS
+# ==========================================
+
+
+def write_tone(path, duration, freq=300):
+    AudioClip(lambda t: 0.3 * np.sin(2 * np.pi * freq * t), duration=duration, fps=44100).write_audiofile(
+        path, fps=44100, logger=None)
+
+
+def write_video(path, duration, size=(96, 54), fps=10, color=(200, 40, 40)):
+    ColorClip(size=size, color=color, duration=duration).write_videofile(
+        path, fps=fps, codec="libx264", audio=False, preset="ultrafast", logger=None)
+
+
+def build_library(root, presidents=("Abraham Lincoln", "George Washington"), photos_per_folder=4):
+    """Crea BIBLIOTECA_PRESIDENTES / BIBLIOTECA_INTRO / BIBLIOTECA_RECURSOS con fotos generadas."""
+    rng = np.random.RandomState(0)
+    lib = os.path.join(root, "BIBLIOTECA_PRESIDENTES")
+    for name in presidents:
+        folder = os.path.join(lib, name)
+        os.makedirs(folder, exist_ok=True)
+        for i in range(photos_per_folder):
+            w, h = (60 + 10 * i, 90 - 5 * i)
+            Image.fromarray(rng.randint(0, 255, (h, w, 3), dtype=np.uint8)).save(os.path.join(folder, f"foto_{i}.jpg"))
+    for sub in ("BIBLIOTECA_INTRO", "BIBLIOTECA_RECURSOS", "VIDEOS_TERMINADOS"):
+        os.makedirs(os.path.join(root, sub), exist_ok=True)
+    return lib
+
+
+def build_config(root, resolution=(64, 112), fps=10):
+    with open(os.path.join(os.path.dirname(__file__), "..", "config", "config.json"), encoding="utf-8") as f:
+        config = json.load(f)
+    config["video_settings"]["resolution"] = list(resolution)
+    config["video_settings"]["fps"] = fps
+    config["cache"]["folder"] = os.path.join(root, "cache")
+    config["paths"] = {
+        "library_base": os.path.join(root, "BIBLIOTECA_PRESIDENTES"),
+        "intro_library": os.path.join(root, "BIBLIOTECA_INTRO"),
+        "output_folder": os.path.join(root, "VIDEOS_TERMINADOS"),
+        "resources_library": os.path.join(root, "BIBLIOTECA_RECURSOS"),
+        "temp_folder": os.path.join(root, "temp_work"),
+    }
+    return config
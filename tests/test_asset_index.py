@@ -0,0 +1,95 @@
+import copy
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from PIL import Image
+
+from src import asset_index
+from src.asset_index import AssetIndex, get_asset_index
+from src.logic import get_mystery_silhouette_image
+from src.utils import get_president_assets, find_best_match_folder
+from tests.fixtures import build_library, build_config
+
+
+class TestAssetIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.lib = build_library(self.tmp, presidents=("Harry Truman", "Abraham Lincoln"), photos_per_folder=2)
+        folder = os.path.join(self.lib, "Harry Truman")
+        for name in ("intro_1.jpg", "truman_silueta.png", "dark_silhouette.JPG", "desfile_video.jpg",
+                     "discurso.mp4", ".oculta.jpg", "notas.txt"):
+            if name.lower().endswith((".jpg", ".png")):
+                Image.new("RGB", (30, 40)).save(os.path.join(folder, name), format="PNG")
+            else:
+                open(os.path.join(folder, name), "wb").close()
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        Image.new("RGB", (50, 20)).save(os.path.join(folder, "rotada.jpg"), exif=exif)
+        self.config = build_config(self.tmp)
+        self.config["cache"]["asset_index_check_seconds"] = 0
+        self.index_path = os.path.join(self.config["cache"]["folder"], "asset_index.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def without_index(self):
+        config = copy.deepcopy(self.config)
+        config["cache"]["asset_index_enabled"] = False
+        return config
+
+    def test_same_assets_as_glob(self):
+        for name in ("Harry_S_Truman", "Abraham_Lincoln", "Nadie"):
+            self.assertEqual(get_president_assets(self.lib, name, self.config),
+                             get_president_assets(self.lib, name, self.without_index()))
+        photos, videos, silhouettes = get_president_assets(self.lib, "Harry_S_Truman", self.config)
+        self.assertIn(os.path.join(self.lib, "Harry Truman", "desfile_video.jpg"), videos)
+        self.assertEqual([os.path.basename(p) for p in silhouettes], ["truman_silueta.png"])
+
+        folder = find_best_match_folder("Harry_S_Truman", self.lib)
+        index = get_asset_index(self.config)
+        self.assertEqual(get_mystery_silhouette_image("x", [], self.lib, folder, random.Random(3), asset_index=index),
+                         get_mystery_silhouette_image("x", [], self.lib, folder, random.Random(3)))
+        self.assertEqual([os.path.basename(p) for p in index.silhouette_images(folder)],
+                         ["dark_silhouette.JPG", "truman_silueta.png"])
+        self.assertEqual(index.folder(folder)["tokens"], ["harry", "truman"])
+        self.assertEqual(index.folder(folder)["intro_photos"], ["intro_1.jpg"])
+
+    def test_image_header_and_orientation(self):
+        info = get_asset_index(self.config).image_info(os.path.join(self.lib, "Harry Truman", "rotada.jpg"))
+        self.assertEqual((info["width"], info["height"], info["orientation"]), (50, 20, 6))
+
+    def test_only_changed_folders_rescanned(self):
+        index = AssetIndex(self.index_path, ("_video", "silueta"), check_seconds=0)
+        index.folder_names(self.lib)
+        folder = os.path.join(self.lib, "Abraham Lincoln")
+        new_photo = os.path.join(folder, "nueva.jpg")
+        Image.new("RGB", (10, 10)).save(new_photo)
+        os.utime(folder, ns=(os.stat(folder).st_atime_ns, os.stat(folder).st_mtime_ns + 10 ** 9))
+
+        with patch.object(asset_index, "scan_folder", wraps=asset_index.scan_folder) as scan:
+            photos, _, _ = index.assets(folder)
+        self.assertEqual([c.args[0] for c in scan.call_args_list], [folder])
+        self.assertIn(new_photo, photos)
+
+        # Otro proceso: el índice se carga del disco sin volver a listar nada
+        with patch.object(asset_index, "scan_folder", wraps=asset_index.scan_folder) as scan:
+            reloaded = AssetIndex(self.index_path, ("_video", "silueta"), check_seconds=0)
+            self.assertEqual(reloaded.assets(folder), index.assets(folder))
+        scan.assert_not_called()
+
+    def test_check_interval_skips_disk(self):
+        index = AssetIndex(self.index_path, ("_video", "silueta"), check_seconds=3600)
+        self.assertEqual(len(index.folder_names(self.lib)), 2)
+        os.makedirs(os.path.join(self.lib, "George Washington"))
+        self.assertEqual(len(index.folder_names(self.lib)), 2)
+        index.invalidate(self.lib)
+        self.assertEqual(len(index.folder_names(self.lib)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.audio_cache import AudioCache
+from src.logic import load_segment_audio
+from tests.fixtures import write_tone
+
+
+class TestAudioCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache = AudioCache(os.path.join(self.tmp, "audio"), 50 * 1024 * 1024,
+                                os.path.join(self.tmp, "audio_index.json"))
+        self.path = os.path.join(self.tmp, "5_Abraham_Lincoln.mp3")
+        write_tone(self.path, 1.0)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_decoded_once_per_content(self):
+        first = self.cache.samples(self.path)
+        self.assertIsInstance(first, np.memmap)
+        self.assertEqual(first.shape[1], 2)
+
+        copy = os.path.join(self.tmp, "copia.mp3")
+        shutil.copyfile(self.path, copy)
+        np.testing.assert_array_equal(self.cache.samples(copy), first)
+        self.assertEqual(len(self.cache.store.entries()), 1)
+
+    def test_index_persists_duration_and_hash(self):
+        info = self.cache.info(self.path)
+        reloaded = AudioCache(os.path.join(self.tmp, "audio"), 50 * 1024 * 1024,
+                              os.path.join(self.tmp, "audio_index.json"))
+        self.assertEqual(reloaded._index, self.cache._index)
+        self.assertAlmostEqual(info["duration"], 1.0, delta=0.1)
+
+    def test_segment_voice_matches_file_reader(self):
+        cached = load_segment_audio(self.path, self.cache)
+        direct = load_segment_audio(self.path)
+        self.assertAlmostEqual(cached.duration, direct.duration, places=3)
+        times = np.arange(0, int(direct.duration * 44100) - 10, 37) / 44100
+        # Tolerancia de una muestra de desfase (redondeo t*fps distinto en cada lector)
+        np.testing.assert_allclose(cached.get_frame(times), direct.get_frame(times), atol=0.015)
+        direct.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.audio_mix import decode_audio, trim_segment_audio, build_soundtrack, probe_audio_duration, SFX_LEAD
+from src.ffmpeg_writer import AUDIO_FPS
+from src.logic import load_segment_audio
+from tests.fixtures import write_tone
+
+
+class TestAudioMix(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_trim_and_fade_match_moviepy(self):
+        path = os.path.join(self.tmp, "voz.mp3")
+        write_tone(path, 1.0)
+        ours = trim_segment_audio(decode_audio(path), nominal_duration=probe_audio_duration(path))
+
+        ref_clip = load_segment_audio(path)
+        self.assertAlmostEqual(len(ours) / AUDIO_FPS, ref_clip.duration, delta=1.0 / AUDIO_FPS)
+        times = np.arange(len(ours) - 10) / AUDIO_FPS
+        ref = ref_clip.get_frame(times)
+        ref_clip.close()
+        np.testing.assert_allclose(ours[:len(times)], ref, atol=2e-3)
+        self.assertLess(np.abs(ours[-5:]).max(), 1e-2)
+
+    def test_short_audio_is_not_trimmed(self):
+        samples = np.ones((int(0.1 * AUDIO_FPS), 2), dtype=np.float32)
+        np.testing.assert_array_equal(trim_segment_audio(samples), samples)
+
+    def test_voices_and_sfx_at_offsets(self):
+        fake = {
+            "a": np.full((AUDIO_FPS, 2), 0.1, dtype=np.float32),
+            "b": np.full((AUDIO_FPS, 2), 0.2, dtype=np.float32),
+            "sfx": np.full((AUDIO_FPS // 10, 2), 0.5, dtype=np.float32),
+        }
+        track, total = build_soundtrack(["a", "b"], [0.85, 0.85], "sfx", decoder=fake.__getitem__,
+                                       duration_of=lambda p: len(fake[p]) / AUDIO_FPS)
+        self.assertAlmostEqual(total, 1.7)
+        self.assertEqual(track.shape, (int(round(1.7 * AUDIO_FPS)), 2))
+
+        def at(t):
+            return track[int(t * AUDIO_FPS), 0]
+
+        self.assertAlmostEqual(at(0.1), 0.1, places=5)
+        # SFX empieza SFX_LEAD antes del corte, sobre la voz 'a'
+        self.assertAlmostEqual(at(0.85 - SFX_LEAD + 0.01), 0.6, places=5)
+        self.assertAlmostEqual(at(1.2), 0.2, places=5)
+        # Recorte de 0.15 s + fadeout de 0.05 s: la voz 'b' se apaga en 0.85 + 0.85
+        self.assertAlmostEqual(at(1.6), 0.2, places=5)
+        self.assertAlmostEqual(at(1.675), 0.1, places=2)
+        self.assertLess(at(1.6995), 0.005)
+
+    def test_sfx_at_given_offsets(self):
+        fake = {
+            "a": np.zeros((AUDIO_FPS, 2), dtype=np.float32),
+            "b": np.zeros((AUDIO_FPS, 2), dtype=np.float32),
+            "sfx": np.full((AUDIO_FPS // 10, 2), 0.5, dtype=np.float32),
+        }
+        track, _ = build_soundtrack(["a", "b"], [0.85, 0.85], "sfx", decoder=fake.__getitem__,
+                                    duration_of=lambda p: len(fake[p]) / AUDIO_FPS, sfx_offsets=[0.3])
+        self.assertEqual(np.flatnonzero(track[:, 0])[0], int(round(0.3 * AUDIO_FPS)))
+        self.assertEqual(track[int((0.85 - SFX_LEAD + 0.01) * AUDIO_FPS), 0], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
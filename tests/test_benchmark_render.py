@@ -0,0 +1,42 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from tools.benchmark_render import run_benchmarks, compare_reports, build_synthetic_library, BENCH_PRESIDENTS
+
+
+class TestBenchmarkRender(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_synthetic_library_is_complete(self):
+        audio_dir = build_synthetic_library(self.tmp, scale=0.05, segment_seconds=1.0, intro_seconds=1.0,
+                                            video_seconds=1.0)
+        self.assertEqual(len(os.listdir(audio_dir)), 6)
+        for name in BENCH_PRESIDENTS:
+            self.assertEqual(len(os.listdir(os.path.join(self.tmp, "BIBLIOTECA_PRESIDENTES", name))), 7)
+        self.assertEqual(len(os.listdir(os.path.join(self.tmp, "BIBLIOTECA_INTRO", "Intro"))), 6)
+
+    def test_report_fields_and_regressions(self):
+        report = run_benchmarks([(64, 112)], ["combo_v2", "pipeline"], workdir=self.tmp, scale=0.05, fps=10,
+                                segment_seconds=1.5, isolate=False)
+        self.assertEqual([r["case"] for r in report["results"]], ["combo_v2", "pipeline"])
+        for r in report["results"]:
+            self.assertEqual(r["preset"], "64x112")
+            self.assertGreater(r["output_frames"], 0)
+            self.assertGreater(r["frames_per_second"], 0)
+            self.assertAlmostEqual(r["seconds_per_output_minute"], r["seconds"] * 60 / r["output_seconds"], delta=0.05)
+
+        slower = {"results": [dict(r, frames_per_second=r["frames_per_second"] / 2) for r in report["results"]]}
+        self.assertEqual(compare_reports(report, slower), [])
+        self.assertEqual(len(compare_reports(slower, report)), 2)
+        self.assertEqual(compare_reports(slower, report, tolerance=0.6), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
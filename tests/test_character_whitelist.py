@@ -0,0 +1,73 @@
+import copy
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src import character_whitelist
+from src.character_whitelist import CharacterWhitelist, available_characters, get_character_whitelist, display_name
+from tests.fixtures import build_config
+
+PRESIDENTS = ("AbrahamLincoln", "GeorgeWBush", "Harry Truman", "RichardNixon", "JohnFKennedy",
+              "FranklinDRoosevelt", "WarrenGHarding", "UlyssesSGrant", "RonaldReagan")
+
+
+class TestCharacterWhitelist(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.config = build_config(self.tmp)
+        self.config["cache"]["asset_index_check_seconds"] = 0
+        self.lib = self.config["paths"]["library_base"]
+        for name in PRESIDENTS:
+            os.makedirs(os.path.join(self.lib, name))
+        self.tag("RichardNixon", "Watergate\nscandal, resignation")
+        self.tag("WarrenGHarding", "Teapot Dome scandal, corruption")
+        self.tag("UlyssesSGrant", "Whiskey Ring, corruption, civil war")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def tag(self, folder, text):
+        with open(os.path.join(self.lib, folder, "tags.txt"), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_full_list_with_camelcase_names(self):
+        text = available_characters(self.config)
+        self.assertEqual(text.split(", "), [display_name(n) for n in sorted(PRESIDENTS)])
+        self.assertIn("George W Bush", text)
+        self.assertIn("Harry Truman", text)
+        # Sin top_k el tema no filtra
+        self.assertEqual(available_characters(self.config, "Corruption"), text)
+
+    def test_top_k_ranks_by_topic(self):
+        self.config["script_whitelist"]["top_k"] = 5
+        names = available_characters(self.config, "The 5 most corrupt scandal presidents in US history").split(", ")
+        self.assertEqual(len(names), 5)
+        self.assertEqual(names[:3], ["Warren G Harding", "Richard Nixon", "Ulysses S Grant"])
+        # Nombre en el tema: ese personaje primero
+        self.assertEqual(available_characters(self.config, "Lincoln secrets").split(", ")[0], "Abraham Lincoln")
+        # Modo aleatorio (sin tema): lista completa
+        self.assertEqual(len(available_characters(self.config).split(", ")), len(PRESIDENTS))
+
+    def test_cached_until_library_changes(self):
+        first = get_character_whitelist(self.config)
+        with patch.object(character_whitelist, "CharacterWhitelist", wraps=CharacterWhitelist) as build:
+            self.assertIs(get_character_whitelist(self.config), first)
+            build.assert_not_called()
+            os.makedirs(os.path.join(self.lib, "JohnAdams"))
+            self.assertIn("John Adams", get_character_whitelist(self.config).names)
+            self.assertEqual(build.call_count, 1)
+
+    def test_without_asset_index(self):
+        config = copy.deepcopy(self.config)
+        config["cache"]["asset_index_enabled"] = False
+        config["script_whitelist"]["top_k"] = 5
+        self.assertEqual(available_characters(config, "Watergate").split(", ")[0], "Richard Nixon")
+        config["paths"]["library_base"] = os.path.join(self.tmp, "no_existe")
+        self.assertEqual(available_characters(config), character_whitelist.UNRESTRICTED)
+
+
+if __name__ == '__main__':
+    unittest.main()
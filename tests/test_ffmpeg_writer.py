@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from moviepy.editor import AudioClip, ColorClip, VideoFileClip, concatenate_videoclips
+
+from src.ffmpeg_writer import write_timeline_ffmpeg, flatten_timeline
+from src.renderer import LazyClip, concatenate_chain
+
+
+class TestFfmpegWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def build_timeline(self):
+        red = ColorClip((64, 48), color=(255, 0, 0), duration=1.0)
+        body = concatenate_videoclips([
+            ColorClip((64, 48), color=(0, 255, 0), duration=0.5),
+            ColorClip((64, 48), color=(0, 0, 255), duration=0.5),
+        ], method="compose")
+        return [red, body]
+
+    def test_flatten_walks_concatenations(self):
+        entries = flatten_timeline(self.build_timeline())
+        self.assertEqual([(s, e) for s, e, _ in entries], [(0.0, 1.0), (1.0, 1.5), (1.5, 2.0)])
+
+    def test_writes_frames_and_audio(self):
+        out = os.path.join(self.tmp, "out.mp4")
+        audio = AudioClip(lambda t: np.sin(2 * np.pi * 440 * t), duration=2.0, fps=44100)
+        write_timeline_ffmpeg(self.build_timeline(), out, fps=10, resolution=(64, 48), audio=audio, logger=None)
+
+        video = VideoFileClip(out)
+        try:
+            self.assertAlmostEqual(video.duration, 2.0, delta=0.15)
+            self.assertEqual(tuple(video.size), (64, 48))
+            self.assertIsNotNone(video.audio)
+            for t, channel in [(0.3, 0), (1.2, 1), (1.8, 2)]:
+                frame = video.get_frame(t)
+                self.assertGreater(frame[24, 32, channel], 200, f"t={t}")
+        finally:
+            video.close()
+
+    def test_lazy_clips_live_one_at_a_time(self):
+        live, peak = set(), []
+
+        def lazy(i, color):
+            def factory():
+                live.add(i)
+                peak.append(len(live))
+                clip = ColorClip((64, 48), color=color, duration=0.5)
+                clip.close = lambda: live.discard(i)
+                return clip
+            return LazyClip(factory, 0.5, (64, 48))
+
+        timeline = concatenate_chain([lazy(0, (255, 0, 0)), lazy(1, (0, 255, 0)), lazy(2, (0, 0, 255))])
+        write_timeline_ffmpeg([timeline], os.path.join(self.tmp, "lazy.mp4"), fps=10, resolution=(64, 48), logger=None)
+        self.assertEqual(peak, [1, 1, 1])
+        self.assertEqual(live, set())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from PIL import Image
+
+from src.cache import DiskCache
+from src.image_cache import load_scaled_image, SCALE_COVER_V1, SCALE_FIT_WIDTH_V2
+
+
+class TestImageCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache = DiskCache(os.path.join(self.tmp, "cache"), 50 * 1024 * 1024)
+        self.img_path = os.path.join(self.tmp, "foto.jpg")
+        Image.new("RGB", (800, 1200), (200, 30, 30)).save(self.img_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_sizes_match_engine_rules(self):
+        img = load_scaled_image(self.img_path, SCALE_FIT_WIDTH_V2, (108, 192))
+        self.assertEqual(img.size, (108, 162))
+        img = load_scaled_image(self.img_path, SCALE_COVER_V1, (108, 192))
+        self.assertEqual(img.size, (163, 245))
+        self.assertEqual(img.mode, "RGB")
+
+    def test_exif_rotation_applied(self):
+        path = os.path.join(self.tmp, "rotada.jpg")
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        Image.new("RGB", (1200, 800), (0, 0, 255)).save(path, exif=exif)
+        img = load_scaled_image(path, SCALE_FIT_WIDTH_V2, (108, 192))
+        self.assertEqual(img.size, (108, 162))
+
+    def test_hit_reuses_entry_and_mtime_invalidates(self):
+        first = load_scaled_image(self.img_path, SCALE_FIT_WIDTH_V2, (108, 192), cache=self.cache)
+        self.assertEqual(len(self.cache.entries()), 1)
+        second = load_scaled_image(self.img_path, SCALE_FIT_WIDTH_V2, (108, 192), cache=self.cache)
+        np.testing.assert_array_equal(np.asarray(first), np.asarray(second))
+        self.assertEqual(len(self.cache.entries()), 1)
+
+        later = time.time() + 10
+        os.utime(self.img_path, (later, later))
+        load_scaled_image(self.img_path, SCALE_FIT_WIDTH_V2, (108, 192), cache=self.cache)
+        self.assertEqual(len(self.cache.entries()), 2)
+
+    def test_lru_eviction(self):
+        cache = DiskCache(os.path.join(self.tmp, "small"), 100)
+        for i in range(3):
+            cache.put(f"k{i}", "bin", lambda p: open(p, "wb").write(b"x" * 60))
+            os.utime(cache.path_for(f"k{i}", "bin"), (i, i))
+        self.assertEqual([os.path.basename(p) for p, _, _ in cache.entries()], ["k2.bin"])
+
+    def test_folder_listed_only_over_limit(self):
+        cache = DiskCache(os.path.join(self.tmp, "total"), 1000)
+        with patch.object(cache, "entries", wraps=cache.entries) as entries:
+            for i in range(10):
+                cache.put(f"k{i}", "bin", lambda p: open(p, "wb").write(b"x" * 60))
+            # Una sola lectura inicial del total; después se lleva en memoria
+            self.assertEqual(entries.call_count, 1)
+            cache.put("k0", "bin", lambda p: open(p, "wb").write(b"x" * 100))
+            cache.invalidate("k1", "bin")
+            self.assertEqual(entries.call_count, 1)
+            self.assertEqual(cache._total, cache.total_bytes())
+            for i in range(10, 20):
+                cache.put(f"k{i}", "bin", lambda p: open(p, "wb").write(b"x" * 60))
+            self.assertLessEqual(cache.total_bytes(), 1000)
+            self.assertEqual(cache._total, cache.total_bytes())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from PIL import Image
+
+from src.asset_index import AssetIndex, get_asset_index
+from src.image_cache import get_image_cache, load_scaled_image, image_key, SCALE_COVER_V1
+from src.library_watcher import LibraryWatcher, PollingBackend, InotifyBackend
+from src.proxies import get_proxy_cache, proxy_key
+from src.cache import file_signature
+from src.utils import safe_resolution
+from tests.fixtures import build_library, build_config
+
+
+class TestLibraryWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.lib = build_library(self.tmp, presidents=("Harry Truman", "Abraham Lincoln"), photos_per_folder=2)
+        self.config = build_config(self.tmp)
+        self.config["cache"]["asset_index_check_seconds"] = 0
+        self.config["cache"]["proxies_background"] = False
+        self.folder = os.path.join(self.lib, "Harry Truman")
+        self.watcher = LibraryWatcher(self.config, backend=PollingBackend(), settle_seconds=2).start()
+        self.index = self.watcher.index
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def photos(self):
+        return [os.path.basename(p) for p in self.index.assets(self.folder)[0]]
+
+    def test_half_copied_file_waits_for_stable_size(self):
+        path = os.path.join(self.folder, "nueva.jpg")
+        with open(path, "wb") as f:
+            f.write(b"\xff\xd8" + b"\0" * 100)
+        self.watcher.notice([self.folder], now=0)
+        self.assertEqual(self.watcher.process(now=1), 0)
+
+        # La copia sigue creciendo: el plazo vuelve a empezar
+        Image.new("RGB", (20, 30)).save(path, format="JPEG")
+        self.assertEqual(self.watcher.process(now=2.5), 0)
+        self.assertEqual(self.watcher.process(now=4), 0)
+        self.assertNotIn("nueva.jpg", self.photos())
+
+        self.assertEqual(self.watcher.process(now=4.6), 1)
+        self.assertIn("nueva.jpg", self.photos())
+        info = self.index.image_info(path)
+        self.assertEqual((info["width"], info["height"]), (20, 30))
+
+    def test_replaced_and_removed_files_invalidate_caches(self):
+        photo = os.path.join(self.folder, "foto_0.jpg")
+        resolution = safe_resolution(self.config)
+        image_cache = get_image_cache(self.config)
+        load_scaled_image(photo, SCALE_COVER_V1, resolution, cache=image_cache)
+        old_key = image_key(file_signature(photo), SCALE_COVER_V1, resolution)
+        self.assertIsNotNone(image_cache.get(old_key, "npy"))
+
+        video = os.path.join(self.folder, "discurso.mp4")
+        open(video, "wb").close()
+        self.watcher.notice([self.folder], now=0)
+        self.watcher.process(now=3)
+        proxy_cache = get_proxy_cache(self.config)
+        res = self.watcher.proxy_res[0]
+        proxy_path = proxy_cache.put(proxy_key(video, res, self.watcher.fps), "mp4",
+                                     lambda tmp: open(tmp, "wb").close() or tmp)
+
+        Image.new("RGB", (40, 40)).save(photo)
+        st = os.stat(photo)
+        os.utime(photo, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        os.remove(video)
+        self.watcher.notice([self.folder], now=10)
+        self.assertEqual(self.watcher.process(now=13), 1)
+
+        self.assertIsNone(image_cache.get(old_key, "npy"))
+        self.assertFalse(os.path.exists(proxy_path))
+        self.assertEqual(self.index.image_info(photo)["width"], 40)
+        self.assertEqual(self.index.assets(self.folder)[1], [])
+
+    def test_new_folder_indexed_after_settling(self):
+        backend = self.watcher.backend
+        new_folder = os.path.join(self.lib, "George Washington")
+        os.makedirs(new_folder)
+        Image.new("RGB", (10, 10)).save(os.path.join(new_folder, "foto.jpg"))
+        st = os.stat(self.lib)
+        os.utime(self.lib, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+        self.watcher.notice(backend.wait(0), now=0)
+        self.assertIn(new_folder, backend._mtimes)
+        self.assertEqual(self.watcher.process(now=1), 0)
+        self.assertNotIn("George Washington", self.index.snapshot(self.lib))
+        self.watcher.process(now=3)
+        self.assertEqual(self.index.snapshot(self.lib)["George Washington"]["photos"], ["foto.jpg"])
+
+        shutil.rmtree(new_folder)
+        self.watcher.notice(backend.wait(0), now=10)
+        self.watcher.process(now=13)
+        self.assertNotIn("George Washington", self.index.snapshot(self.lib))
+
+    def test_planner_reads_published_snapshot(self):
+        # Otro proceso (la app) sin mirar el disco: solo ve lo que publica el vigilante
+        reader = AssetIndex(self.index.path, tuple(self.index.naming), check_seconds=0, follow_disk=False)
+        self.assertEqual(len(reader.folder_names(self.lib)), 2)
+        path = os.path.join(self.folder, "nueva.jpg")
+        Image.new("RGB", (10, 10)).save(path)
+        self.assertNotIn(path, reader.assets(self.folder)[0])
+
+        self.watcher.notice([self.folder], now=0)
+        self.watcher.process(now=3)
+        self.assertIn(path, reader.assets(self.folder)[0])
+
+    def test_same_process_index_is_shared(self):
+        self.assertIs(get_asset_index(self.config), self.index)
+
+
+@unittest.skipUnless(InotifyBackend.available(), "inotify solo en Linux")
+class TestInotifyBackend(unittest.TestCase):
+
+    def test_reports_changed_folder(self):
+        tmp = tempfile.mkdtemp()
+        backend = InotifyBackend()
+        try:
+            backend.watch(tmp)
+            self.assertEqual(backend.wait(0), set())
+            with open(os.path.join(tmp, "a.jpg"), "wb") as f:
+                f.write(b"x")
+            self.assertEqual(backend.wait(1), {tmp})
+        finally:
+            backend.close()
+            shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    unittest.main()
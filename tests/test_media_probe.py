@@ -0,0 +1,74 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import PIL.Image
+from moviepy.editor import AudioClip
+
+from src.logic import generate_dynamic_intro
+from src.media_probe import ProbeCache, plan_intro_chain
+from tests.fixtures import build_config, write_video
+
+if not hasattr(PIL.Image, 'ANTIALIAS'):
+    PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
+
+
+class TestPlanIntroChain(unittest.TestCase):
+
+    def test_plan_covers_target_with_min_clip_length(self):
+        durations = {f"v{i}.mp4": d for i, d in enumerate((2.5, 6.0, 3.2, 9.0, 1.0))}
+        for seed in range(20):
+            plan = plan_intro_chain(durations, 7.3, random.Random(seed))
+            self.assertIsNotNone(plan)
+            self.assertAlmostEqual(sum(d for _, d in plan), 7.3, places=2)
+            for path, d in plan:
+                self.assertGreaterEqual(d, 2.0 - 1e-9)
+                self.assertLessEqual(d, durations[path] + 1e-9)
+                self.assertNotEqual(path, "v4.mp4")
+
+    def test_same_seed_same_plan(self):
+        durations = {f"v{i}.mp4": 2.0 + i for i in range(6)}
+        self.assertEqual(plan_intro_chain(durations, 9.0, random.Random(3)),
+                         plan_intro_chain(durations, 9.0, random.Random(3)))
+
+    def test_no_usable_clips(self):
+        self.assertIsNone(plan_intro_chain({"a.mp4": 1.5, "b.mp4": None}, 5.0, random.Random(0)))
+
+
+class TestProbeAndIntro(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.config = build_config(self.tmp)
+        self.videos = []
+        for i, dur in enumerate((2.5, 3.0, 4.0)):
+            path = os.path.join(self.tmp, f"intro_{i}.mp4")
+            write_video(path, dur)
+            self.videos.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_probe_is_persisted(self):
+        cache_path = os.path.join(self.tmp, "probes.json")
+        probes = ProbeCache(cache_path)
+        info = probes.probe(self.videos[2])
+        self.assertAlmostEqual(info["duration"], 4.0, delta=0.15)
+        self.assertEqual(info["size"], [96, 54])
+        probes.save()
+        self.assertEqual(ProbeCache(cache_path).probe(self.videos[2]), info)
+        self.assertIsNone(probes.probe(os.path.join(self.tmp, "no_existe.mp4")))
+
+    def test_intro_matches_audio_and_resolution(self):
+        audio = AudioClip(lambda t: 0 * t, duration=5.0, fps=44100)
+        intro, _ = generate_dynamic_intro(audio, self.config, list(self.videos), rng=random.Random(1))
+        self.assertAlmostEqual(intro.duration, 5.0, places=2)
+        self.assertEqual(tuple(intro.size), (64, 112))
+        self.assertEqual(intro.get_frame(4.9).shape, (112, 64, 3))
+        intro.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import PIL.Image
+from PIL import Image
+
+from src.logic import create_smart_combo_clip, DIR_LEFT, DIR_RIGHT, DIR_UP, DIR_DOWN, DIR_CENTER
+from src.motion import MotionTable
+
+# Mismo parche que main.py (MoviePy 1.x usa Image.ANTIALIAS)
+if not hasattr(PIL.Image, 'ANTIALIAS'):
+    PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
+
+FPS = 24
+RES = (40, 72)
+
+
+class TestMotionTables(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.img_path = os.path.join(self.tmp, "foto.png")
+        Image.fromarray(np.random.RandomState(0).randint(0, 255, (70, 50, 3), dtype=np.uint8)).save(self.img_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def build_pair(self, version, prev, **kwargs):
+        clips = []
+        for tables in (False, True):
+            random.seed(99)
+            clip, _ = create_smart_combo_clip(self.img_path, 1.5, RES, prev, version=version, renderer="moviepy",
+                                              fps=FPS, motion_tables=tables, **kwargs)
+            clips.append(clip)
+        return clips
+
+    def assert_same_motion(self, ref, fast):
+        layer_ref, layer_fast = ref.clips[0], fast.clips[0]
+        for i in range(int(1.5 * FPS)):
+            t = i / FPS
+            self.assertEqual(tuple(layer_ref.pos(t)), tuple(layer_fast.pos(t)), f"t={t}")
+            self.assertEqual(layer_ref.get_frame(t).shape, layer_fast.get_frame(t).shape, f"t={t}")
+
+    def test_v2_tables_match_closures(self):
+        for prev in (DIR_LEFT, DIR_RIGHT, DIR_UP, DIR_DOWN):
+            self.assert_same_motion(*self.build_pair("v2_estable", prev))
+        self.assert_same_motion(*self.build_pair("v2_estable", DIR_CENTER, is_first_clip=True))
+        self.assert_same_motion(*self.build_pair("v2_estable", DIR_UP, is_last_clip=True))
+
+    def test_v1_tables_match_closures(self):
+        for prev in (DIR_LEFT, DIR_RIGHT, DIR_UP, DIR_DOWN, DIR_CENTER):
+            self.assert_same_motion(*self.build_pair("v1_estable", prev))
+        ref, fast = self.build_pair("v1_estable", DIR_CENTER, is_first_clip=True)
+        for i in range(int(1.5 * FPS)):
+            t = i / FPS
+            np.testing.assert_array_equal(ref.get_frame(t), fast.get_frame(t))
+
+    def test_table_is_serializable(self):
+        random.seed(5)
+        clip, _ = create_smart_combo_clip(self.img_path, 1.0, RES, DIR_LEFT, version="v2_estable", fps=FPS)
+        data = json.loads(json.dumps(clip.motion_table.to_dict()))
+        table = MotionTable.from_dict(data)
+        self.assertEqual(len(table), FPS + 1)
+        self.assertEqual(table.position(0.5), clip.motion_table.position(0.5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import difflib
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.name_matcher import FolderMatcher, get_folder_matcher
+from src.utils import find_best_match_folder
+
+
+def reference_match(character_name_raw, folders):
+    """Búsqueda lineal original de find_best_match_folder (sin acceso a disco)."""
+    clean_input = character_name_raw.replace("_", " ").lower()
+    clean_input = "".join([c for c in clean_input if c.isalpha() or c.isspace()])
+    input_tokens = set(clean_input.split())
+    best_match, highest_score = None, 0
+    for folder in folders:
+        folder_clean = folder.replace("_", " ").lower()
+        folder_tokens = set(folder_clean.split())
+        if clean_input == folder_clean:
+            return folder
+        if len(folder_tokens) > 0 and len(input_tokens & folder_tokens) >= len(folder_tokens):
+            return folder
+        similarity = difflib.SequenceMatcher(None, clean_input, folder_clean).ratio()
+        if similarity > highest_score:
+            highest_score, best_match = similarity, folder
+    return best_match if best_match and highest_score > 0.6 else None
+
+
+def random_names(rng, n):
+    syllables = ["an", "dre", "jack", "son", "lin", "coln", "wa", "shing", "ton", "gar", "field", "ty", "ler",
+                 "pol", "k", "ha", "ri", "tru", "man", "ken", "ne", "dy", "ro", "se", "velt", "ma", "di"]
+    word = lambda: "".join(rng.choice(syllables) for _ in range(rng.randint(1, 3))).capitalize()
+    return [" ".join(word() for _ in range(rng.randint(1, 3))) for _ in range(n)]
+
+
+def typo(rng, name):
+    chars = list(name)
+    for _ in range(rng.randint(0, 3)):
+        i = rng.randrange(len(chars))
+        op = rng.choice(("drop", "swap", "dup"))
+        if op == "drop" and len(chars) > 1:
+            chars.pop(i)
+        elif op == "swap" and i + 1 < len(chars):
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+        else:
+            chars.insert(i, chars[i])
+    return "".join(chars).replace(" ", rng.choice((" ", "_")))
+
+
+class TestFolderMatcher(unittest.TestCase):
+
+    def test_truman_subset_match(self):
+        matcher = FolderMatcher(["George Washington", "Harry Truman", "Abraham Lincoln"])
+        self.assertEqual(matcher.match("Harry_S_Truman"), ("Harry Truman", None))
+        self.assertEqual(matcher.match("3_abraham_lincoln"), ("Abraham Lincoln", None))
+        folder, score = matcher.match("Abrahm Lincon")
+        self.assertEqual(folder, "Abraham Lincoln")
+        self.assertGreater(score, 0.6)
+        self.assertEqual(matcher.match("Zzz"), (None, None))
+
+    def test_same_result_as_linear_scan(self):
+        rng = random.Random(7)
+        for _ in range(3):
+            folders = random_names(rng, 200) + ["Harry Truman", "Harry", "harry_truman", "", "_", "Ñandú Pérez"]
+            rng.shuffle(folders)
+            matcher = FolderMatcher(folders)
+            queries = [typo(rng, rng.choice(folders) or "x") for _ in range(80)] + random_names(rng, 30)
+            queries += ["Harry_S_Truman", "Ñandu Perez", "", "  "]
+            for query in queries:
+                self.assertEqual(matcher.match(query)[0], reference_match(query, folders), query)
+
+    def test_difflib_runs_on_few_candidates(self):
+        folders = random_names(random.Random(1), 3000)
+        matcher = FolderMatcher(folders)
+        with patch("src.name_matcher.difflib.SequenceMatcher", wraps=difflib.SequenceMatcher) as sm:
+            matcher.match(typo(random.Random(2), folders[1234]))
+        self.assertLess(sm.call_count, 50)
+
+    def test_matcher_reused_per_folder_list(self):
+        folders = ["Abraham Lincoln", "Harry Truman"]
+        self.assertIs(get_folder_matcher(folders), get_folder_matcher(list(folders)))
+        self.assertIsNot(get_folder_matcher(folders), get_folder_matcher(folders + ["John Adams"]))
+
+
+class TestFindBestMatchFolder(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        for name in ("Harry Truman", "George Washington"):
+            os.makedirs(os.path.join(self.tmp, name))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_disk_and_prelisted_folders(self):
+        expected = os.path.join(self.tmp, "Harry Truman")
+        self.assertEqual(find_best_match_folder("Harry_S_Truman", self.tmp), expected)
+        self.assertEqual(find_best_match_folder("Harry_S_Truman", self.tmp, folders=["Harry Truman"]), expected)
+        self.assertIsNone(find_best_match_folder("Harry", os.path.join(self.tmp, "no_existe")))
+
+
+if __name__ == '__main__':
+    unittest.main()
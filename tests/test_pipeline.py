@@ -0,0 +1,394 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from moviepy.editor import VideoFileClip
+from proglog import ProgressBarLogger
+
+from src.logic import create_video_segment, plan_segment, execute_segment, build_intro_clip
+from src.segment_cache import write_segment_video, get_segment_cache
+from src.ffmpeg_writer import AUDIO_FPS
+from src.pipeline import (collect_audio_order, parse_segment_name, render_video_parallel, derive_segment_seed,
+                          resolve_video_seed, render_record_path, load_render_record, create_draft_workspace,
+                          draft_config, final_plan_from_draft, load_draft_plan, discard_draft, plan_video,
+                          plan_path, save_plan, load_plan, render_plan)
+from src import pipeline, segment_cache
+from tests.fixtures import build_library, build_config, write_tone
+
+
+class RecordingLogger(ProgressBarLogger):
+    """Logger de proglog que anota el total de cada barra que se completa."""
+
+    def __init__(self):
+        super().__init__()
+        self.totals = []
+
+    def bars_callback(self, bar, attr, value, old_value=None):
+        if attr == "index" and value == self.bars[bar]["total"] - 1:
+            self.totals.append(self.bars[bar]["total"])
+
+
+class TestSegmentOrder(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_intro_first_then_reverse_numeric(self):
+        for name in ("1_Obama.mp3", "intro.mp3", "5_Trump.mp3", "3_Harry_S_Truman.mp3"):
+            open(os.path.join(self.tmp, name), "wb").close()
+        order = [os.path.basename(p) for p in collect_audio_order(self.tmp)]
+        self.assertEqual(order, ["intro.mp3", "5_Trump.mp3", "3_Harry_S_Truman.mp3", "1_Obama.mp3"])
+
+    def test_parse_segment_name(self):
+        self.assertEqual(parse_segment_name("/x/3_Harry_S_Truman.mp3"), ("3_Harry_S_Truman", 3, "Harry_S_Truman"))
+        self.assertEqual(parse_segment_name("/x/intro.mp3"), ("intro", 1, "Intro"))
+
+
+class TestSeeds(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        build_library(self.tmp, presidents=("Abraham Lincoln",), photos_per_folder=6)
+        self.config = build_config(self.tmp)
+        self.config["cache"]["segments_enabled"] = False
+        self.audio = os.path.join(self.tmp, "5_Abraham_Lincoln.mp3")
+        write_tone(self.audio, 7.0)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def render(self, seed):
+        clip, _ = create_video_segment(self.audio, 5, "Abraham_Lincoln", self.config, False,
+                                       engine_version="v2_estable", seed=seed)
+        times = np.linspace(0, clip.duration, 12, endpoint=False)
+        return np.stack([clip.get_frame(t) for t in times])
+
+    def test_segment_seed_depends_on_name_not_position(self):
+        self.assertEqual(derive_segment_seed(42, "5_Trump"), derive_segment_seed(42, "5_Trump"))
+        self.assertNotEqual(derive_segment_seed(42, "5_Trump"), derive_segment_seed(43, "5_Trump"))
+        self.assertNotEqual(derive_segment_seed(42, "5_Trump"), derive_segment_seed(42, "4_Obama"))
+
+    def test_resolve_video_seed(self):
+        self.assertEqual(resolve_video_seed(self.config, 7), 7)
+        self.config["video_settings"]["seed"] = 11
+        self.assertEqual(resolve_video_seed(self.config), 11)
+
+    def test_same_seed_same_frames(self):
+        np.testing.assert_array_equal(self.render(123), self.render(123))
+        self.assertFalse(np.array_equal(self.render(123), self.render(321)))
+
+
+class TestRenderPlan(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        build_library(self.tmp, photos_per_folder=6)
+        self.config = build_config(self.tmp)
+        self.config["cache"]["segments_enabled"] = False
+        self.audio_dir = os.path.join(self.tmp, "audios")
+        os.makedirs(self.audio_dir)
+        write_tone(os.path.join(self.audio_dir, "5_Abraham_Lincoln.mp3"), 7.0)
+        write_tone(os.path.join(self.audio_dir, "4_George_Washington.mp3"), 2.0, freq=500)
+        open(os.path.join(self.config["paths"]["resources_library"], "pagina.mp3"), "wb").close()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def frames(self, clip):
+        times = np.linspace(0, clip.duration, 10, endpoint=False)
+        return np.stack([clip.get_frame(t) for t in times])
+
+    def test_segment_plan_is_json_and_covers_audio(self):
+        audio = os.path.join(self.audio_dir, "5_Abraham_Lincoln.mp3")
+        plan = plan_segment(audio, 5, "Abraham_Lincoln", self.config, engine_version="v1_estable", seed=3)
+        self.assertEqual(json.loads(json.dumps(plan)), plan)
+        self.assertEqual(plan["kind"], "body")
+        self.assertAlmostEqual(sum(c["duration"] for c in plan["clips"]), plan["duration"])
+        self.assertTrue(all(c["type"] == "photo" and "exit" in c["motion"] for c in plan["clips"]))
+        self.assertEqual(plan, plan_segment(audio, 5, "Abraham_Lincoln", self.config, engine_version="v1_estable", seed=3))
+
+    def test_execute_plan_matches_direct_render(self):
+        audio = os.path.join(self.audio_dir, "5_Abraham_Lincoln.mp3")
+        for engine in ("v1_estable", "v2_estable"):
+            plan = json.loads(json.dumps(plan_segment(audio, 5, "Abraham_Lincoln", self.config, engine_version=engine, seed=9)))
+            direct, _ = create_video_segment(audio, 5, "Abraham_Lincoln", self.config, False, engine_version=engine, seed=9)
+            np.testing.assert_array_equal(self.frames(execute_segment(plan, self.config)), self.frames(direct))
+
+    def test_lazy_clips_match_eager(self):
+        audio = os.path.join(self.audio_dir, "5_Abraham_Lincoln.mp3")
+        plan = plan_segment(audio, 5, "Abraham_Lincoln", self.config, engine_version="v2_estable", seed=5)
+        lazy = execute_segment(plan, self.config)
+        self.assertFalse(any(c.materialized for c in lazy.clips))
+        self.config["video_settings"]["lazy_clips"] = False
+        np.testing.assert_array_equal(self.frames(lazy), self.frames(execute_segment(plan, self.config)))
+
+    def test_corrupt_video_dropped_in_lazy_mode(self):
+        # Existe pero ffmpeg no lo lee (el dummy_video.mp4 de generar_datos_prueba.py)
+        dummy = os.path.join(self.config["paths"]["library_base"], "Abraham Lincoln", "dummy_video.mp4")
+        with open(dummy, "w") as f:
+            f.write("DUMMY VIDEO CONTENT")
+        audio = os.path.join(self.audio_dir, "5_Abraham_Lincoln.mp3")
+        plan = plan_segment(audio, 5, "Abraham_Lincoln", self.config, engine_version="v2_estable", seed=5)
+        plan["clips"].append({"type": "video", "path": dummy, "duration": 1.0})
+
+        for lazy in (True, False):
+            self.config["video_settings"]["lazy_clips"] = lazy
+            seg = execute_segment(plan, self.config)
+            self.assertEqual(len(seg.clips), len(plan["clips"]) - 1)
+            out = os.path.join(self.tmp, f"seg_{lazy}.mp4")
+            write_segment_video(seg, out, self.config)
+            self.assertTrue(os.path.exists(out))
+            # La intro no se puede montar: quien la llama cae al fallback (NEUTRAL)
+            self.assertIsNone(build_intro_clip([(dummy, 1.0)], self.config))
+
+    def test_sfx_lands_at_plan_transitions(self):
+        sfx = os.path.join(self.config["paths"]["resources_library"], "pagina.mp3")
+        write_tone(sfx, 0.3, freq=880)
+        plan = plan_video(collect_audio_order(self.audio_dir), self.config, engine_version="v2_estable", seed=2)
+        fps = self.config["video_settings"]["fps"]
+        # Duraciones en frames enteros: los cortes del plan son los del video codificado
+        for seg in plan["segments"]:
+            self.assertAlmostEqual(seg["duration"] * fps, round(seg["duration"] * fps), places=6)
+
+        segments = [{"audio_path": s["audio_path"], "duration": s["duration"]} for s in plan["segments"]]
+        offsets = pipeline.plan_sfx_offsets(plan, segments)
+        self.assertEqual(offsets, [plan["transitions"][0]["sfx_start"]])
+        with_sfx, _ = pipeline.build_final_audio(segments, sfx, sfx_offsets=offsets)
+        voices, _ = pipeline.build_final_audio(segments)
+        first = np.flatnonzero(np.abs(with_sfx - voices).max(axis=1) > 1e-4)[0]
+        self.assertAlmostEqual(first / AUDIO_FPS, plan["transitions"][0]["sfx_start"], delta=0.01)
+
+        # El render mezcla con las transiciones del plan
+        with patch.object(pipeline, "build_soundtrack", wraps=pipeline.build_soundtrack) as mix:
+            render_plan(plan, os.path.join(self.tmp, "o.mp4"), self.config, logger=None)
+        self.assertEqual(mix.call_args.kwargs["sfx_offsets"], offsets)
+        # Si un segmento falla al renderizar, los cortes se recalculan
+        self.assertIsNone(pipeline.plan_sfx_offsets(plan, segments[1:]))
+
+    def test_failed_segment_not_revealed(self):
+        write_tone(os.path.join(self.audio_dir, "1_Harry_Truman.mp3"), 1.0)
+        seen = {}
+
+        def fake_plan(aud, puesto, presi, config, revealed_presidents=None, **kwargs):
+            seen[presi] = revealed_presidents
+            if presi == "Abraham_Lincoln":
+                raise IOError("audio ilegible")
+            return None
+
+        with patch.object(pipeline, "plan_segment", fake_plan):
+            plan_video(collect_audio_order(self.audio_dir), self.config, seed=1)
+        self.assertEqual(seen["Harry_Truman"], ["George_Washington"])
+
+    def test_video_plan_cuts_and_round_trip(self):
+        plan = plan_video(collect_audio_order(self.audio_dir), self.config, engine_version="v2_estable", seed=4)
+        self.assertEqual(plan["seed"], 4)
+        self.assertEqual([s["name"] for s in plan["segments"]], ["5_Abraham_Lincoln", "4_George_Washington"])
+        first = plan["segments"][0]["duration"]
+        self.assertEqual(len(plan["transitions"]), 1)
+        self.assertAlmostEqual(plan["transitions"][0]["time"], first)
+        self.assertAlmostEqual(plan["transitions"][0]["sfx_start"], first - 0.2)
+        self.assertAlmostEqual(plan["duration"], sum(s["duration"] for s in plan["segments"]))
+
+        path = save_plan(plan, plan_path(os.path.join(self.tmp, "video.mp4")))
+        self.assertTrue(path.endswith("video.plan.json"))
+        self.assertEqual(load_plan(path), plan)
+
+
+class TestParallelRender(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        build_library(self.tmp)
+        self.config = build_config(self.tmp)
+        self.audio_dir = os.path.join(self.tmp, "audios")
+        os.makedirs(self.audio_dir)
+        write_tone(os.path.join(self.audio_dir, "5_Abraham_Lincoln.mp3"), 2.5)
+        write_tone(os.path.join(self.audio_dir, "4_George_Washington.mp3"), 2.0, freq=500)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_segments_rendered_and_joined(self):
+        out = os.path.join(self.config["paths"]["output_folder"], "out.mp4")
+        order = collect_audio_order(self.audio_dir)
+        render_video_parallel(order, out, self.config, engine_version="v2_estable", logger=None, max_workers=2, seed=5)
+
+        video = VideoFileClip(out)
+        try:
+            # 2.5 + 2.0 s de audio menos el recorte de 0.15 s por segmento
+            self.assertAlmostEqual(video.duration, 4.2, delta=0.25)
+            self.assertEqual(tuple(video.size), (64, 112))
+            self.assertIsNotNone(video.audio)
+        finally:
+            video.close()
+        self.assertEqual(os.listdir(self.config["paths"]["temp_folder"]), [])
+
+        with open(render_record_path(out), encoding="utf-8") as f:
+            record = json.load(f)
+        self.assertEqual(record["seed"], 5)
+        self.assertEqual([s["audio"] for s in record["segments"]], ["5_Abraham_Lincoln.mp3", "4_George_Washington.mp3"])
+
+
+class TestSequentialSegmentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        build_library(self.tmp)
+        self.config = build_config(self.tmp)
+        self.audio_dir = os.path.join(self.tmp, "audios")
+        os.makedirs(self.audio_dir)
+        write_tone(os.path.join(self.audio_dir, "5_Abraham_Lincoln.mp3"), 2.5)
+        write_tone(os.path.join(self.audio_dir, "4_George_Washington.mp3"), 2.0, freq=500)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def render(self, name, logger=None):
+        """Renderiza en un solo proceso y devuelve (ruta, nº de codificaciones de frames)."""
+        out = os.path.join(self.config["paths"]["output_folder"], name)
+        plan = plan_video(collect_audio_order(self.audio_dir), self.config, engine_version="v2_estable", seed=3)
+        encodes = []
+        counted = lambda real: (lambda *a, **k: encodes.append(a[1]) or real(*a, **k))
+        with patch.object(segment_cache, "write_timeline_ffmpeg", counted(segment_cache.write_timeline_ffmpeg)), \
+                patch.object(pipeline, "write_timeline_ffmpeg", counted(pipeline.write_timeline_ffmpeg)):
+            render_plan(plan, out, self.config, logger=logger)
+        return out, len(encodes)
+
+    def test_each_segment_encoded_once(self):
+        # Fallo de caché: una codificación por segmento y el final se une sin recodificar
+        first, encodes = self.render("o1.mp4")
+        self.assertEqual(encodes, 2)
+        # Acierto: ninguna
+        second, encodes = self.render("o2.mp4")
+        self.assertEqual(encodes, 0)
+
+        for out in (first, second):
+            video = VideoFileClip(out)
+            try:
+                self.assertAlmostEqual(video.duration, 4.2, delta=0.25)
+                self.assertEqual(tuple(video.size), (64, 112))
+                self.assertIsNotNone(video.audio)
+            finally:
+                video.close()
+        self.assertEqual(os.listdir(self.config["paths"]["temp_folder"]), [])
+
+    def assert_rendered(self, out):
+        video = VideoFileClip(out)
+        try:
+            self.assertAlmostEqual(video.duration, 4.2, delta=0.25)
+            self.assertIsNotNone(video.audio)
+        finally:
+            video.close()
+
+    def test_cap_smaller_than_one_segment(self):
+        # Cada put supera el límite: los segmentos de este render siguen fijados hasta unirlos
+        self.config["cache"]["segments_max_mb"] = 0
+        out, encodes = self.render("o.mp4")
+        self.assertEqual(encodes, 2)
+        self.assert_rendered(out)
+        # Terminado el render ya se pueden desalojar
+        cache = get_segment_cache(self.config)
+        cache.put("otro", "mp4", lambda p: open(p, "wb").write(b"x"))
+        self.assertEqual([os.path.basename(p) for p, _, _ in cache.entries()], ["otro.mp4"])
+
+    def test_segment_evicted_by_other_process(self):
+        real = pipeline.render_segment
+        rendered = []
+
+        def render_and_evict(*args, **kwargs):
+            clip = real(*args, **kwargs)
+            rendered.append(clip)
+            if len(rendered) == 2:
+                # Otro proceso desaloja el primer segmento antes de la unión
+                os.remove(rendered[0].cached_path)
+            return clip
+
+        with patch.object(pipeline, "render_segment", render_and_evict):
+            out, encodes = self.render("o.mp4")
+        # Dos segmentos guardados y el final en una sola pasada
+        self.assertEqual(encodes, 3)
+        self.assert_rendered(out)
+
+    def test_logger_reports_segment_encoding(self):
+        logger = RecordingLogger()
+        self.render("o.mp4", logger=logger)
+        # Una barra completa por segmento codificado
+        self.assertEqual(len(logger.totals), 2)
+        self.assertGreater(logger.totals[0], logger.totals[1])
+
+    def test_moviepy_backend_skips_segment_cache(self):
+        self.config["video_settings"]["output_backend"] = "moviepy"
+        out, encodes = self.render("o.mp4")
+        self.assertEqual(encodes, 0)
+        self.assertEqual(get_segment_cache(self.config).entries(), [])
+        video = VideoFileClip(out)
+        try:
+            self.assertAlmostEqual(video.duration, 4.2, delta=0.25)
+        finally:
+            video.close()
+
+
+class TestDraftThenFinal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        build_library(self.tmp)
+        self.config = build_config(self.tmp)
+        self.src = os.path.join(self.tmp, "upload")
+        os.makedirs(self.src)
+        write_tone(os.path.join(self.src, "5_Abraham_Lincoln.mp3"), 2.0)
+        write_tone(os.path.join(self.src, "4_George_Washington.mp3"), 2.0, freq=500)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_final_reuses_draft_plan(self):
+        output = self.config["paths"]["output_folder"]
+        audio_dir, draft_path = create_draft_workspace(self.src, output)
+        # La carpeta de origen es temporal: el borrador conserva sus audios
+        shutil.rmtree(self.src)
+
+        render_video_parallel(collect_audio_order(audio_dir), draft_path, draft_config(self.config, (33, 57)),
+                              engine_version="v1_estable", logger=None, max_workers=2)
+        draft = VideoFileClip(draft_path)
+        self.assertEqual(tuple(draft.size), (32, 56))
+        draft.close()
+
+        # El plan del borrador queda guardado y es el que se ejecuta en el final
+        draft_plan = load_draft_plan(draft_path)
+        self.assertEqual([s["name"] for s in draft_plan["segments"]], ["5_Abraham_Lincoln", "4_George_Washington"])
+
+        audio_dir_final, seed, engine = final_plan_from_draft(draft_path)
+        self.assertEqual(audio_dir_final, audio_dir)
+        self.assertEqual(engine, "v1_estable")
+        # Mismo camino que main.render_final_from_draft: generate_video_pipeline(plan=...) -> render_plan
+        final_path = os.path.join(output, "final.mp4")
+        render_plan(load_draft_plan(draft_path), final_path, self.config, logger=None)
+
+        final_plan = load_plan(plan_path(final_path))
+        clips = lambda plan: [[(c["path"], c["duration"], c.get("motion")) for c in seg["clips"]]
+                              for seg in plan["segments"]]
+        self.assertEqual(clips(final_plan), clips(draft_plan))
+        self.assertEqual(final_plan["seed"], draft_plan["seed"])
+
+        draft_record, final_record = load_render_record(draft_path), load_render_record(final_path)
+        self.assertEqual(draft_record["segments"], final_record["segments"])
+        self.assertEqual(final_record["resolution"], [64, 112])
+        final = VideoFileClip(final_path)
+        self.assertEqual(tuple(final.size), (64, 112))
+        final.close()
+
+        discard_draft(draft_path)
+        self.assertFalse(os.path.exists(os.path.dirname(draft_path)))
+        self.assertTrue(os.path.exists(final_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from PIL import Image
+
+from src.preflight import run_preflight, get_quarantine, report_paths
+from src.logic import get_mystery_silhouette_image
+from src.utils import get_president_assets
+from tests.fixtures import build_library, build_config, write_video
+
+
+class TestPreflight(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.lib = build_library(self.tmp, presidents=("Harry Truman",), photos_per_folder=3)
+        self.folder = os.path.join(self.lib, "Harry Truman")
+        write_video(os.path.join(self.folder, "discurso.mp4"), 0.5)
+        # Rotos: JPEG truncado, imagen vacía y el video falso de generar_datos_prueba.py
+        with open(os.path.join(self.folder, "foto_0.jpg"), "rb") as f:
+            data = f.read()
+        with open(os.path.join(self.folder, "cortada.jpg"), "wb") as f:
+            f.write(data[:len(data) // 2])
+        open(os.path.join(self.folder, "vacia_silueta.png"), "wb").close()
+        with open(os.path.join(self.folder, "dummy_video.mp4"), "w") as f:
+            f.write("DUMMY VIDEO CONTENT")
+        self.config = build_config(self.tmp)
+        self.config["cache"]["asset_index_check_seconds"] = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def names(self, paths):
+        return sorted(os.path.basename(p) for p in paths)
+
+    def test_report_and_quarantine(self):
+        report = run_preflight(self.config, workers=2)
+        self.assertEqual((report["total"], report["checked"], report["bad"]), (7, 7, 3))
+        with open(report_paths(self.config)[1], encoding="utf-8") as f:
+            quarantined = json.load(f)["files"]
+        self.assertEqual(self.names(quarantined), ["cortada.jpg", "dummy_video.mp4", "vacia_silueta.png"])
+        video = report["files"][os.path.join(os.path.abspath(self.folder), "discurso.mp4")]
+        self.assertTrue(video["ok"])
+        self.assertGreater(video["duration"], 0)
+
+        # Segunda pasada: nada cambió, nada se vuelve a comprobar
+        self.assertEqual(run_preflight(self.config, workers=2)["checked"], 0)
+
+    def test_selector_skips_quarantined(self):
+        photos, videos, silhouettes = get_president_assets(self.lib, "Harry Truman", self.config)
+        self.assertIn("cortada.jpg", self.names(photos))
+        run_preflight(self.config, workers=1)
+
+        photos, videos, silhouettes = get_president_assets(self.lib, "Harry Truman", self.config)
+        self.assertEqual(self.names(photos), ["foto_0.jpg", "foto_1.jpg", "foto_2.jpg"])
+        self.assertEqual(self.names(videos), ["discurso.mp4"])
+        self.assertEqual(silhouettes, [])
+        # La silueta rota del Top 1 tampoco: se pasa al comodín
+        self.assertEqual(
+            os.path.basename(get_mystery_silhouette_image("x", [], "/recursos", self.folder, random.Random(0),
+                                                          quarantine=get_quarantine(self.config))),
+            "comodin_silueta_1.png")
+
+    def test_replaced_file_leaves_quarantine(self):
+        run_preflight(self.config, workers=1)
+        broken = os.path.join(self.folder, "cortada.jpg")
+        quarantine = get_quarantine(self.config)
+        self.assertIsNotNone(quarantine.reason(broken))
+        Image.new("RGB", (20, 20)).save(broken)
+        self.assertIsNone(quarantine.reason(broken))
+        report = run_preflight(self.config, workers=1)
+        self.assertEqual((report["checked"], report["bad"]), (1, 2))
+
+    def test_quarantine_disabled(self):
+        run_preflight(self.config, workers=1)
+        self.config["cache"]["quarantine_enabled"] = False
+        photos, _, _ = get_president_assets(self.lib, "Harry Truman", self.config)
+        self.assertIn("cortada.jpg", self.names(photos))
+
+
+if __name__ == '__main__':
+    unittest.main()
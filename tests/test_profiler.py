@@ -0,0 +1,89 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import PIL.Image
+
+from src.pipeline import collect_audio_order, plan_video, render_plan
+from src.profiler import RenderProfiler, render_profile, profile_stage, profile_path, get_profiler
+from tests.fixtures import build_library, build_config, write_tone
+
+if not hasattr(PIL.Image, 'ANTIALIAS'):
+    PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
+
+
+class TestRenderProfiler(unittest.TestCase):
+
+    def test_nested_stages_are_exclusive(self):
+        profiler = RenderProfiler().start()
+        with profile_stage("outer"):
+            time.sleep(0.05)
+            with profile_stage("inner"):
+                time.sleep(0.05)
+        report = profiler.stop().to_dict()
+        self.assertIsNone(get_profiler())
+        self.assertAlmostEqual(report["stages"]["outer"]["seconds"], 0.05, delta=0.03)
+        self.assertAlmostEqual(report["stages"]["inner"]["seconds"], 0.05, delta=0.03)
+        total = sum(s["seconds"] for s in report["stages"].values()) + report["unaccounted_seconds"]
+        self.assertAlmostEqual(total, report["total_seconds"], delta=0.001)
+
+    def test_no_active_profiler_is_noop(self):
+        with profile_stage("nada"):
+            pass
+        self.assertIsNone(get_profiler())
+
+
+class TestRenderProfileReport(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        build_library(self.tmp)
+        self.config = build_config(self.tmp)
+        self.audio_dir = os.path.join(self.tmp, "audios")
+        os.makedirs(self.audio_dir)
+        write_tone(os.path.join(self.audio_dir, "5_Abraham_Lincoln.mp3"), 2.0)
+        write_tone(os.path.join(self.audio_dir, "4_George_Washington.mp3"), 2.0, freq=500)
+        self.out = os.path.join(self.config["paths"]["output_folder"], "out.mp4")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def render(self):
+        with render_profile(self.config, self.out):
+            plan = plan_video(collect_audio_order(self.audio_dir), self.config, engine_version="v2_estable", seed=1)
+            render_plan(plan, self.out, self.config, logger=None)
+
+    def test_disabled_by_default(self):
+        self.render()
+        self.assertFalse(os.path.exists(profile_path(self.out)))
+
+    def test_breakdown_next_to_video(self):
+        self.config["video_settings"]["profile"] = True
+        self.config["video_settings"]["profile_cprofile"] = True
+        self.render()
+        with open(profile_path(self.out), encoding="utf-8") as f:
+            report = json.load(f)
+        for stage in ("asset_lookup", "image_decode_resize", "clip_build", "frame_generation", "encoder_write", "audio_mix"):
+            self.assertIn(stage, report["stages"])
+        self.assertEqual(report["stages"]["frame_generation"]["calls"], sum(c["frames"] for c in report["clips"]))
+        self.assertTrue(all(c["label"].startswith(("5_Abraham_Lincoln#", "4_George_Washington#")) for c in report["clips"]))
+        self.assertTrue(os.path.exists(os.path.join(os.path.dirname(self.out), report["cprofile"]["path"])))
+        self.assertTrue(report["cprofile"]["top"])
+
+    def test_parallel_workers_are_merged(self):
+        self.config["video_settings"]["profile"] = True
+        self.config["video_settings"]["parallel_segments"] = True
+        self.config["video_settings"]["parallel_workers"] = 2
+        self.render()
+        with open(profile_path(self.out), encoding="utf-8") as f:
+            report = json.load(f)
+        self.assertEqual(report["workers"], 2)
+        self.assertIn("frame_generation", report["stages"])
+        self.assertIn("concat", report["stages"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from moviepy.editor import VideoFileClip
+
+from src.proxies import build_proxy_library, resolve_video_source, find_library_videos
+from tests.fixtures import build_library, build_config, write_video
+
+
+class TestProxyLibrary(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        lib = build_library(self.tmp, presidents=("Abraham Lincoln",))
+        self.config = build_config(self.tmp)
+        intro_dir = os.path.join(self.config["paths"]["intro_library"], "Intro")
+        os.makedirs(intro_dir)
+        self.intro_video = os.path.join(intro_dir, "intro_0.mp4")
+        self.president_video = os.path.join(lib, "Abraham Lincoln", "discurso_video.mp4")
+        write_video(self.intro_video, 1.0, size=(192, 108), fps=25)
+        write_video(self.president_video, 1.0, size=(100, 300), fps=25)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_builds_missing_proxies_once(self):
+        self.assertEqual(find_library_videos(self.config), sorted([self.intro_video, self.president_video]))
+        self.assertEqual(resolve_video_source(self.intro_video, self.config), self.intro_video)
+
+        created = build_proxy_library(self.config, resolutions=[[64, 112], [33, 57]])
+        self.assertEqual(created, 4)
+        self.assertEqual(build_proxy_library(self.config, resolutions=[[64, 112], [33, 57]]), 0)
+
+        for source in (self.intro_video, self.president_video):
+            proxy = resolve_video_source(source, self.config)
+            self.assertNotEqual(proxy, source)
+            clip = VideoFileClip(proxy)
+            try:
+                self.assertEqual(tuple(clip.size), (64, 112))
+                self.assertEqual(clip.fps, 10)
+                self.assertIsNone(clip.audio)
+            finally:
+                clip.close()
+
+    def test_disabled_proxies_use_original(self):
+        self.config["cache"]["proxies_enabled"] = False
+        self.assertEqual(build_proxy_library(self.config), 0)
+        self.assertEqual(resolve_video_source(self.intro_video, self.config), self.intro_video)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,211 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import PIL.Image
+from PIL import Image
+from moviepy.editor import CompositeVideoClip, ImageClip
+
+from src.logic import create_smart_combo_clip_v1_stable, create_smart_combo_clip_v2_estable, DIR_CENTER, DIR_LEFT, DIR_UP
+from src.renderer import (canvas_window, create_slide_clip, create_zoom_clip, centered_position, zoom_window,
+                          MirrorCanvas, fit_to_resolution, LazyClip)
+
+# Mismo parche que main.py (MoviePy 1.x usa Image.ANTIALIAS)
+if not hasattr(PIL.Image, 'ANTIALIAS'):
+    PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
+
+
+def make_gradient(w, h):
+    xs = np.linspace(0, 255, w, dtype=np.uint8)
+    ys = np.linspace(0, 255, h, dtype=np.uint8)
+    img = np.zeros((h, w, 3), dtype=np.uint8)
+    img[..., 0] = xs[None, :]
+    img[..., 1] = ys[:, None]
+    img[..., 2] = 128
+    return img
+
+
+class TestCanvasWindow(unittest.TestCase):
+
+    def test_inside_is_view(self):
+        canvas = make_gradient(60, 80)
+        frame = canvas_window(canvas, -10, -20, 30, 40)
+        self.assertTrue(np.shares_memory(frame, canvas))
+        np.testing.assert_array_equal(frame, canvas[20:60, 10:40])
+
+    def test_partial_coverage_matches_moviepy_blit(self):
+        canvas = make_gradient(60, 80)
+        for pos in [(5, 7), (-50, -70), (25, -10), (100, 0)]:
+            ref = CompositeVideoClip([ImageClip(canvas).set_position(pos)], size=(30, 40)).get_frame(0)
+            np.testing.assert_array_equal(canvas_window(canvas, pos[0], pos[1], 30, 40), ref)
+
+
+class TestMirrorCanvas(unittest.TestCase):
+
+    def build_grid(self, tile, cols, rows):
+        # Grid materializado como en el motor V2 original
+        th, tw = tile.shape[:2]
+        grid = Image.new('RGB', (tw * len(cols), th * len(rows)))
+        for ci, c in enumerate(cols):
+            for ri, r in enumerate(rows):
+                t = Image.fromarray(tile)
+                if c != 1: t = t.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+                if r != 1: t = t.transpose(Image.Transpose.FLIP_TOP_BOTTOM)
+                grid.paste(t, (ci * tw, ri * th))
+        return np.array(grid)
+
+    def test_virtual_grid_matches_materialized(self):
+        tile = np.random.RandomState(1).randint(0, 255, (23, 17, 3), dtype=np.uint8)
+        for cols, rows in [(range(0, 3), range(0, 3)), (range(1, 3), range(1, 2)), (range(0, 2), range(0, 3))]:
+            grid = self.build_grid(tile, cols, rows)
+            virtual = MirrorCanvas(tile.copy(), cols, rows)
+            self.assertEqual(virtual.size, (grid.shape[1], grid.shape[0]))
+            for x in range(-grid.shape[1], 12, 5):
+                for y in range(-grid.shape[0], 12, 7):
+                    np.testing.assert_array_equal(virtual.window(x, y, 10, 12), canvas_window(grid, x, y, 10, 12))
+
+    def test_window_inside_one_tile_is_view(self):
+        tile = make_gradient(30, 40)
+        virtual = MirrorCanvas(tile, range(0, 3), range(0, 3))
+        self.assertTrue(np.shares_memory(virtual.window(-32, -45, 10, 10), tile))
+        self.assertTrue(np.shares_memory(virtual.window(-2, -3, 10, 10), tile))
+
+
+class TestSlideClip(unittest.TestCase):
+
+    def test_slide_clip_matches_composite(self):
+        canvas = make_gradient(90, 120)
+        pos_func = lambda t: (int(-30 * t), int(-10 - 40 * t))
+        ref = CompositeVideoClip([ImageClip(canvas).set_position(pos_func)], size=(30, 40)).set_duration(1.0)
+        fast = create_slide_clip(canvas.copy(), pos_func, (30, 40), 1.0)
+        for t in np.linspace(0, 1.0, 10, endpoint=False):
+            np.testing.assert_array_equal(fast.get_frame(t), ref.get_frame(t))
+
+
+class TestZoomWindow(unittest.TestCase):
+
+    def test_crop_then_scale_matches_resize_then_crop(self):
+        image = Image.fromarray(make_gradient(120, 160))
+        for s, pos in [(1.0, (-40, -60)), (1.3, (-70, -90)), (1.12, (-50, -80)), (1.2, (10, -5))]:
+            ref = CompositeVideoClip([ImageClip(np.array(image)).resize(s).set_position(pos)], size=(40, 72)).get_frame(0)
+            frame = zoom_window(image, pos[0], pos[1], s, 40, 72)
+            self.assertEqual(frame.shape, ref.shape)
+            self.assertLess(np.abs(frame.astype(int) - ref.astype(int)).mean(), 2.0)
+
+
+class TestEngineV2Renderers(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.img_path = os.path.join(self.tmp, "foto.png")
+        Image.fromarray(make_gradient(50, 70)).save(self.img_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_middle_clip_same_frames(self):
+        for prev in (DIR_LEFT, DIR_UP):
+            random.seed(1234)
+            ref, exit_ref = create_smart_combo_clip_v2_estable(self.img_path, 2.0, (40, 72), prev, renderer="moviepy")
+            random.seed(1234)
+            fast, exit_fast = create_smart_combo_clip_v2_estable(self.img_path, 2.0, (40, 72), prev, renderer="numpy")
+            self.assertEqual(exit_ref, exit_fast)
+            for t in np.linspace(0, 2.0, 9, endpoint=False):
+                np.testing.assert_array_equal(fast.get_frame(t), ref.get_frame(t))
+
+    def assert_close_frames(self, ref, fast, duration):
+        for t in np.linspace(0, duration, 9, endpoint=False):
+            a, b = fast.get_frame(t), ref.get_frame(t)
+            self.assertEqual(a.shape, b.shape)
+            self.assertLess(np.abs(a.astype(int) - b.astype(int)).mean(), 2.0, f"t={t}")
+
+    def test_zoom_clips_same_look(self):
+        for kwargs in ({"is_first_clip": True}, {"is_last_clip": True}):
+            random.seed(7)
+            ref, _ = create_smart_combo_clip_v2_estable(self.img_path, 2.0, (40, 72), DIR_UP, renderer="moviepy", **kwargs)
+            random.seed(7)
+            fast, _ = create_smart_combo_clip_v2_estable(self.img_path, 2.0, (40, 72), DIR_UP, renderer="numpy", **kwargs)
+            self.assert_close_frames(ref, fast, 2.0)
+
+    def test_v1_bounce_same_look(self):
+        ref, _ = create_smart_combo_clip_v1_stable(self.img_path, 2.0, (40, 72), DIR_CENTER, is_first_clip=True, renderer="moviepy")
+        fast, _ = create_smart_combo_clip_v1_stable(self.img_path, 2.0, (40, 72), DIR_CENTER, is_first_clip=True, renderer="numpy")
+        self.assert_close_frames(ref, fast, 2.0)
+
+
+class TestFitToResolution(unittest.TestCase):
+
+    def test_any_source_size_becomes_exact_resolution(self):
+        for size in ((1920, 1080), (500, 1200), (33, 61), (64, 112)):
+            clip = ImageClip(make_gradient(*size)).set_duration(1.0)
+            fitted = fit_to_resolution(clip, (64, 112))
+            self.assertEqual(tuple(fitted.size), (64, 112))
+            self.assertEqual(fitted.get_frame(0.5).shape, (112, 64, 3))
+
+    def test_exact_size_is_untouched(self):
+        clip = ImageClip(make_gradient(64, 112)).set_duration(1.0)
+        self.assertIs(fit_to_resolution(clip, (64, 112)), clip)
+
+
+class TestFrameInto(unittest.TestCase):
+
+    def assert_into_matches(self, clip, duration):
+        out = np.full((72, 40, 3), 77, dtype=np.uint8)
+        for t in np.linspace(0, duration, 9, endpoint=False):
+            self.assertTrue(clip.frame_into(t, out))
+            np.testing.assert_array_equal(out, clip.get_frame(t), f"t={t}")
+
+    def test_slide_real_and_virtual_canvas(self):
+        # Desde fuera de pantalla hasta dentro: cobertura parcial y total
+        pos = lambda t: (30 - 60 * t, -40 * t)
+        self.assert_into_matches(create_slide_clip(make_gradient(80, 90), pos, (40, 72), 1.0), 1.0)
+        mirror = MirrorCanvas(make_gradient(30, 40), range(0, 3), range(0, 3))
+        self.assert_into_matches(create_slide_clip(mirror, pos, (40, 72), 1.0), 1.0)
+
+    def test_zoom_pil_and_virtual_canvas(self):
+        zoom = lambda t: 1.0 + 0.5 * t
+        image = Image.fromarray(make_gradient(50, 70))
+        self.assert_into_matches(create_zoom_clip(image, centered_position(zoom, image.size, (40, 72)), zoom, (40, 72), 1.0), 1.0)
+        mirror = MirrorCanvas(make_gradient(30, 40), range(0, 3), range(0, 3))
+        self.assert_into_matches(create_zoom_clip(mirror, lambda t: (-20, -30), zoom, (40, 72), 1.0), 1.0)
+
+    def test_transformed_clip_falls_back(self):
+        clip = create_slide_clip(make_gradient(80, 90), lambda t: (-t, -t), (40, 72), 1.0)
+        out = np.zeros((72, 40, 3), dtype=np.uint8)
+        self.assertFalse(clip.subclip(0.5).frame_into(0.1, out))
+        self.assertFalse(clip.frame_into(0.1, np.zeros((10, 10, 3), dtype=np.uint8)))
+
+
+class TestLazyClip(unittest.TestCase):
+
+    def setUp(self):
+        self.builds = 0
+
+    def factory(self):
+        self.builds += 1
+        return create_slide_clip(make_gradient(80, 90), lambda t: (-10 * t, -5 * t), (40, 72), 1.0)
+
+    def test_same_frames_built_on_first_frame(self):
+        lazy = LazyClip(self.factory, 1.0, (40, 72))
+        self.assertEqual(self.builds, 0)
+        self.assertFalse(lazy.materialized)
+        eager = self.factory()
+        for t in np.linspace(0, 1.0, 7, endpoint=False):
+            np.testing.assert_array_equal(lazy.get_frame(t), eager.get_frame(t))
+        self.assertEqual(self.builds, 2)
+
+    def test_released_after_last_frame_and_rebuilt_on_demand(self):
+        lazy = LazyClip(self.factory, 1.0, (40, 72), fps=10)
+        lazy.get_frame(0.5)
+        self.assertTrue(lazy.materialized)
+        lazy.get_frame(0.9)
+        self.assertFalse(lazy.materialized)
+        lazy.get_frame(0.2)
+        self.assertEqual(self.builds, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
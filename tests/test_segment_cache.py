@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import PIL.Image
+from moviepy.editor import VideoFileClip
+
+from src.logic import create_video_segment
+from src.segment_cache import get_segment_cache, segment_cache_key
+from tests.fixtures import build_library, build_config, write_tone
+
+if not hasattr(PIL.Image, 'ANTIALIAS'):
+    PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
+
+
+class TestSegmentCacheKey(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        lib = build_library(self.tmp, presidents=("Abraham Lincoln",))
+        self.config = build_config(self.tmp)
+        self.photos = [os.path.join(lib, "Abraham Lincoln", f"foto_{i}.jpg") for i in range(4)]
+        self.audio = os.path.join(self.tmp, "5_Abraham_Lincoln.mp3")
+        write_tone(self.audio, 1.0)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def key(self, **overrides):
+        args = dict(audio_path=self.audio, asset_files=self.photos, config=self.config,
+                    engine_version="v2_estable", puesto=5, president_name="Abraham_Lincoln")
+        args.update(overrides)
+        return segment_cache_key(**args)
+
+    def test_key_is_stable_and_order_independent(self):
+        self.assertEqual(self.key(), self.key(asset_files=list(reversed(self.photos))))
+
+    def test_key_depends_on_inputs(self):
+        base = self.key()
+        self.assertNotEqual(base, self.key(engine_version="v1_estable"))
+        self.assertNotEqual(base, self.key(seed=7))
+
+        later = time.time() + 10
+        os.utime(self.photos[0], (later, later))
+        self.assertNotEqual(base, self.key())
+
+    def test_same_audio_bytes_same_key(self):
+        copy = os.path.join(self.tmp, "copia.mp3")
+        shutil.copyfile(self.audio, copy)
+        self.assertEqual(self.key(), self.key(audio_path=copy))
+        write_tone(copy, 1.0, freq=600)
+        self.assertNotEqual(self.key(), self.key(audio_path=copy))
+
+
+class TestSegmentCacheHit(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        build_library(self.tmp, presidents=("Abraham Lincoln",))
+        self.config = build_config(self.tmp)
+        self.audio = os.path.join(self.tmp, "5_Abraham_Lincoln.mp3")
+        write_tone(self.audio, 1.5)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def create(self):
+        return create_video_segment(self.audio, 5, "Abraham_Lincoln", self.config, False, engine_version="v2_estable")
+
+    def test_second_call_returns_encoded_segment(self):
+        first, _ = self.create()
+        self.assertTrue(os.path.exists(first.cached_path))
+        self.assertEqual(len(get_segment_cache(self.config).entries()), 1)
+
+        second, _ = self.create()
+        try:
+            self.assertIsInstance(second, VideoFileClip)
+            self.assertEqual(second.cached_path, first.cached_path)
+            self.assertAlmostEqual(second.duration, first.duration)
+            self.assertIsNotNone(second.audio)
+            self.assertEqual(second.get_frame(0.5).shape, (112, 64, 3))
+        finally:
+            second.close()
+        self.assertEqual(len(get_segment_cache(self.config).entries()), 1)
+
+    def test_segment_built_at_even_native_resolution(self):
+        self.config["video_settings"]["resolution"] = [65, 113]
+        clip, _ = self.create()
+        self.assertEqual(tuple(clip.size), (64, 112))
+        self.assertEqual(clip.get_frame(0.7).shape, (112, 64, 3))
+
+    def test_disabled_cache_skips_store(self):
+        self.config["cache"]["segments_enabled"] = False
+        clip, _ = self.create()
+        self.assertIsNone(getattr(clip, "cached_path", None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,363 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import traceback
+import subprocess
+import multiprocessing
+from datetime import datetime
+
+import numpy as np
+import PIL.Image
+from PIL import Image, ImageDraw
+
+# Ejecutable como script (python tools/benchmark_render.py) o como módulo (python -m tools.benchmark_render)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+if not hasattr(PIL.Image, 'ANTIALIAS'):
+    PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
+
+from moviepy.editor import AudioFileClip
+
+from src.ffmpeg_writer import get_ffmpeg_binary
+from src.image_cache import get_image_cache
+from src.logic import create_smart_combo_clip, generate_dynamic_intro
+from src.pipeline import collect_audio_order, plan_video, render_plan
+from src.utils import get_president_assets, safe_resolution
+from src.profiler import peak_rss_mb
+
+# ==========================================
+# BENCHMARK DE RENDER (Biblioteca sintética, sin red)
+# ==========================================
+# Crea una biblioteca completa con datos generados (fotos de varios tamaños y
+# proporciones, videos mp4 cortos y audios) y mide, en cada preset de
+# resolución: los motores v1/v2 (create_smart_combo_clip), la intro dinámica
+# y el pipeline completo (plan + render). Cada caso corre en un proceso nuevo
+# para que el pico de memoria sea el suyo. Salida en JSON:
+#   python tools/benchmark_render.py --presets 480p 720p --out bench.json
+#   python tools/benchmark_render.py --baseline bench.json   (falla si hay regresiones)
+
+# Mismos presets que el selector de calidad de main.py
+PRESETS = {
+    "1080p": (1080, 1920),
+    "720p": (720, 1280),
+    "480p": (480, 854),
+    "240p": (240, 426),
+}
+
+CASES = ("combo_v1", "combo_v2", "intro", "pipeline", "pipeline_parallel")
+
+BENCH_PRESIDENTS = ("Abraham Lincoln", "George Washington", "John Adams", "Thomas Jefferson", "James Madison")
+
+# (ancho, alto) de las fotos sintéticas: vertical, horizontal, cuadrada, 4:3 grande, panorámica y pequeña
+PHOTO_SIZES = ((1080, 1920), (1920, 1080), (1200, 1200), (4000, 3000), (3000, 1000), (480, 640))
+
+# (ancho, alto) de los videos de intro: 4K horizontal (lo habitual), 1080p y vertical
+INTRO_VIDEO_SIZES = ((3840, 2160), (1920, 1080), (1080, 1920))
+
+BENCH_SEED = 1234
+
+
+# ==========================================
+# BIBLIOTECA SINTÉTICA
+# ==========================================
+def synthetic_image(width, height, seed):
+    """Foto procedural: degradado + patrón senoidal + rectángulos (comprime como una foto real, no como ruido)."""
+    rng = np.random.RandomState(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = rng.uniform(0, 255, 3).astype(np.float32)
+    freq = rng.uniform(0.005, 0.03)
+    img = np.empty((height, width, 3), dtype=np.float32)
+    for c in range(3):
+        img[..., c] = base[c] * (x / width) + (255 - base[c]) * (y / height) * 0.5 \
+                      + 40 * np.sin(freq * (x + (c + 1) * y))
+    img = Image.fromarray(np.clip(img, 0, 255).astype(np.uint8))
+    draw = ImageDraw.Draw(img)
+    for _ in range(8):
+        x0, y0 = rng.randint(0, width), rng.randint(0, height)
+        x1, y1 = x0 + rng.randint(width // 10, width // 3), y0 + rng.randint(height // 10, height // 3)
+        draw.rectangle([x0, y0, x1, y1], fill=tuple(int(v) for v in rng.randint(0, 255, 3)))
+    return img
+
+
+def run_ffmpeg(args):
+    cmd = [get_ffmpeg_binary(), "-y", "-loglevel", "error"] + args
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise IOError(f"ffmpeg falló: {proc.stderr.decode(errors='ignore')}")
+
+
+def write_synthetic_video(path, size, duration, fps=30):
+    w, h = size
+    run_ffmpeg(["-f", "lavfi", "-i", f"testsrc2=size={w}x{h}:rate={fps}:duration={duration}",
+                "-vcodec", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", path])
+
+
+def write_synthetic_audio(path, duration, freq=300):
+    run_ffmpeg(["-f", "lavfi", "-i", f"sine=frequency={freq}:duration={duration}",
+                "-ac", "2", "-ar", "44100", "-b:a", "128k", path])
+
+
+def scaled(size, scale):
+    # Tamaños pares y con un mínimo razonable
+    return tuple(max(16, int(v * scale) // 2 * 2) for v in size)
+
+
+def build_synthetic_library(root, scale=1.0, segment_seconds=10.0, intro_seconds=6.0, video_seconds=4.0):
+    """
+    Crea bajo `root` las bibliotecas (presidentes, intro, recursos) y una carpeta de audios
+    (intro + 5..1). `scale` reduce el tamaño de fotos y videos. Devuelve la carpeta de audios.
+    """
+    lib = os.path.join(root, "BIBLIOTECA_PRESIDENTES")
+    for p_idx, name in enumerate(BENCH_PRESIDENTS):
+        folder = os.path.join(lib, name)
+        os.makedirs(folder, exist_ok=True)
+        for i, size in enumerate(PHOTO_SIZES):
+            ext = "png" if i % 3 == 2 else "jpg"
+            synthetic_image(*scaled(size, scale), seed=p_idx * 100 + i).save(os.path.join(folder, f"foto_{i}.{ext}"))
+        synthetic_image(*scaled((1080, 1920), scale), seed=p_idx * 100 + 99).convert("L").save(
+            os.path.join(folder, "silueta.jpg"))
+
+    intro_folder = os.path.join(root, "BIBLIOTECA_INTRO", "Intro")
+    os.makedirs(intro_folder, exist_ok=True)
+    for i, size in enumerate(INTRO_VIDEO_SIZES * 2):
+        write_synthetic_video(os.path.join(intro_folder, f"intro_{i}.mp4"), scaled(size, scale), video_seconds + i % 3)
+
+    resources = os.path.join(root, "BIBLIOTECA_RECURSOS")
+    os.makedirs(resources, exist_ok=True)
+    write_synthetic_audio(os.path.join(resources, "pagina.mp3"), 0.6, freq=900)
+    for i in (1, 2):
+        synthetic_image(*scaled((1080, 1920), scale), seed=500 + i).save(os.path.join(resources, f"comodin_silueta_{i}.png"))
+
+    os.makedirs(os.path.join(root, "VIDEOS_TERMINADOS"), exist_ok=True)
+
+    audio_dir = os.path.join(root, "audios")
+    os.makedirs(audio_dir, exist_ok=True)
+    write_synthetic_audio(os.path.join(audio_dir, "intro.mp3"), intro_seconds, freq=250)
+    for puesto, name in zip((5, 4, 3, 2, 1), BENCH_PRESIDENTS):
+        write_synthetic_audio(os.path.join(audio_dir, f"{puesto}_{name.replace(' ', '_')}.mp3"),
+                              segment_seconds, freq=300 + 50 * puesto)
+    return audio_dir
+
+
+def bench_config(root, resolution, fps=30, base_config=None):
+    """Config del proyecto apuntando a la biblioteca sintética, con caché propia."""
+    if base_config is None:
+        with open(os.path.join(ROOT, "config", "config.json"), encoding="utf-8") as f:
+            base_config = json.load(f)
+    config = json.loads(json.dumps(base_config))
+    config["video_settings"]["resolution"] = list(resolution)
+    config["video_settings"]["fps"] = fps
+    config["video_settings"]["seed"] = BENCH_SEED
+    cache = config.setdefault("cache", {})
+    cache["folder"] = os.path.join(root, "cache")
+    # Se mide el render: sin segmentos ya codificados ni proxies en segundo plano
+    cache["segments_enabled"] = False
+    cache["proxies_background"] = False
+    config["paths"] = {
+        "library_base": os.path.join(root, "BIBLIOTECA_PRESIDENTES"),
+        "intro_library": os.path.join(root, "BIBLIOTECA_INTRO"),
+        "output_folder": os.path.join(root, "VIDEOS_TERMINADOS"),
+        "resources_library": os.path.join(root, "BIBLIOTECA_RECURSOS"),
+        "temp_folder": os.path.join(root, "temp_work"),
+    }
+    return config
+
+
+# ==========================================
+# CASOS
+# ==========================================
+# Cada caso devuelve el nº de frames de salida producidos.
+
+def case_combo(config, version, clip_seconds=3.0):
+    """Un clip del motor por foto (alternando primero / intermedio / último) y todos sus frames."""
+    res = safe_resolution(config)
+    sets = config["video_settings"]
+    photos, _, _ = get_president_assets(config["paths"]["library_base"], BENCH_PRESIDENTS[0], config)
+    image_cache = get_image_cache(config)
+    frames = 0
+    prev_exit = 5
+    for i, photo in enumerate(photos):
+        clip, prev_exit = create_smart_combo_clip(
+            photo, clip_seconds, res, prev_exit, is_first_clip=(i % 3 == 0), is_last_clip=(i % 3 == 2),
+            version=version, renderer=sets.get("renderer", "numpy"), fps=sets["fps"],
+            motion_tables=sets.get("motion_tables", True), image_cache=image_cache, rng=random.Random(BENCH_SEED + i)
+        )
+        for _ in clip.iter_frames(fps=sets["fps"]):
+            frames += 1
+        clip.close()
+    return frames
+
+
+def case_intro(config, audio_dir):
+    _, videos, _ = get_president_assets(config["paths"]["library_base"], "Intro", config)
+    audio = AudioFileClip(os.path.join(audio_dir, "intro.mp3"))
+    try:
+        intro, _ = generate_dynamic_intro(audio, config, videos, rng=random.Random(BENCH_SEED))
+        if intro is None:
+            raise RuntimeError("No se pudo planificar la intro sintética.")
+        frames = sum(1 for _ in intro.without_audio().iter_frames(fps=config["video_settings"]["fps"]))
+        intro.close()
+    finally:
+        audio.close()
+    return frames
+
+
+def case_pipeline(config, audio_dir, parallel=False):
+    """plan_video + render_plan (como generate_video_pipeline, sin interfaz) hasta el .mp4 final."""
+    config["video_settings"]["parallel_segments"] = parallel
+    plan = plan_video(collect_audio_order(audio_dir), config, engine_version="v2_estable", seed=BENCH_SEED)
+    out_path = os.path.join(config["paths"]["output_folder"],
+                            f"bench_{'par' if parallel else 'seq'}_{safe_resolution(config)[1]}.mp4")
+    render_plan(plan, out_path, config, logger=None)
+    frames = int(round(plan["duration"] * config["video_settings"]["fps"]))
+    os.remove(out_path)
+    return frames
+
+
+def run_case(case, config, audio_dir):
+    """Ejecuta un caso y devuelve su registro de resultados (pensado para correr en un proceso nuevo)."""
+    fps = config["video_settings"]["fps"]
+    start = time.perf_counter()
+    if case == "combo_v1":
+        frames = case_combo(config, "v1_estable")
+    elif case == "combo_v2":
+        frames = case_combo(config, "v2_estable")
+    elif case == "intro":
+        frames = case_intro(config, audio_dir)
+    elif case == "pipeline":
+        frames = case_pipeline(config, audio_dir)
+    elif case == "pipeline_parallel":
+        frames = case_pipeline(config, audio_dir, parallel=True)
+    else:
+        raise ValueError(f"Caso desconocido: {case}")
+    elapsed = time.perf_counter() - start
+
+    output_seconds = frames / fps
+    return {
+        "case": case,
+        "resolution": list(safe_resolution(config)),
+        "fps": fps,
+        "seconds": round(elapsed, 3),
+        "output_frames": frames,
+        "output_seconds": round(output_seconds, 3),
+        "frames_per_second": round(frames / elapsed, 2) if elapsed > 0 else None,
+        "seconds_per_output_minute": round(elapsed / (output_seconds / 60.0), 2) if output_seconds > 0 else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _case_worker(queue, case, config, audio_dir):
+    try:
+        queue.put(("ok", run_case(case, config, audio_dir)))
+    except Exception:
+        queue.put(("error", traceback.format_exc()))
+
+
+def run_case_isolated(case, config, audio_dir):
+    # Proceso nuevo por caso (spawn): pico de memoria y cachés en memoria independientes.
+    # Process y no Pool: el caso paralelo necesita crear sus propios procesos (no daemon).
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_case_worker, args=(queue, case, config, audio_dir))
+    proc.start()
+    status, payload = queue.get()
+    proc.join()
+    if status != "ok":
+        raise RuntimeError(f"Caso {case} fallido:\n{payload}")
+    return payload
+
+
+def run_benchmarks(presets, cases, workdir=None, scale=1.0, fps=30, segment_seconds=10.0, isolate=True,
+                   log_callback=None):
+    """Construye la biblioteca sintética y ejecuta cada caso en cada preset. Devuelve el informe (dict)."""
+    log = log_callback or (lambda msg: None)
+    own_workdir = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix="bench_render_")
+    try:
+        log("🧪 Generando biblioteca sintética...")
+        audio_dir = build_synthetic_library(workdir, scale=scale, segment_seconds=segment_seconds)
+        results = []
+        for preset in presets:
+            resolution = PRESETS[preset] if isinstance(preset, str) else tuple(preset)
+            for case in cases:
+                config = bench_config(workdir, resolution, fps=fps)
+                # Caché en frío por caso: ningún caso aprovecha las fotos escaladas de otro
+                config["cache"]["folder"] = os.path.join(workdir, "cache", f"{case}_{resolution[0]}x{resolution[1]}")
+                log(f"⏱️ {case} @ {resolution[0]}x{resolution[1]}...")
+                result = run_case_isolated(case, config, audio_dir) if isolate else run_case(case, config, audio_dir)
+                result["preset"] = preset if isinstance(preset, str) else f"{resolution[0]}x{resolution[1]}"
+                results.append(result)
+                log(f"   {result['frames_per_second']} fps, {result['seconds_per_output_minute']} s/min, "
+                    f"RSS {result['peak_rss_mb']} MB")
+        return {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "settings": {"scale": scale, "fps": fps, "segment_seconds": segment_seconds, "seed": BENCH_SEED},
+            "results": results,
+        }
+    finally:
+        if own_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare_reports(report, baseline, tolerance=0.15):
+    """Casos (preset, caso) cuyo frames_per_second cae más de `tolerance` respecto a `baseline`."""
+    previous = {(r["preset"], r["case"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in report["results"]:
+        old = previous.get((r["preset"], r["case"]))
+        if not old or not old.get("frames_per_second") or not r.get("frames_per_second"):
+            continue
+        change = r["frames_per_second"] / old["frames_per_second"] - 1.0
+        if change < -tolerance:
+            regressions.append({"preset": r["preset"], "case": r["case"], "baseline_fps": old["frames_per_second"],
+                                "fps": r["frames_per_second"], "change": round(change, 3)})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offline de los motores de render.")
+    parser.add_argument("--presets", nargs="+", default=list(PRESETS), choices=list(PRESETS))
+    parser.add_argument("--cases", nargs="+", default=list(CASES), choices=list(CASES))
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--scale", type=float, default=1.0, help="Escala de fotos y videos sintéticos")
+    parser.add_argument("--segment-seconds", type=float, default=10.0, help="Duración de cada audio de top")
+    parser.add_argument("--workdir", default=None, help="Carpeta de trabajo (por defecto, temporal)")
+    parser.add_argument("--out", default=None, help="Archivo JSON de salida (por defecto, stdout)")
+    parser.add_argument("--baseline", default=None, help="Informe anterior para detectar regresiones")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Caída de fps tolerada frente al baseline")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.presets, args.cases, workdir=args.workdir, scale=args.scale, fps=args.fps,
+                            segment_seconds=args.segment_seconds, log_callback=lambda msg: print(msg, file=sys.stderr))
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            report["regressions"] = compare_reports(report, json.load(f), args.tolerance)
+        for reg in report["regressions"]:
+            print(f"❌ Regresión {reg['case']} @ {reg['preset']}: {reg['baseline_fps']} -> {reg['fps']} fps",
+                  file=sys.stderr)
+        exit_code = 1 if report["regressions"] else 0
+
+    text = json.dumps(report, indent=4, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())